@@ -4,7 +4,9 @@ Vercel serverless function entry point with PostgreSQL
 import os
 import sys
 import base64
+import hashlib
 import json
+import zlib
 import requests
 from flask import Flask, render_template, jsonify, request
 from dotenv import load_dotenv
@@ -493,13 +495,57 @@ print(f"Original DB URL: {postgres_url[:50]}..." if len(postgres_url) > 50 else
 if postgres_url.startswith('postgres://'):
     postgres_url = postgres_url.replace('postgres://', 'postgresql://', 1)
     print("Fixed postgres:// to postgresql://")
-app.config['SQLALCHEMY_DATABASE_URI'] = postgres_url
+
+# Engine profile, chosen by environment like the main app's (database_engine.py):
+# - serverless (the default here): no pool of our own (NullPool) - a connection per request, to
+#   Neon's pooler (-pooler host) - or a tiny pool with DATABASE_POOL_SIZE; no pre-ping, and a
+#   statement timeout (set on the role instead behind the pooler, which drops startup options)
+# - worker: a pre-pinged, recycled pool for long-running processes
+# - sqlite (the local fallback): WAL and a busy timeout
+def database_engine_settings(url_string):
+    """(profile, database URL, SQLAlchemy engine options) from the environment"""
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.pool import NullPool
+
+    url = make_url(url_string)
+    if url.get_backend_name() == 'sqlite':
+        busy_timeout_ms = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+        return 'sqlite', url_string, {'connect_args': {'timeout': busy_timeout_ms / 1000}}
+
+    profile = os.getenv('DATABASE_ENGINE_PROFILE', 'serverless')
+    serverless = profile != 'worker'
+    pool_size = int(os.getenv('DATABASE_POOL_SIZE', '0' if serverless else '10'))
+    max_overflow = int(os.getenv('DATABASE_MAX_OVERFLOW', '0' if serverless else '10'))
+    statement_timeout_ms = int(os.getenv('DATABASE_STATEMENT_TIMEOUT_MS', '15000' if serverless else '0'))
+
+    pooler = '-pooler' in (url.host or '') or url.query.get('pgbouncer') == 'true'
+    url = url.difference_update_query(['pgbouncer'])  # libpq rejects it
+
+    if not serverless:
+        options = {'pool_size': pool_size, 'max_overflow': max_overflow, 'pool_pre_ping': True, 'pool_recycle': 1800}
+    elif pool_size > 0:
+        # recycled before Neon drops idle connections
+        options = {'pool_size': pool_size, 'max_overflow': max_overflow, 'pool_recycle': 240, 'pool_use_lifo': True}
+    else:
+        options = {'poolclass': NullPool}
+
+    connect_args = {'connect_timeout': 10}
+    if statement_timeout_ms > 0 and not pooler:
+        connect_args['options'] = f'-c statement_timeout={statement_timeout_ms}'
+    if pooler and url.get_driver_name() == 'psycopg':
+        connect_args['prepare_threshold'] = None  # no server-side prepared statements through the pooler
+    options['connect_args'] = connect_args
+    return profile, url.render_as_string(hide_password=False), options
+
+try:
+    db_engine_profile, app.config['SQLALCHEMY_DATABASE_URI'], app.config['SQLALCHEMY_ENGINE_OPTIONS'] = \
+        database_engine_settings(postgres_url)
+    print(f"Database engine profile: {db_engine_profile}")
+except Exception as e:
+    print(f"Failed to configure the database engine: {e}")
+    db_engine_profile = None
+    app.config['SQLALCHEMY_DATABASE_URI'] = postgres_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'pool_timeout': 20,
-    'pool_recycle': -1,
-    'pool_pre_ping': True
-}
 
 # Initialize database inline to avoid import issues
 try:
@@ -509,6 +555,17 @@ try:
 
     db = SQLAlchemy()
     db.init_app(app)
+    if db_engine_profile == 'sqlite':
+        from sqlalchemy import event
+
+        def set_sqlite_pragmas(dbapi_connection, _):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        with app.app_context():
+            event.listen(db.engine, 'connect', set_sqlite_pragmas)
     print("SQLAlchemy initialized successfully")
     DB_AVAILABLE = True
 except Exception as e:
@@ -563,18 +620,20 @@ if DB_AVAILABLE and db:
                 'error': None
             }
         
-        def get_stats(self):
-            """Get project statistics"""
+        def get_stats(self, status_counts=None):
+            """Get project statistics - from {status: count} of keyword_status_counts(), or counted now"""
+            if status_counts is None:
+                status_counts = keyword_status_counts([self.id]).get(self.id, {})
             return {
-                'total_keywords': len(self.keywords),
-                'pending_keywords': len([k for k in self.keywords if k.status == 'pending']),
-                'processing_keywords': len([k for k in self.keywords if k.status == 'processing']),
-                'completed_keywords': len([k for k in self.keywords if k.status == 'completed']),
-                'failed_keywords': len([k for k in self.keywords if k.status == 'failed']),
-                'total_articles': len([k for k in self.keywords if k.status == 'completed'])
+                'total_keywords': sum(status_counts.values()),
+                'pending_keywords': status_counts.get('pending', 0),
+                'processing_keywords': status_counts.get('processing', 0),
+                'completed_keywords': status_counts.get('completed', 0),
+                'failed_keywords': status_counts.get('failed', 0),
+                'total_articles': status_counts.get('completed', 0)
             }
         
-        def to_dict(self):
+        def to_dict(self, status_counts=None):
             """Convert model to dictionary for JSON serialization"""
             return {
                 'id': self.id,
@@ -587,7 +646,7 @@ if DB_AVAILABLE and db:
                 'neuron_settings': self.get_neuron_settings(),
                 'status': self.status,
                 'wordpress_status': self.get_wordpress_status(),
-                'stats': self.get_stats(),
+                'stats': self.get_stats(status_counts),
                 'created_at': self.created_at.isoformat() if self.created_at else None,
                 'updated_at': self.updated_at.isoformat() if self.updated_at else None
             }
@@ -595,6 +654,16 @@ if DB_AVAILABLE and db:
         def __repr__(self):
             return f'<Project {self.name}>'
 
+    class ContentBlob(db.Model):
+        """Article HTML, zlib-compressed, stored once per distinct content under its SHA-256"""
+        __tablename__ = 'content_blobs'
+        
+        hash = db.Column(db.String(64), primary_key=True)
+        encoding = db.Column(db.String(20), nullable=False, default='zlib')
+        size = db.Column(db.Integer, nullable=False)  # uncompressed bytes
+        data = db.Column(db.LargeBinary, nullable=False)
+        created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
     class Keyword(db.Model):
         """Model for managing keyword processing queue"""
         __tablename__ = 'keywords'
@@ -620,7 +689,8 @@ if DB_AVAILABLE and db:
         # Article Information (when completed)
         article_title = db.Column(db.String(500))
         meta_description = db.Column(db.Text)
-        article_content = db.Column(db.Text)  # HTML content
+        article_content = db.deferred(db.Column(db.Text))  # HTML of articles created before content_blobs
+        article_content_hash = db.Column(db.String(64))  # HTML content, in content_blobs
         content_score = db.Column(db.Integer)
         wordpress_post_id = db.Column(db.Integer)
         
@@ -628,6 +698,11 @@ if DB_AVAILABLE and db:
         created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
         processed_at = db.Column(db.DateTime(timezone=True))
         
+        # keyset-paginated listing (api/migrations/versions/0002_api_keywords_listing_index.py)
+        __table_args__ = (
+            db.Index('ix_keywords_project_created', 'project_id', 'created_at', 'id'),
+        )
+        
         def get_tags(self):
             """Get tags as list from JSON string"""
             if self.tags_json:
@@ -670,91 +745,92 @@ else:
     print("Creating fallback classes without database")
     Project = None
     Keyword = None
+    ContentBlob = None
+
+def keyword_status_counts(project_ids=None):
+    """{project_id: {status: count}} - one GROUP BY project_id, status instead of loading every keyword"""
+    query = db.session.query(
+        Keyword.project_id,
+        Keyword.status,
+        db.func.count(Keyword.id)
+    ).group_by(Keyword.project_id, Keyword.status)
+    if project_ids is not None:
+        query = query.filter(Keyword.project_id.in_(list(project_ids)))
+
+    counts = {}
+    for project_id, status, count in query:
+        counts.setdefault(project_id, {})[status] = count
+    return counts
+
+def store_article_content(content):
+    """Store article HTML compressed in content_blobs, once per distinct content - its hash"""
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    if db.session.get(ContentBlob, digest) is None:
+        raw = content.encode('utf-8')
+        db.session.add(ContentBlob(hash=digest, encoding='zlib', size=len(raw), data=zlib.compress(raw, 6)))
+    return digest
+
+def load_article_content(keyword):
+    """A keyword's article HTML - moving content stored inline in keywords to content_blobs"""
+    if keyword.article_content_hash:
+        blob = db.session.get(ContentBlob, keyword.article_content_hash)
+        return zlib.decompress(blob.data).decode('utf-8') if blob else None
+    content = keyword.article_content
+    if content:
+        keyword.article_content_hash = store_article_content(content)
+        keyword.article_content = None
+        db.session.commit()
+    return content
+
+KEYWORDS_PAGE_SIZE = 50
+KEYWORDS_MAX_PAGE_SIZE = 200
+KEYWORDS_COUNT_CAP = 10000  # filtered listings are counted up to this many
 
-# Create tables when app starts
-def init_database():
-    """Initialize database tables"""
+def encode_keyword_cursor(keyword):
+    """Opaque cursor of the page after a keyword - its (created_at, id)"""
+    payload = json.dumps([keyword.created_at.isoformat(), keyword.id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_keyword_cursor(cursor):
+    """(created_at, id) of a cursor - ValueError if it isn't one"""
     try:
-        with app.app_context():
-            db.create_all()
-            print("Database tables created successfully")
-            
-            # Try to handle schema changes gracefully
-            try:
-                # Just try to recreate tables (this will only add missing columns)
-                db.create_all()
-                print("Schema updated successfully")
-            except Exception as schema_error:
-                print(f"Schema update error: {schema_error}")
-                
-            # Add missing columns to keywords table
-            new_columns = [
-                ("search_engine", "VARCHAR(50)"),
-                ("language", "VARCHAR(50)"),
-                ("category_id", "INTEGER"),
-                ("tags_json", "TEXT"),
-                ("priority", "INTEGER DEFAULT 1"),
-                ("processing_by", "VARCHAR(100)"),
-                ("lease_until", "TIMESTAMP"),
-                ("error_message", "TEXT"),
-                ("attempts", "INTEGER DEFAULT 0"),
-                ("meta_description", "TEXT"),
-                ("article_content", "TEXT")
-            ]
-            
-            for column_name, column_type in new_columns:
-                try:
-                    # Test if column exists
-                    db.session.execute(db.text(f"SELECT {column_name} FROM keywords LIMIT 1"))
-                    print(f"{column_name} column exists")
-                except Exception:
-                    try:
-                        print(f"Adding {column_name} column...")
-                        db.session.execute(db.text(f"ALTER TABLE keywords ADD COLUMN {column_name} {column_type}"))
-                        db.session.commit()
-                        print(f"Added {column_name} column successfully")
-                    except Exception as e:
-                        print(f"Could not add {column_name} column: {e}")
-                        db.session.rollback()
-                    
-            # Test basic database operations
-            try:
-                test_query = db.session.execute(db.text("SELECT COUNT(*) FROM projects")).scalar()
-                print(f"Database test successful - found {test_query} projects")
-            except Exception as test_error:
-                print(f"Database test failed: {test_error}")
-                raise test_error
-    except Exception as e:
-        print(f"Error creating tables: {e}")
+        created_at, keyword_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), int(keyword_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def parse_date_filter(value):
+    """ISO date or datetime of a filter, UTC unless it has an offset"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Invalid date: {value}')
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
 
-# Initialize database with error handling
-try:
-    print("Attempting to initialize database...")
-    init_database()
-    print("Database initialization completed")
-except Exception as e:
-    print(f"Database initialization failed: {e}")
-    print("Continuing without database - will use fallback mode")
+# Head of api/migrations/versions - bump it with every migration added there
+SCHEMA_REVISION = '0003_api_content_blobs'
 
-# Add database health check
-def check_database_connection():
-    """Check if database connection is working"""
+def check_schema_version():
+    """
+    The schema is migrated out of band (flask --app api/manage.py db upgrade), not on cold starts -
+    only check, with one query, that the database is at SCHEMA_REVISION. Returns its revision.
+    """
     try:
         with app.app_context():
-            # Try to execute a simple query
-            result = db.session.execute(db.text('SELECT 1')).fetchone()
-            print(f"Database connection successful: {result}")
-            return True
+            with db.engine.connect() as connection:
+                revision = connection.execute(db.text("SELECT version_num FROM alembic_version")).scalar()
     except Exception as e:
-        print(f"Database connection failed: {e}")
-        return False
+        print(f"Database schema check failed: {e}")
+        return None
 
-# Check connection on startup with error handling
-try:
-    print("Checking database connection...")
-    check_database_connection()
-except Exception as e:
-    print(f"Initial database check failed: {e}")
+    if revision != SCHEMA_REVISION:
+        print(f"Database schema is at {revision}, expected {SCHEMA_REVISION} - "
+              f"run: flask --app api/manage.py db upgrade")
+    return revision
+
+SCHEMA_STATUS = {'revision': check_schema_version() if DB_AVAILABLE else None, 'expected': SCHEMA_REVISION}
 
 def get_dashboard_stats():
     """Calculate dashboard statistics from database with fallback"""
@@ -767,16 +843,16 @@ def get_dashboard_stats():
         }
     
     try:
-        projects = Project.query.all()
-        total_projects = len(projects)
-        active_projects = len([p for p in projects if p.status == 'active'])
+        projects = dict(db.session.query(Project.status, db.func.count(Project.id)).group_by(Project.status).all())
+        total_projects = sum(projects.values())
+        active_projects = projects.get('active', 0)
         
-        all_keywords = Keyword.query.all()
-        total_keywords = len(all_keywords)
-        pending_keywords = len([k for k in all_keywords if k.status == 'pending'])
-        processing_keywords = len([k for k in all_keywords if k.status == 'processing'])
-        completed_keywords = len([k for k in all_keywords if k.status == 'completed'])
-        failed_keywords = len([k for k in all_keywords if k.status == 'failed'])
+        keywords = dict(db.session.query(Keyword.status, db.func.count(Keyword.id)).group_by(Keyword.status).all())
+        total_keywords = sum(keywords.values())
+        pending_keywords = keywords.get('pending', 0)
+        processing_keywords = keywords.get('processing', 0)
+        completed_keywords = keywords.get('completed', 0)
+        failed_keywords = keywords.get('failed', 0)
         
         return {
             'projects': {'total': total_projects, 'active': active_projects, 'inactive': total_projects - active_projects},
@@ -1505,6 +1581,14 @@ def dashboard():
                                         </template>
                                     </tbody>
                                 </table>
+                                
+                                <div x-show="projectKeywordsCursor" class="text-center py-4">
+                                    <button @click="loadMoreKeywords()" :disabled="loadingMoreKeywords"
+                                            class="bg-gray-100 hover:bg-gray-200 text-gray-700 px-4 py-2 rounded-md text-sm font-medium">
+                                        <span x-show="!loadingMoreKeywords">טען עוד</span>
+                                        <span x-show="loadingMoreKeywords">⏳ טוען...</span>
+                                    </button>
+                                </div>
                             </div>
                         </div>
                     </div>
@@ -1782,6 +1866,14 @@ def dashboard():
                                     <p class="text-gray-500">No keywords added yet</p>
                                 </div>
                             </div>
+                            
+                            <div x-show="currentProjectKeywordsCursor" class="text-center mt-6">
+                                <button @click="loadMoreProjectKeywords()" :disabled="loadingMoreKeywords"
+                                        class="bg-gray-100 hover:bg-gray-200 text-gray-700 px-4 py-2 rounded-md font-medium">
+                                    <span x-show="!loadingMoreKeywords">Load more keywords</span>
+                                    <span x-show="loadingMoreKeywords">⏳ Loading...</span>
+                                </button>
+                            </div>
                         </div>
                     </div>
                 </div>
@@ -2171,9 +2263,12 @@ def dashboard():
                 showKeywords: false,
                 selectedProject: null,
                 projectKeywords: [],
+                projectKeywordsCursor: null,
                 // New project management variables
                 currentProject: null,
                 currentProjectKeywords: [],
+                currentProjectKeywordsCursor: null,
+                loadingMoreKeywords: false,
                 refreshingCategories: false,
                 refreshingProject: null,
                 creatingArticle: null,
@@ -2355,23 +2450,52 @@ def dashboard():
                     }
                 },
 
+                // One page of a project's keywords - the next one after cursor
+                async fetchKeywordsPage(projectId, cursor = null) {
+                    const params = new URLSearchParams({ limit: 50 });
+                    if (cursor) params.set('cursor', cursor);
+                    const response = await fetch(`/api/projects/${projectId}/keywords?${params}`);
+                    return await response.json();
+                },
+
                 async viewKeywords(projectId) {
                     this.selectedProject = this.projects.find(p => p.id === projectId);
                     this.showKeywords = true;
                     
                     try {
-                        const response = await fetch(`/api/projects/${projectId}/keywords`);
-                        const data = await response.json();
+                        const data = await this.fetchKeywordsPage(projectId);
                         
                         if (data.success) {
                             this.projectKeywords = data.keywords;
+                            this.projectKeywordsCursor = data.next_cursor;
                         } else {
                             console.error('Error loading keywords:', data.error);
                             this.projectKeywords = [];
+                            this.projectKeywordsCursor = null;
                         }
                     } catch (error) {
                         console.error('Error loading keywords:', error);
                         this.projectKeywords = [];
+                        this.projectKeywordsCursor = null;
+                    }
+                },
+
+                async loadMoreKeywords() {
+                    if (!this.selectedProject || !this.projectKeywordsCursor || this.loadingMoreKeywords) return;
+                    
+                    this.loadingMoreKeywords = true;
+                    try {
+                        const data = await this.fetchKeywordsPage(this.selectedProject.id, this.projectKeywordsCursor);
+                        if (data.success) {
+                            this.projectKeywords = this.projectKeywords.concat(data.keywords);
+                            this.projectKeywordsCursor = data.next_cursor;
+                        } else {
+                            console.error('Error loading keywords:', data.error);
+                        }
+                    } catch (error) {
+                        console.error('Error loading keywords:', error);
+                    } finally {
+                        this.loadingMoreKeywords = false;
                     }
                 },
 
@@ -2379,6 +2503,7 @@ def dashboard():
                     this.showKeywords = false;
                     this.selectedProject = null;
                     this.projectKeywords = [];
+                    this.projectKeywordsCursor = null;
                 },
 
                 async createArticle(keyword) {
@@ -2403,33 +2528,43 @@ def dashboard():
 
                 async loadProjectKeywords(projectId) {
                     try {
-                        const response = await fetch(`/api/projects/${projectId}/keywords`);
-                        const data = await response.json();
+                        const data = await this.fetchKeywordsPage(projectId);
                         
                         if (data.success) {
                             this.currentProjectKeywords = data.keywords;
-                            // Update project stats based on keywords
-                            if (this.currentProject) {
-                                const total = data.keywords.length;
-                                const pending = data.keywords.filter(k => k.status === 'pending').length;
-                                const completed = data.keywords.filter(k => k.status === 'completed').length;
-                                const processing = data.keywords.filter(k => k.status === 'processing').length;
-                                
-                                this.currentProject.stats = {
-                                    total_keywords: total,
-                                    pending_keywords: pending,
-                                    completed_keywords: completed,
-                                    processing_keywords: processing,
-                                    total_articles: completed
-                                };
+                            this.currentProjectKeywordsCursor = data.next_cursor;
+                            // Update project stats - counted on the server, the list is only the first page
+                            if (this.currentProject && data.stats) {
+                                this.currentProject.stats = data.stats;
                             }
                         } else {
                             console.error('Error loading project keywords:', data.error);
                             this.currentProjectKeywords = [];
+                            this.currentProjectKeywordsCursor = null;
                         }
                     } catch (error) {
                         console.error('Error loading project keywords:', error);
                         this.currentProjectKeywords = [];
+                        this.currentProjectKeywordsCursor = null;
+                    }
+                },
+
+                async loadMoreProjectKeywords() {
+                    if (!this.currentProject || !this.currentProjectKeywordsCursor || this.loadingMoreKeywords) return;
+                    
+                    this.loadingMoreKeywords = true;
+                    try {
+                        const data = await this.fetchKeywordsPage(this.currentProject.id, this.currentProjectKeywordsCursor);
+                        if (data.success) {
+                            this.currentProjectKeywords = this.currentProjectKeywords.concat(data.keywords);
+                            this.currentProjectKeywordsCursor = data.next_cursor;
+                        } else {
+                            console.error('Error loading project keywords:', data.error);
+                        }
+                    } catch (error) {
+                        console.error('Error loading project keywords:', error);
+                    } finally {
+                        this.loadingMoreKeywords = false;
                     }
                 },
 
@@ -2660,7 +2795,8 @@ def get_projects():
     
     try:
         projects = Project.query.all()
-        projects_data = [project.to_dict() for project in projects]
+        status_counts = keyword_status_counts(project.id for project in projects)
+        projects_data = [project.to_dict(status_counts.get(project.id, {})) for project in projects]
         return jsonify({
             'success': True,
             'projects': projects_data,
@@ -2810,12 +2946,17 @@ def add_keywords_to_project(project_id):
 
 @app.route('/api/projects/<int:project_id>/keywords', methods=['GET'])
 def get_project_keywords(project_id):
-    """Get keywords for a project"""
+    """
+    A page of a project's keywords, newest first - ordered by (created_at, id).
+    Query parameters: limit, cursor (next_cursor of the previous page), status (comma-separated),
+    created_after / created_before (ISO dates) and q (keyword prefix).
+    The X-Total-Count-Estimate header estimates how many keywords match.
+    """
     if not DB_AVAILABLE:
         return jsonify({
             'success': True,
             'keywords': [],
-            'total': 0,
+            'next_cursor': None,
             'message': 'Database not available - using fallback mode'
         })
         
@@ -2825,15 +2966,58 @@ def get_project_keywords(project_id):
         if not project:
             return jsonify({'success': False, 'error': 'Project not found'}), 404
         
-        # Get keywords for this project
-        keywords = Keyword.query.filter_by(project_id=project_id).all()
-        keywords_data = [k.to_dict() for k in keywords]
+        try:
+            limit = max(1, min(int(request.args.get('limit', KEYWORDS_PAGE_SIZE)), KEYWORDS_MAX_PAGE_SIZE))
+            cursor = decode_keyword_cursor(request.args['cursor']) if request.args.get('cursor') else None
+            created_after = parse_date_filter(request.args.get('created_after'))
+            created_before = parse_date_filter(request.args.get('created_before'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        statuses = [status for status in request.args.get('status', '').split(',') if status]
+        prefix = request.args.get('q', '').strip().lower()
+        
+        # Filter on the server
+        query = Keyword.query.filter(Keyword.project_id == project_id)
+        if statuses:
+            query = query.filter(Keyword.status.in_(statuses))
+        if created_after:
+            query = query.filter(Keyword.created_at >= created_after)
+        if created_before:
+            query = query.filter(Keyword.created_at < created_before)
+        if prefix:
+            escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            query = query.filter(db.func.lower(Keyword.keyword).like(escaped + '%', escape='\\'))
+        
+        # Count estimate - the grouped status counts, or a count capped at KEYWORDS_COUNT_CAP
+        status_counts = keyword_status_counts([project_id]).get(project_id, {})
+        if not (created_after or created_before or prefix):
+            estimate = str(sum(count for status, count in status_counts.items() if not statuses or status in statuses))
+        else:
+            count = db.session.query(db.func.count()).select_from(
+                query.limit(KEYWORDS_COUNT_CAP + 1).subquery()
+            ).scalar()
+            estimate = f'{KEYWORDS_COUNT_CAP}+' if count > KEYWORDS_COUNT_CAP else str(count)
+        
+        # Keyset pagination - continue after the cursor's (created_at, id)
+        if cursor:
+            after_created_at, after_id = cursor
+            query = query.filter(
+                Keyword.created_at <= after_created_at,
+                db.or_(Keyword.created_at < after_created_at,
+                       db.and_(Keyword.created_at == after_created_at, Keyword.id < after_id))
+            )
+        keywords = query.order_by(Keyword.created_at.desc(), Keyword.id.desc()).limit(limit + 1).all()
+        next_cursor = encode_keyword_cursor(keywords[limit - 1]) if len(keywords) > limit else None
+        keywords = keywords[:limit]
         
-        return jsonify({
+        response = jsonify({
             'success': True,
-            'keywords': keywords_data,
-            'total': len(keywords_data)
+            'keywords': [k.to_dict() for k in keywords],
+            'next_cursor': next_cursor,
+            'stats': project.get_stats(status_counts)
         })
+        response.headers['X-Total-Count-Estimate'] = estimate
+        return response
         
     except Exception as e:
         print(f"Error getting project keywords: {e}")
@@ -2889,6 +3073,8 @@ def health_check():
             'status': 'healthy',
             'environment': 'vercel-serverless',
             'database': db_status,
+            'schema_revision': SCHEMA_STATUS['revision'],
+            'schema_current': SCHEMA_STATUS['revision'] == SCHEMA_STATUS['expected'],
             'database_url': 'neon-postgres' if 'neon' in (os.getenv('POSTGRES_URL', '') or '') else 'fallback',
             'stats': stats,
             'message': 'AI Content Maker API is running with Neon Postgres'
@@ -2944,7 +3130,7 @@ def create_article_endpoint(keyword_id):
                 keyword.processed_at = datetime.now(timezone.utc)
                 keyword.article_title = response_data['title']
                 keyword.meta_description = response_data['meta_description']
-                keyword.article_content = response_data['article_content']
+                keyword.article_content_hash = store_article_content(response_data['article_content'])
                 keyword.content_score = response_data['content_score']
                 keyword.attempts += 1
                 
@@ -2991,7 +3177,8 @@ def get_article_content(keyword_id):
         if not keyword:
             return jsonify({'success': False, 'error': 'Keyword not found'}), 404
         
-        if keyword.status != 'completed' or not keyword.article_content:
+        content = load_article_content(keyword) if keyword.status == 'completed' else None
+        if not content:
             return jsonify({'success': False, 'error': 'Article not yet created'}), 400
         
         return jsonify({
@@ -2999,7 +3186,7 @@ def get_article_content(keyword_id):
             'keyword': keyword.keyword,
             'title': keyword.article_title,
             'meta_description': keyword.meta_description,
-            'content': keyword.article_content,
+            'content': content,
             'content_score': keyword.content_score,
             'created_at': keyword.processed_at.isoformat() if keyword.processed_at else None
         })
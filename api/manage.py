@@ -0,0 +1,30 @@
+"""
+Flask-Migrate commands of the Vercel app (api/index.py), run out of band - before deploying,
+never on a cold start:
+
+    flask --app api/manage.py db upgrade
+
+Kept out of index.py so Flask-Migrate and alembic aren't imported on every cold start.
+"""
+import logging
+import os
+
+from alembic.script import ScriptDirectory
+from flask_migrate import Migrate
+
+# migrations run DDL (CREATE INDEX CONCURRENTLY) - straight to the database, not through the
+# transaction pooler, and without the serverless profile's statement timeout
+if os.getenv('POSTGRES_URL_NON_POOLING'):
+    os.environ['POSTGRES_URL'] = os.environ['POSTGRES_URL_NON_POOLING']
+os.environ.setdefault('DATABASE_ENGINE_PROFILE', 'worker')
+
+from index import app, db, SCHEMA_REVISION
+
+MIGRATIONS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+migrate = Migrate(app, db, directory=MIGRATIONS_DIRECTORY)
+
+head = ScriptDirectory(MIGRATIONS_DIRECTORY).get_current_head()
+if head != SCHEMA_REVISION:
+    logging.warning(f"index.SCHEMA_REVISION is {SCHEMA_REVISION} but the newest migration is {head} - "
+                    f"update it, or the app will report the schema as out of date")
@@ -0,0 +1,70 @@
+"""initial schema of the Vercel app
+
+The projects and keywords tables as init_database() created them - db.create_all() plus
+the keywords columns it added with ALTER TABLE - before migrations were added. A database
+created that way is brought under migrations with:
+
+    flask --app api/manage.py db stamp 0001_api_initial_schema
+    flask --app api/manage.py db upgrade
+
+Revision ID: 0001_api_initial_schema
+Revises: 
+Create Date: 2026-10-19 16:40:12.318520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_api_initial_schema'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('projects',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('website_url', sa.String(length=255), nullable=False),
+    sa.Column('wordpress_user', sa.String(length=100), nullable=True),
+    sa.Column('wordpress_password', sa.String(length=255), nullable=True),
+    sa.Column('neuron_project_id', sa.String(length=100), nullable=True),
+    sa.Column('neuron_search_engine', sa.String(length=50), nullable=True),
+    sa.Column('neuron_language', sa.String(length=20), nullable=True),
+    sa.Column('daily_keywords_limit', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('keywords',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('keyword', sa.String(length=255), nullable=False),
+    sa.Column('search_engine', sa.String(length=50), nullable=True),
+    sa.Column('language', sa.String(length=50), nullable=True),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('tags_json', sa.Text(), nullable=True),
+    sa.Column('priority', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('processing_by', sa.String(length=100), nullable=True),
+    sa.Column('lease_until', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('article_title', sa.String(length=500), nullable=True),
+    sa.Column('meta_description', sa.Text(), nullable=True),
+    sa.Column('article_content', sa.Text(), nullable=True),
+    sa.Column('content_score', sa.Integer(), nullable=True),
+    sa.Column('wordpress_post_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('keywords')
+    op.drop_table('projects')
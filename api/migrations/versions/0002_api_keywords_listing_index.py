@@ -0,0 +1,36 @@
+"""keywords listing index
+
+(project_id, created_at, id) index of the keyset-paginated keyword listing
+(/api/projects/<id>/keywords). init_database() created it on databases it ran on.
+
+Revision ID: 0002_api_keywords_listing_index
+Revises: 0001_api_initial_schema
+Create Date: 2026-10-19 16:41:05.902771
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_api_keywords_listing_index'
+down_revision = '0001_api_initial_schema'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'ix_keywords_project_created' in {index['name'] for index in sa.inspect(bind).get_indexes('keywords')}:
+        return
+    if bind.dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY can't run inside a transaction
+        with op.get_context().autocommit_block():
+            op.create_index('ix_keywords_project_created', 'keywords', ['project_id', 'created_at', 'id'],
+                            postgresql_concurrently=True)
+    else:
+        op.create_index('ix_keywords_project_created', 'keywords', ['project_id', 'created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_keywords_project_created', table_name='keywords')
@@ -0,0 +1,43 @@
+"""article content store of the Vercel app
+
+content_blobs - article HTML, zlib-compressed, once per distinct content under its SHA-256 -
+and keywords.article_content_hash pointing into it. Content already stored inline in
+keywords.article_content is moved there the first time it's read.
+
+Revision ID: 0003_api_content_blobs
+Revises: 0002_api_keywords_listing_index
+Create Date: 2026-10-19 16:42:31.447018
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_api_content_blobs'
+down_revision = '0002_api_keywords_listing_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    # init_database() created them on databases it ran on
+    if not inspector.has_table('content_blobs'):
+        op.create_table('content_blobs',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('encoding', sa.String(length=20), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('hash')
+        )
+    if 'article_content_hash' not in {column['name'] for column in inspector.get_columns('keywords')}:
+        op.add_column('keywords', sa.Column('article_content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('keywords', schema=None) as batch_op:
+        batch_op.drop_column('article_content_hash')
+    op.drop_table('content_blobs')
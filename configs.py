@@ -19,7 +19,27 @@ app = Flask(__name__)
 
 # Database configuration
 database_url = os.getenv('DATABASE_URL', 'sqlite:///content_maker.db')
-app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+
+# engine profile (database_engine.py): 'serverless' (Vercel), 'worker' (long-running processes)
+# or 'sqlite' - by default from the URL and whether we run on Vercel
+from database_engine import default_engine_profile, engine_settings, configure_engine
+database_engine_profile = os.getenv('DATABASE_ENGINE_PROFILE') or default_engine_profile(database_url, os.getenv('VERCEL') == '1')
+serverless_engine = database_engine_profile == 'serverless'
+# pool size 0 on serverless = no pool (NullPool), a connection per request
+database_pool_size = int(os.getenv('DATABASE_POOL_SIZE', '0' if serverless_engine else '10'))
+database_max_overflow = int(os.getenv('DATABASE_MAX_OVERFLOW', '0' if serverless_engine else '10'))
+# Postgres statement timeout (0 = none); behind a transaction pooler set it on the database role instead
+database_statement_timeout_ms = int(os.getenv('DATABASE_STATEMENT_TIMEOUT_MS', '15000' if serverless_engine else '0'))
+sqlite_busy_timeout_ms = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+
+app.config['SQLALCHEMY_DATABASE_URI'], app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_settings(
+    database_url,
+    database_engine_profile,
+    pool_size=database_pool_size,
+    max_overflow=database_max_overflow,
+    statement_timeout_ms=database_statement_timeout_ms,
+    sqlite_busy_timeout_ms=sqlite_busy_timeout_ms
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
 
@@ -27,6 +47,8 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-pro
 from database_models import db
 db.init_app(app)
 migrate = Migrate(app, db)
+with app.app_context():
+    configure_engine(db.engine)
 
 app_port = os.getenv('APP_PORT')
 
@@ -115,6 +137,13 @@ midjourney_action_fast_url = os.getenv('RAPID_MIDJOURNEY_ACTION_FAST_URL')
 imagine_api_dev_key = os.getenv('IMAGINE_API_DEV_KEY')
 midjourney_prompt_pattern = os.getenv('MIDJOURNEY_PROMPT_PATTERN')
 
+# shared image job poller - adaptive interval bounds (seconds)
+imagine_poll_min_interval_seconds = float(os.getenv('IMAGINE_POLL_MIN_INTERVAL_SECONDS', '5'))
+imagine_poll_max_interval_seconds = float(os.getenv('IMAGINE_POLL_MAX_INTERVAL_SECONDS', '30'))
+
+# shared secret for the image job webhook (push alternative to polling)
+image_job_webhook_secret = os.getenv('IMAGE_JOB_WEBHOOK_SECRET')
+
 
 ######################################
 # Airtable API
@@ -139,6 +168,66 @@ max_keywords_per_day = int(os.getenv('MAX_KEYWORDS_PER_DAY'))
 
 google_sheets_keyword_lease_minutes = int(os.getenv('GOOGLE_SHEETS_KEYWORD_LEASE_MINUTES'))
 
+# database scheduler worker pool: keywords processed at once, overall and per project
+# (1 = process keywords one after another)
+scheduler_max_workers = int(os.getenv('SCHEDULER_MAX_WORKERS', '4'))
+scheduler_max_workers_per_project = int(os.getenv('SCHEDULER_MAX_WORKERS_PER_PROJECT', '2'))
+
+# how claimed keywords are processed:
+# 'pool' - each keyword end-to-end on the worker pool above
+# 'pipeline' - stage by stage (database_pipeline), with a worker pool per stage
+scheduler_execution_mode = os.getenv('SCHEDULER_EXECUTION_MODE', 'pool')
+
+# run the database scheduler as a batch at midnight from main.py (APScheduler);
+# turn off when the keyword worker (worker.py) runs instead
+run_daily_database_scheduler = (os.getenv('RUN_DAILY_DATABASE_SCHEDULER', '1') == '1')
+
+# keyword worker (worker.py): seconds between checks for due schedules
+worker_poll_seconds = int(os.getenv('WORKER_POLL_SECONDS', '30'))
+# seconds between re-reading the schedules (new/changed schedules are picked up after this)
+worker_schedule_refresh_seconds = int(os.getenv('WORKER_SCHEDULE_REFRESH_SECONDS', '300'))
+
+# hours from a schedule's start_time (in its own timezone) over which its daily_limit keywords are spread
+schedule_window_hours = float(os.getenv('SCHEDULE_WINDOW_HOURS', '12'))
+
+# staged pipeline: workers per stage and the size of the queue in front of each stage
+pipeline_neuron_workers = int(os.getenv('PIPELINE_NEURON_WORKERS', '16'))  # mostly waiting on Neuron
+pipeline_gpt_workers = int(os.getenv('PIPELINE_GPT_WORKERS', '4'))
+pipeline_publish_workers = int(os.getenv('PIPELINE_PUBLISH_WORKERS', '4'))
+pipeline_queue_size = int(os.getenv('PIPELINE_QUEUE_SIZE', '8'))
+
+# OpenAI tokens-per-minute budget of the GPT stages (0 = unlimited),
+# and the estimated tokens one article uses
+openai_tokens_per_minute = int(os.getenv('OPENAI_TOKENS_PER_MINUTE', '0'))
+pipeline_tokens_per_article_estimate = int(os.getenv('PIPELINE_TOKENS_PER_ARTICLE_ESTIMATE', '30000'))
+
+# keyword leases: a claim lasts keyword_lease_seconds and is renewed every
+# keyword_lease_heartbeat_seconds while the job reports progress; a job with no progress
+# for keyword_lease_stall_seconds stops being renewed, so its keyword can be reclaimed
+keyword_lease_seconds = int(os.getenv('KEYWORD_LEASE_SECONDS', '300'))
+keyword_lease_heartbeat_seconds = int(os.getenv('KEYWORD_LEASE_HEARTBEAT_SECONDS', '60'))
+keyword_lease_stall_seconds = int(os.getenv('KEYWORD_LEASE_STALL_SECONDS', '1800'))
+
+# retries: a transient failure (timeouts, 429s, 5xx) is retried with exponential backoff
+# (base * 2^(attempt - 1), capped) up to keyword_max_attempts; permanent failures and
+# keywords out of attempts go to the 'dead_letter' status
+keyword_max_attempts = int(os.getenv('KEYWORD_MAX_ATTEMPTS', '5'))
+keyword_retry_base_seconds = int(os.getenv('KEYWORD_RETRY_BASE_SECONDS', '300'))
+keyword_retry_max_seconds = int(os.getenv('KEYWORD_RETRY_MAX_SECONDS', '21600'))
+
+# the per-project counters (project_stats) are recounted and corrected this often (0 = never)
+project_stats_reconcile_minutes = int(os.getenv('PROJECT_STATS_RECONCILE_MINUTES', '60'))
+
+# keyword imports (POST /api/projects/<id>/keywords/import) are inserted and committed this many rows at a time
+keyword_import_batch_size = int(os.getenv('KEYWORD_IMPORT_BATCH_SIZE', '1000'))
+
+# keywords that finished (completed, failed, dead letter) more than archive_retention_days ago are moved,
+# with their articles, to the archive tables (database_archive.py) every archive_interval_minutes
+# (0 = never), archive_batch_size keywords per transaction
+archive_retention_days = int(os.getenv('ARCHIVE_RETENTION_DAYS', '90'))
+archive_interval_minutes = int(os.getenv('ARCHIVE_INTERVAL_MINUTES', '60'))
+archive_batch_size = int(os.getenv('ARCHIVE_BATCH_SIZE', '1000'))
+
 ##################################
 # wordpress
 ##################################
@@ -149,7 +238,13 @@ google_sheets_keyword_lease_minutes = int(os.getenv('GOOGLE_SHEETS_KEYWORD_LEASE
 
 wordpress_user = os.getenv('ISRAELI_WORDPRESS_USER') #os.getenv('WORDPRESS_USER')
 wordpress_password = os.getenv('ISRAELI_WORDPRESS_PASSWORD') #os.getenv('WORDPRESS_PASSWORD')
-#wordpress_site = os.getenv('') #os.getenv('WORDPRESS_SITE')
+wordpress_site = os.getenv('ISRAELI_WORDPRESS_SITE') #os.getenv('WORDPRESS_SITE')
+
+# REST client connection pool (per site) and max in-flight requests per host
+wordpress_pool_maxsize = int(os.getenv('WORDPRESS_POOL_MAXSIZE', '10'))
+wordpress_max_concurrency_per_host = int(os.getenv('WORDPRESS_MAX_CONCURRENCY_PER_HOST', '4'))
+# retries for idempotent requests (GET/PUT/DELETE) on 429/5xx and connection errors
+wordpress_http_retries = int(os.getenv('WORDPRESS_HTTP_RETRIES', '3'))
 
 
 ###################################
@@ -0,0 +1,228 @@
+"""
+Archival of finished keywords.
+
+Keywords that finished - completed, failed or dead letter - more than archive_retention_days ago
+are moved out of keywords_queue, with their articles and article revisions, into
+keywords_queue_archive, articles_archive and article_revisions_archive; their checkpoints are
+deleted. So the hot tables the claim, stats and listings read only hold the queue and the recent
+history, however many articles have been produced.
+
+archive_finished_keywords() moves archive_batch_size keywords per transaction, with the
+project_stats counters moved from the status counters to the archived_* ones in the same
+transaction, until no keyword is left to archive. On Postgres the archive tables are partitioned
+by month of finished_at (when the keyword finished): a month's partitions are created the first
+time a keyword that finished in it is archived, and reports bounded by finished_at only read
+their months. Runs in the caller's app context.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import delete, insert, literal, select
+
+from configs import archive_retention_days, archive_batch_size
+from database_models import (
+    db, KeywordQueue, Article, ArticleRevision, KeywordCheckpoint,
+    KeywordArchive, ArticleArchive, ArticleRevisionArchive
+)
+from database_stats import apply_stats_deltas
+
+ARCHIVED_STATUSES = ('completed', 'failed', 'dead_letter')
+
+ARCHIVE_TABLES = (KeywordArchive.__tablename__, ArticleArchive.__tablename__, ArticleRevisionArchive.__tablename__)
+
+# when a keyword finished: published, or else its last claim (dead letter), or else added
+FINISHED_AT = db.func.coalesce(KeywordQueue.processed_at, KeywordQueue.claimed_at, KeywordQueue.created_at)
+
+# copied as they are - the archive tables' other columns are finished_at, archived_at (and the status)
+KEYWORD_COLUMNS = ('id', 'project_id', 'schedule_id', 'keyword', 'normalized_keyword', 'category_id', 'tags_json',
+                   'priority', 'claimed_at', 'scheduled_for', 'processed_at', 'error_message', 'error_class',
+                   'attempts', 'created_at')
+ARTICLE_COLUMNS = ('id', 'project_id', 'keyword_id', 'title', 'meta_description', 'content_hash', 'content_score',
+                   'wordpress_post_id', 'published_at', 'created_at')
+REVISION_COLUMNS = ('id', 'keyword_id', 'stage', 'title', 'meta_description', 'content_hash', 'content_score',
+                    'created_at')
+
+# Postgres partitions created by this process
+_partitions = set()
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def next_month(value: datetime) -> datetime:
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def month_bucket(column, dialect_name: str):
+    """SQL expression: the 'YYYY-MM' month of column"""
+    if dialect_name == 'postgresql':
+        return db.func.to_char(column, 'YYYY-MM')
+    if dialect_name == 'sqlite':
+        return db.func.strftime('%Y-%m', column)
+    return db.func.date_format(column, '%Y-%m')  # MySQL
+
+
+def ensure_partitions(months: Iterable[datetime]) -> None:
+    """Create the archive tables' partitions of these months (Postgres), in a transaction of their own"""
+    missing = sorted({month_start(month) for month in months} - _partitions)
+    if not missing or db.engine.dialect.name != 'postgresql':
+        return
+
+    with db.engine.begin() as connection:
+        for start in missing:
+            for table in ARCHIVE_TABLES:
+                connection.exec_driver_sql(
+                    f"CREATE TABLE IF NOT EXISTS {table}_y{start.year}m{start.month:02d} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{next_month(start).isoformat()}')"
+                )
+    _partitions.update(missing)
+
+
+def archive_batch(cutoff: datetime, batch_size: int) -> Tuple[int, int, int]:
+    """
+    Archive up to batch_size keywords that finished before cutoff, with their articles and
+    revisions, in one transaction. Returns (candidates, keywords, articles): the keywords
+    selected, and the keywords and articles archived - fewer keywords than candidates when
+    some were retried in between. No candidates means nothing is left to archive.
+    """
+    # in no particular order, so the scan stops after batch_size rows instead of sorting every
+    # finished keyword; on Postgres locked, and skipped if another archiver has them
+    candidates = db.session.execute(
+        select(KeywordQueue.id, FINISHED_AT).where(
+            KeywordQueue.status.in_(ARCHIVED_STATUSES),
+            FINISHED_AT < cutoff
+        ).limit(batch_size).with_for_update(skip_locked=True)
+    ).all()
+    if not candidates:
+        db.session.rollback()
+        return 0, 0, 0
+    ensure_partitions(finished_at for _, finished_at in candidates)
+
+    keyword_ids = [keyword_id for keyword_id, _ in candidates]
+    now = literal(datetime.now(timezone.utc), KeywordArchive.archived_at.type)
+    keywords = KeywordQueue.__table__
+    db.session.execute(insert(KeywordArchive).from_select(
+        [*KEYWORD_COLUMNS, 'status', 'finished_at', 'archived_at'],
+        select(*(keywords.c[column] for column in KEYWORD_COLUMNS),
+               db.cast(KeywordQueue.status, KeywordArchive.status.type), FINISHED_AT, now)
+        .where(KeywordQueue.id.in_(keyword_ids))
+    ))
+
+    # SQLite doesn't lock the rows the SELECT read, only the database from the first write on -
+    # a keyword retried in between is taken out of the batch. (The statements filter by id alone:
+    # with the status too SQLite scans the status index, every finished keyword, instead of the ids.)
+    rows = db.session.execute(
+        select(KeywordQueue.id, KeywordQueue.project_id, KeywordQueue.status).where(KeywordQueue.id.in_(keyword_ids))
+    ).all()
+    retried = [row.id for row in rows if row.status not in ARCHIVED_STATUSES]
+    if retried:
+        db.session.execute(delete(KeywordArchive).where(KeywordArchive.id.in_(retried)))
+    keyword_ids = [row.id for row in rows if row.status in ARCHIVED_STATUSES]
+
+    for archive, model, columns in ((ArticleArchive, Article, ARTICLE_COLUMNS),
+                                    (ArticleRevisionArchive, ArticleRevision, REVISION_COLUMNS)):
+        db.session.execute(insert(archive).from_select(
+            [*columns, 'finished_at', 'archived_at'],
+            select(*(model.__table__.c[column] for column in columns), FINISHED_AT, now)
+            .join(KeywordQueue, KeywordQueue.id == model.keyword_id)
+            .where(model.keyword_id.in_(keyword_ids))
+        ))
+
+    deltas = defaultdict(lambda: defaultdict(int))
+    for row in rows:
+        if row.status in ARCHIVED_STATUSES:
+            deltas[row.project_id][row.status] -= 1
+            deltas[row.project_id][f'archived_{row.status}'] += 1
+    articles = 0
+    for project_id, count in db.session.execute(
+            select(Article.project_id, db.func.count())
+            .where(Article.keyword_id.in_(keyword_ids))
+            .group_by(Article.project_id)):
+        deltas[project_id]['articles'] -= count
+        deltas[project_id]['archived_articles'] += count
+        articles += count
+
+    for model in (KeywordCheckpoint, ArticleRevision, Article):
+        db.session.execute(delete(model).where(model.keyword_id.in_(keyword_ids))
+                           .execution_options(synchronize_session=False))
+    db.session.execute(delete(KeywordQueue).where(KeywordQueue.id.in_(keyword_ids))
+                       .execution_options(synchronize_session=False))
+
+    apply_stats_deltas(db.session.connection(), deltas)
+    db.session.commit()
+    return len(candidates), len(keyword_ids), articles
+
+
+def archive_finished_keywords(retention_days: int = archive_retention_days,
+                              batch_size: int = archive_batch_size) -> Dict[str, int]:
+    """
+    Archive every keyword that finished more than retention_days ago, batch_size keywords per
+    transaction. {'keywords': n, 'articles': n, 'batches': n}
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    totals = {'keywords': 0, 'articles': 0, 'batches': 0}
+    while True:
+        # an emptied batch (every candidate retried on SQLite) doesn't mean nothing is left
+        candidates, keywords, articles = archive_batch(cutoff, batch_size)
+        if not candidates:
+            break
+        totals['keywords'] += keywords
+        totals['articles'] += articles
+        totals['batches'] += 1
+
+    if totals['keywords']:
+        logging.info(f"Archived {totals['keywords']} keywords and {totals['articles']} articles "
+                     f"finished before {cutoff:%Y-%m-%d} in {totals['batches']} batches")
+    return totals
+
+
+def archived_keywords(connection, project_id: int, normalized_keywords: List[str]) -> Set[str]:
+    """Which of the normalized keywords the project has in the archive - they aren't queued again"""
+    if not normalized_keywords:
+        return set()
+    return set(connection.execute(
+        select(KeywordArchive.normalized_keyword).where(
+            KeywordArchive.project_id == project_id,
+            KeywordArchive.normalized_keyword.in_(normalized_keywords)
+        )
+    ).scalars())
+
+
+def project_history(project_id: int, months: int) -> List[dict]:
+    """
+    The project's finished keywords by status and its articles, per month for the last months
+    (the current one included) - from the hot and the archive tables
+    """
+    since = month_start(datetime.now(timezone.utc))
+    for _ in range(months - 1):
+        since = month_start(since - timedelta(days=1))
+    dialect_name = db.session.connection().dialect.name
+    history = defaultdict(lambda: dict({status: 0 for status in ARCHIVED_STATUSES}, articles=0))
+
+    keyword_counts = (
+        (month_bucket(FINISHED_AT, dialect_name), KeywordQueue.status,
+         [KeywordQueue.project_id == project_id, KeywordQueue.status.in_(ARCHIVED_STATUSES), FINISHED_AT >= since]),
+        (month_bucket(KeywordArchive.finished_at, dialect_name), KeywordArchive.status,
+         [KeywordArchive.project_id == project_id, KeywordArchive.finished_at >= since]),
+    )
+    for month, status, criteria in keyword_counts:
+        for bucket, keyword_status, count in db.session.query(month, status, db.func.count()).filter(
+                *criteria).group_by(month, status):
+            history[bucket][keyword_status] += count
+
+    article_counts = (
+        (month_bucket(Article.created_at, dialect_name),
+         [Article.project_id == project_id, Article.created_at >= since]),
+        # an article is created when its keyword finishes - the finished_at bound prunes the partitions
+        (month_bucket(ArticleArchive.created_at, dialect_name),
+         [ArticleArchive.project_id == project_id, ArticleArchive.finished_at >= since,
+          ArticleArchive.created_at >= since]),
+    )
+    for month, criteria in article_counts:
+        for bucket, count in db.session.query(month, db.func.count()).filter(*criteria).group_by(month):
+            history[bucket]['articles'] += count
+
+    return [{'month': month, **history[month]} for month in sorted(history)]
@@ -0,0 +1,60 @@
+"""
+Per-keyword pipeline checkpoints: the output of each completed stage is saved,
+so a retry of a failed keyword resumes from the last completed stage instead of
+re-running the Neuron query and all the GPT generation.
+"""
+import logging
+from typing import List, Optional
+
+from configs import app
+from database_content import record_stage_revision
+from database_models import db, KeywordCheckpoint
+
+# pipeline stages, in order
+STAGE_NEURON_QUERY = 'neuron_query'  # Neuron query id + terms
+STAGE_DRAFT = 'draft'                # GPT title / meta-description / HTML + initial score
+STAGE_OPTIMIZED = 'optimized'        # optimized HTML + final score
+STAGE_MEDIA = 'media'                # uploaded images: media ids, alt/title updates, HTML with image URLs
+STAGE_PUBLISHED = 'published'        # WordPress post id
+
+STAGES = [STAGE_NEURON_QUERY, STAGE_DRAFT, STAGE_OPTIMIZED, STAGE_MEDIA, STAGE_PUBLISHED]
+
+
+class KeywordCheckpoints:
+    """
+    Checkpoint store of one keyword.
+    Each call runs in an app context - and so a session - of its own, so a saved
+    checkpoint is committed no matter what happens to the caller's transaction.
+    """
+
+    def __init__(self, keyword_id: int):
+        self.keyword_id = keyword_id
+
+    def get(self, stage: str) -> Optional[dict]:
+        """Saved output of a stage, or None if the stage hasn't completed"""
+        with app.app_context():
+            checkpoint = KeywordCheckpoint.query.filter_by(keyword_id=self.keyword_id, stage=stage).first()
+            return checkpoint.data if checkpoint else None
+
+    def save(self, stage: str, data: dict) -> None:
+        """Save (or replace) the output of a completed stage - and, if it has article HTML, its article revision"""
+        with app.app_context():
+            checkpoint = KeywordCheckpoint.query.filter_by(keyword_id=self.keyword_id, stage=stage).first()
+            if checkpoint is None:
+                checkpoint = KeywordCheckpoint(keyword_id=self.keyword_id, stage=stage)
+                db.session.add(checkpoint)
+            checkpoint.data = data
+            record_stage_revision(self.keyword_id, stage, data)
+            db.session.commit()
+        logging.info(f"Saved checkpoint '{stage}' for keyword {self.keyword_id}")
+
+    def completed_stages(self) -> List[str]:
+        with app.app_context():
+            saved = {c.stage for c in KeywordCheckpoint.query.filter_by(keyword_id=self.keyword_id).all()}
+        return [stage for stage in STAGES if stage in saved]
+
+    def clear(self) -> None:
+        """Drop all checkpoints of the keyword (e.g. once it is published)"""
+        with app.app_context():
+            KeywordCheckpoint.query.filter_by(keyword_id=self.keyword_id).delete()
+            db.session.commit()
@@ -0,0 +1,92 @@
+"""
+Article content store.
+
+Article HTML is compressed (zlib) and stored once per distinct content in content_blobs,
+keyed by its SHA-256. Articles and their revisions (article_revisions - the draft, optimized,
+media and published versions of a keyword's article) only hold the hash, so listing them never
+reads the HTML: load_content() fetches and decompresses it on demand. A stage retried with the
+same output, or a republished article, adds no new blob.
+Runs in the caller's app context and doesn't commit.
+"""
+import hashlib
+import zlib
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database_models import db, ContentBlob, ArticleRevision
+
+ENCODING_ZLIB = 'zlib'
+COMPRESSION_LEVEL = 6
+
+# checkpointed stage -> keys of its title, meta description, HTML and content score (None: not in it)
+STAGE_REVISION_FIELDS = {
+    'draft': ('main_article_title', 'main_article_description', 'main_article_content', None),
+    'optimized': ('main_article_title', 'main_article_description', 'updated_html_content', 'content_score'),
+    'media': (None, None, 'article_html', None),
+}
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def store_content(content: str) -> str:
+    """Store content (if it isn't stored yet) and return its hash"""
+    digest = content_hash(content)
+    if db.session.get(ContentBlob, digest) is not None:
+        return digest
+
+    raw = content.encode('utf-8')
+    values = {
+        'hash': digest,
+        'encoding': ENCODING_ZLIB,
+        'size': len(raw),
+        'data': zlib.compress(raw, COMPRESSION_LEVEL),
+        'created_at': datetime.now(timezone.utc)
+    }
+    table = ContentBlob.__table__
+    dialect = {'postgresql': postgresql, 'sqlite': sqlite}.get(db.session.connection().dialect.name)
+    if dialect is not None:
+        # another worker may store the same content at the same time
+        db.session.execute(dialect.insert(table).values(**values).on_conflict_do_nothing(index_elements=['hash']))
+    else:
+        db.session.execute(table.insert().values(**values))
+    return digest
+
+
+def load_content(digest: Optional[str]) -> Optional[str]:
+    """The content stored under a hash - None if there's none"""
+    blob = db.session.get(ContentBlob, digest) if digest else None
+    if blob is None:
+        return None
+    if blob.encoding != ENCODING_ZLIB:
+        raise ValueError(f"Unknown content encoding '{blob.encoding}' of {digest}")
+    return zlib.decompress(blob.data).decode('utf-8')
+
+
+def record_revision(keyword_id: int, stage: str, content: str, title: Optional[str] = None,
+                    meta_description: Optional[str] = None, content_score: Optional[int] = None) -> ArticleRevision:
+    """Add a revision of a keyword's article, storing its content"""
+    revision = ArticleRevision(
+        keyword_id=keyword_id,
+        stage=stage,
+        title=title,
+        meta_description=meta_description,
+        content_hash=store_content(content),
+        content_score=content_score
+    )
+    db.session.add(revision)
+    return revision
+
+
+def record_stage_revision(keyword_id: int, stage: str, data: dict) -> Optional[ArticleRevision]:
+    """A revision from a stage's checkpoint data, if the stage produces article HTML"""
+    fields = STAGE_REVISION_FIELDS.get(stage)
+    if fields is None or not isinstance(data, dict):
+        return None
+    title, meta_description, content, content_score = (data.get(key) if key else None for key in fields)
+    if not content:
+        return None
+    return record_revision(keyword_id, stage, content, title, meta_description, content_score)
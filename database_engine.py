@@ -0,0 +1,101 @@
+"""
+SQLAlchemy engine profiles, chosen by environment (DATABASE_ENGINE_PROFILE, see configs.py):
+
+- serverless: short-lived instances (Vercel). No pool of its own (NullPool) - a connection per
+  request, to a pooler (PgBouncer, Neon's -pooler host) that does the pooling - or, with
+  DATABASE_POOL_SIZE, a tiny pool recycled before Neon drops idle connections. No pre-ping
+  round-trip per checkout, and a statement timeout.
+- worker: long-running processes (worker.py, the web app on a server) - a pool sized for the
+  worker threads, pre-pinged and recycled.
+- sqlite: local development - WAL, so reads don't wait for the writer, and a busy timeout.
+
+A statement timeout is passed as a startup option, which a transaction pooler doesn't forward
+to the server - behind one, set it on the role instead (ALTER ROLE ... SET statement_timeout).
+Behind a pooler psycopg 3's prepared statements, which transaction pooling breaks, are turned off.
+"""
+from typing import Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, URL, make_url
+from sqlalchemy.pool import NullPool
+
+PROFILE_SERVERLESS = 'serverless'
+PROFILE_WORKER = 'worker'
+PROFILE_SQLITE = 'sqlite'
+PROFILES = (PROFILE_SERVERLESS, PROFILE_WORKER, PROFILE_SQLITE)
+
+# recycle pooled connections before Neon closes them (idle compute suspends after 5 minutes)
+SERVERLESS_POOL_RECYCLE_SECONDS = 240
+WORKER_POOL_RECYCLE_SECONDS = 1800
+CONNECT_TIMEOUT_SECONDS = 10
+
+
+def default_engine_profile(database_url: str, serverless: bool) -> str:
+    """sqlite for an SQLite URL, else serverless or worker"""
+    if make_url(database_url).get_backend_name() == 'sqlite':
+        return PROFILE_SQLITE
+    return PROFILE_SERVERLESS if serverless else PROFILE_WORKER
+
+
+def is_pooler_url(url: URL) -> bool:
+    """Whether the URL points at a transaction pooler - Neon's -pooler host or a pgbouncer=true URL"""
+    return '-pooler' in (url.host or '') or url.query.get('pgbouncer') == 'true'
+
+
+def engine_settings(database_url: str, profile: str, pool_size: int = 0, max_overflow: int = 0,
+                    statement_timeout_ms: int = 0, sqlite_busy_timeout_ms: int = 5000) -> Tuple[str, dict]:
+    """The database URL and the engine options (SQLALCHEMY_ENGINE_OPTIONS) of a profile"""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown database engine profile '{profile}' - one of {', '.join(PROFILES)}")
+
+    url = make_url(database_url)
+    if url.get_backend_name() == 'sqlite':
+        # the sqlite3 module's timeout is SQLite's busy timeout
+        return database_url, {'connect_args': {'timeout': sqlite_busy_timeout_ms / 1000}}
+    if profile == PROFILE_SQLITE:
+        raise ValueError(f"The sqlite engine profile is for SQLite URLs, not {url.get_backend_name()}")
+
+    pooler = is_pooler_url(url)
+    # pgbouncer=true only marks the URL - libpq rejects it as a connection option
+    url = url.difference_update_query(['pgbouncer'])
+
+    if profile == PROFILE_WORKER:
+        options = {
+            'pool_size': pool_size,
+            'max_overflow': max_overflow,
+            'pool_pre_ping': True,
+            'pool_recycle': WORKER_POOL_RECYCLE_SECONDS,
+        }
+    elif pool_size > 0:
+        options = {
+            'pool_size': pool_size,
+            'max_overflow': max_overflow,
+            'pool_recycle': SERVERLESS_POOL_RECYCLE_SECONDS,
+            'pool_use_lifo': True,  # reuse the most recent connection, let the others go idle and recycle
+        }
+    else:
+        options = {'poolclass': NullPool}
+
+    if url.get_backend_name() == 'postgresql':
+        connect_args = {'connect_timeout': CONNECT_TIMEOUT_SECONDS}
+        if statement_timeout_ms > 0 and not pooler:
+            connect_args['options'] = f'-c statement_timeout={statement_timeout_ms}'
+        if pooler and url.get_driver_name() == 'psycopg':
+            connect_args['prepare_threshold'] = None
+        options['connect_args'] = connect_args
+
+    return url.render_as_string(hide_password=False), options
+
+
+def configure_engine(engine: Engine) -> None:
+    """Per-connection settings that can't be engine options - SQLite's journal mode"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # durable at checkpoints - enough for a development database
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
@@ -0,0 +1,289 @@
+"""
+Bulk keyword import from CSV or JSONL uploads.
+
+The upload is read as a stream, line by line, so 100k+ keyword lists aren't held in memory.
+Every keyword is normalized (database_models.normalize_keyword) and inserted in batches of
+keyword_import_batch_size rows, each batch multi-row INSERT ... ON CONFLICT DO NOTHING statements
+against the unique (project_id, normalized_keyword) index - on Postgres the batch is COPYed
+into a temporary table first. Keywords already queued for the project (or archived, see
+database_archive.py), or repeated in the upload, are counted as duplicates. Each batch commits on its own, with its project_stats
+counters.
+
+CSV: a header row with a keyword column (and optionally priority, category_id and tags,
+tags separated by '|'), or no header and the keyword in the first column.
+JSONL: one keyword per line - a string, or an object like the JSON endpoint takes:
+{"keyword": "...", "priority": 2, "tags": ["..."], "category_id": 5}
+"""
+import codecs
+import csv
+import io
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Column, Integer, JSON, MetaData, String, Table, cast, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from configs import keyword_import_batch_size
+from database_archive import archived_keywords
+from database_models import db, KeywordQueue, normalize_keyword
+from database_stats import apply_stats_deltas
+
+FORMAT_CSV = 'csv'
+FORMAT_JSONL = 'jsonl'
+
+FORMATS_BY_MIMETYPE = {
+    'text/csv': FORMAT_CSV,
+    'application/csv': FORMAT_CSV,
+    'application/x-ndjson': FORMAT_JSONL,
+    'application/jsonl': FORMAT_JSONL,
+    'application/x-jsonlines': FORMAT_JSONL,
+}
+
+MAX_REPORTED_ERRORS = 50
+
+# Postgres: each batch is COPYed here, then inserted into keywords_queue with ON CONFLICT
+_import_table = Table(
+    'keyword_import', MetaData(),
+    Column('keyword', String(255)),
+    Column('normalized_keyword', String(255)),
+    Column('priority', Integer),
+    Column('category_id', Integer),
+    Column('tags_json', JSON),
+)
+_IMPORT_COLUMNS = [column.name for column in _import_table.columns]
+
+
+class InvalidKeyword(ValueError):
+    pass
+
+
+@dataclass
+class KeywordImportResult:
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: List[dict] = field(default_factory=list)  # the first MAX_REPORTED_ERRORS invalid lines
+    aborted: Optional[str] = None  # why the upload couldn't be read to the end
+
+    def add_invalid(self, line: int, error: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': error})
+
+    def to_dict(self) -> dict:
+        return {
+            'inserted': self.inserted,
+            'duplicates': self.duplicates,
+            'invalid': self.invalid,
+            'errors': self.errors,
+            'aborted': self.aborted
+        }
+
+
+def import_format(requested: Optional[str], filename: Optional[str], mimetype: Optional[str]) -> Optional[str]:
+    """csv / jsonl - asked for, or from the file extension or content type - None if unknown"""
+    if requested:
+        requested = requested.lower()
+        return requested if requested in (FORMAT_CSV, FORMAT_JSONL) else None
+    if filename:
+        extension = filename.rsplit('.', 1)[-1].lower()
+        if extension == 'csv':
+            return FORMAT_CSV
+        if extension in ('jsonl', 'ndjson'):
+            return FORMAT_JSONL
+    return FORMATS_BY_MIMETYPE.get(mimetype or '')
+
+
+def keyword_row(data) -> dict:
+    """Validated keywords_queue values of one keyword - a string, or a dict of its fields"""
+    if isinstance(data, str):
+        data = {'keyword': data}
+    if not isinstance(data, dict):
+        raise InvalidKeyword('a keyword must be a string or an object')
+
+    keyword = data.get('keyword')
+    if not isinstance(keyword, str) or not keyword.strip():
+        raise InvalidKeyword('keyword is missing')
+    keyword = keyword.strip()
+    if len(keyword) > 255:
+        raise InvalidKeyword('keyword is longer than 255 characters')
+
+    try:
+        priority = int(data['priority']) if data.get('priority') not in (None, '') else 1
+        category_id = int(data['category_id']) if data.get('category_id') not in (None, '') else None
+    except (TypeError, ValueError):
+        raise InvalidKeyword('priority and category_id must be integers')
+
+    tags = data.get('tags') or []
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split('|') if tag.strip()]
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise InvalidKeyword('tags must be a list of strings')
+
+    return {
+        'keyword': keyword,
+        'normalized_keyword': normalize_keyword(keyword),
+        'priority': priority,
+        'category_id': category_id,
+        'tags_json': tags
+    }
+
+
+def _csv_records(lines: Iterable[str]) -> Iterator[Tuple[int, object]]:
+    """(line number, {column: value} or the keyword) of each non-empty CSV row"""
+    reader = csv.reader(lines)
+    header = None
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        if header is None:
+            cells = [cell.strip().lower() for cell in row]
+            header = cells if 'keyword' in cells else []
+            if header:
+                continue
+        if header:
+            yield reader.line_num, dict(zip(header, row))
+        else:
+            yield reader.line_num, row[0]
+
+
+def _jsonl_records(lines: Iterable[str]) -> Iterator[Tuple[int, object]]:
+    """(line number, line) of each non-empty JSONL line - decoded by _jsonl_row"""
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            yield number, line
+
+
+def _jsonl_row(line: str) -> dict:
+    return keyword_row(json.loads(line))
+
+
+READERS = {
+    FORMAT_CSV: (_csv_records, keyword_row),
+    FORMAT_JSONL: (_jsonl_records, _jsonl_row),
+}
+
+
+def import_keywords(project_id: int, schedule_id: Optional[int], stream, fmt: str) -> KeywordImportResult:
+    """
+    Queue the keywords of a binary CSV / JSONL stream (UTF-8) for a project,
+    committing batch by batch - in the caller's app context
+    """
+    records, parse = READERS[fmt]
+    result = KeywordImportResult()
+    batch = []
+    if isinstance(stream, io.RawIOBase):
+        # the request body - read it in chunks, not a line's bytes one by one
+        stream = io.BufferedReader(stream, 64 * 1024)
+
+    try:
+        for line, record in records(codecs.iterdecode(stream, 'utf-8-sig')):
+            try:
+                batch.append(parse(record))
+            except (ValueError, TypeError) as e:
+                result.add_invalid(line, str(e))
+                continue
+            if len(batch) >= keyword_import_batch_size:
+                _insert_batch(project_id, schedule_id, batch, result)
+                batch = []
+    except (UnicodeDecodeError, csv.Error) as e:
+        # the rest of the upload can't be read - keep what was read so far
+        result.aborted = f"{type(e).__name__}: {e}"
+        logging.warning(f"Keyword import for project {project_id} stopped early: {result.aborted}")
+
+    if batch:
+        _insert_batch(project_id, schedule_id, batch, result)
+    return result
+
+
+def _insert_batch(project_id: int, schedule_id: Optional[int], rows: List[dict], result: KeywordImportResult) -> None:
+    """Insert a batch of keyword rows, skipping the ones already queued (or archived), and commit it"""
+    connection = db.session.connection()
+    created_at = datetime.now(timezone.utc)
+    archived = archived_keywords(connection, project_id, [row['normalized_keyword'] for row in rows])
+    new_rows = [row for row in rows if row['normalized_keyword'] not in archived]
+
+    if not new_rows:
+        inserted = 0
+    elif connection.dialect.name == 'postgresql':
+        inserted = _copy_insert(connection, project_id, schedule_id, created_at, new_rows)
+    else:
+        values = [dict(row, project_id=project_id, schedule_id=schedule_id, status='pending',
+                       attempts=0, created_at=created_at) for row in new_rows]
+        inserted = _insert_skipping_duplicates(connection, project_id, values)
+
+    apply_stats_deltas(connection, {project_id: {'pending': inserted}})
+    db.session.commit()
+
+    result.inserted += inserted
+    result.duplicates += len(rows) - inserted
+
+
+def _copy_insert(connection, project_id: int, schedule_id: Optional[int], created_at: datetime, rows: List[dict]) -> int:
+    """COPY the batch into a temporary table, then INSERT ... SELECT it with ON CONFLICT DO NOTHING"""
+    cursor = connection.connection.cursor()
+    if not hasattr(cursor, 'copy_expert'):
+        # not psycopg2
+        values = [dict(row, project_id=project_id, schedule_id=schedule_id, status='pending',
+                       attempts=0, created_at=created_at) for row in rows]
+        return _insert_skipping_duplicates(connection, project_id, values)
+
+    cursor.execute(
+        "CREATE TEMPORARY TABLE IF NOT EXISTS keyword_import ("
+        "keyword varchar(255), normalized_keyword varchar(255), priority integer, "
+        "category_id integer, tags_json json) ON COMMIT DELETE ROWS"
+    )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row['keyword'], row['normalized_keyword'], row['priority'],
+                         row['category_id'], json.dumps(row['tags_json'])])
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY keyword_import ({', '.join(_IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    table = KeywordQueue.__table__
+    source = select(
+        literal(project_id, Integer),
+        cast(literal(schedule_id), Integer),
+        *_import_table.columns,
+        cast(literal('pending'), table.c.status.type),  # an untyped literal would be inserted as text
+        literal(0, Integer),
+        literal(created_at, table.c.created_at.type),
+    )
+    statement = postgresql.insert(table).from_select(
+        ['project_id', 'schedule_id', *_IMPORT_COLUMNS, 'status', 'attempts', 'created_at'], source
+    ).on_conflict_do_nothing(index_elements=['project_id', 'normalized_keyword'])
+    return connection.execute(statement).rowcount
+
+
+def _insert_skipping_duplicates(connection, project_id: int, values: List[dict]) -> int:
+    """
+    INSERT ... ON CONFLICT DO NOTHING of the batch - or, without it, an INSERT of the rows not queued yet.
+    Executed as executemany, which SQLAlchemy sends as multi-row statements ("insertmanyvalues")
+    without compiling a statement per batch.
+    """
+    table = KeywordQueue.__table__
+    dialect = {'postgresql': postgresql, 'sqlite': sqlite}.get(connection.dialect.name)
+    if dialect is not None:
+        statement = dialect.insert(table).on_conflict_do_nothing(index_elements=['project_id', 'normalized_keyword'])
+        if connection.dialect.insert_executemany_returning:
+            # the skipped rows aren't returned
+            return len(connection.execute(statement.returning(table.c.id), values).all())
+        return connection.execute(statement, values).rowcount
+
+    queued = set(connection.execute(
+        select(table.c.normalized_keyword).where(
+            table.c.project_id == project_id,
+            table.c.normalized_keyword.in_([row['normalized_keyword'] for row in values])
+        )
+    ).scalars())
+    new = {}
+    for row in values:
+        if row['normalized_keyword'] not in queued:
+            new.setdefault(row['normalized_keyword'], row)
+    if new:
+        connection.execute(table.insert(), list(new.values()))
+    return len(new)
@@ -4,10 +4,19 @@ Database models for the AI Content Articles Maker project management system
 from datetime import datetime, timezone
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import JSON
+from sqlalchemy.orm import validates
 import json
+import re
+import unicodedata
 
 db = SQLAlchemy()
 
+
+def normalize_keyword(keyword: str) -> str:
+    """The form keywords are deduplicated by - NFKC, case-folded, whitespace collapsed"""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', keyword)).strip().casefold()[:255]
+
+
 class Project(db.Model):
     """Model for managing content creation projects (websites)"""
     __tablename__ = 'projects'
@@ -37,6 +46,7 @@ class Project(db.Model):
     schedules = db.relationship('Schedule', backref='project', lazy=True, cascade='all, delete-orphan')
     keywords = db.relationship('KeywordQueue', backref='project', lazy=True, cascade='all, delete-orphan')
     articles = db.relationship('Article', backref='project', lazy=True, cascade='all, delete-orphan')
+    counters = db.relationship('ProjectStats', backref='project', lazy=True, uselist=False, cascade='all, delete-orphan')
     
     def to_dict(self):
         """Convert model to dictionary for JSON serialization"""
@@ -52,8 +62,8 @@ class Project(db.Model):
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'total_keywords': len(self.keywords),
-            'active_schedules': len([s for s in self.schedules if s.is_active])
+            'total_keywords': self.total_keywords,
+            'active_schedules': self.active_schedules
         }
     
     def __repr__(self):
@@ -103,7 +113,7 @@ class Schedule(db.Model):
             'days_of_week': self.get_days_of_week(),
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'pending_keywords': len([k for k in self.keywords if k.status == 'pending'])
+            'pending_keywords': self.pending_keywords
         }
     
     def __repr__(self):
@@ -120,19 +130,27 @@ class KeywordQueue(db.Model):
     
     # Keyword Information
     keyword = db.Column(db.String(255), nullable=False)
+    normalized_keyword = db.Column(db.String(255))  # normalize_keyword(keyword) - unique per project
     category_id = db.Column(db.Integer)
     tags_json = db.Column(JSON)
     priority = db.Column(db.Integer, default=1)
     
     # Processing Status
-    status = db.Column(db.Enum('pending', 'processing', 'completed', 'failed', 'paused', name='keyword_status'), default='pending')
+    # active_history: the previous status is loaded even when it's set on an expired instance,
+    # so the project_stats counters (database_stats.py) know which one to decrement
+    status = db.column_property(
+        db.Column(db.Enum('pending', 'processing', 'completed', 'failed', 'paused', 'dead_letter', name='keyword_status'), default='pending'),
+        active_history=True
+    )
     processing_by = db.Column(db.String(100))
     lease_until = db.Column(db.DateTime(timezone=True))
+    claimed_at = db.Column(db.DateTime(timezone=True))  # last claim - counts against the schedule's daily limit
     scheduled_for = db.Column(db.DateTime(timezone=True))
     processed_at = db.Column(db.DateTime(timezone=True))
     
     # Error Handling
     error_message = db.Column(db.Text)
+    error_class = db.Column(db.String(20))  # transient / permanent - of the last failure
     attempts = db.Column(db.Integer, default=0)
     
     # Timestamps
@@ -140,6 +158,32 @@ class KeywordQueue(db.Model):
     
     # Relationships
     articles = db.relationship('Article', backref='keyword', lazy=True, cascade='all, delete-orphan')
+    checkpoints = db.relationship('KeywordCheckpoint', backref='keyword', lazy=True, cascade='all, delete-orphan')
+    revisions = db.relationship('ArticleRevision', backref='keyword', lazy=True, cascade='all, delete-orphan')
+    
+    # Indexes (migrations/versions/0003_keywords_queue_indexes.py) - partial where the database supports it
+    __table_args__ = (
+        # claim: a schedule's pending keywords, by priority then age
+        db.Index('ix_keywords_queue_pending_claim', 'schedule_id', priority.desc(), 'created_at',
+                 postgresql_where=(status.expression == 'pending'), sqlite_where=(status.expression == 'pending')),
+        # expired leases: claim takeover, cleanup_expired_keywords, stats
+        db.Index('ix_keywords_queue_processing_lease', 'schedule_id', 'lease_until',
+                 postgresql_where=(status.expression == 'processing'), sqlite_where=(status.expression == 'processing')),
+        # counts by status, overall and per project
+        db.Index('ix_keywords_queue_status_project', 'status', 'project_id'),
+        # daily limit: a schedule's claims since a time
+        db.Index('ix_keywords_queue_schedule_claimed', 'schedule_id', 'claimed_at'),
+        # dedupe (migrations/versions/0005_keyword_normalized_dedupe.py): a keyword is queued once per project
+        db.Index('uq_keywords_queue_project_normalized', 'project_id', 'normalized_keyword', unique=True),
+        # keyset-paginated listings (migrations/versions/0006_listing_indexes.py): all, and by status
+        db.Index('ix_keywords_queue_project_created', 'project_id', 'created_at', 'id'),
+        db.Index('ix_keywords_queue_project_status_created', 'project_id', 'status', 'created_at', 'id'),
+    )
+    
+    @validates('keyword')
+    def _normalize(self, key, keyword):
+        self.normalized_keyword = normalize_keyword(keyword) if keyword else None
+        return keyword
     
     def get_tags(self):
         """Get tags as list"""
@@ -164,9 +208,11 @@ class KeywordQueue(db.Model):
             'status': self.status,
             'processing_by': self.processing_by,
             'lease_until': self.lease_until.isoformat() if self.lease_until else None,
+            'claimed_at': self.claimed_at.isoformat() if self.claimed_at else None,
             'scheduled_for': self.scheduled_for.isoformat() if self.scheduled_for else None,
             'processed_at': self.processed_at.isoformat() if self.processed_at else None,
             'error_message': self.error_message,
+            'error_class': self.error_class,
             'attempts': self.attempts,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
@@ -185,6 +231,8 @@ class Article(db.Model):
     
     # Article Information
     title = db.Column(db.String(500))
+    meta_description = db.Column(db.Text)
+    content_hash = db.Column(db.String(64), db.ForeignKey('content_blobs.hash'))  # the published HTML - database_content.py
     content_score = db.Column(db.Integer)
     wordpress_post_id = db.Column(db.Integer)
     
@@ -192,6 +240,13 @@ class Article(db.Model):
     published_at = db.Column(db.DateTime(timezone=True))
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     
+    # keyset-paginated listing (migrations/versions/0006_listing_indexes.py), and a keyword's article
+    # (migrations/versions/0008_keyword_archive.py)
+    __table_args__ = (
+        db.Index('ix_articles_project_created', 'project_id', 'created_at', 'id'),
+        db.Index('ix_articles_keyword', 'keyword_id'),
+    )
+    
     def to_dict(self):
         """Convert model to dictionary for JSON serialization"""
         return {
@@ -199,6 +254,8 @@ class Article(db.Model):
             'project_id': self.project_id,
             'keyword_id': self.keyword_id,
             'title': self.title,
+            'meta_description': self.meta_description,
+            'has_content': self.content_hash is not None,
             'content_score': self.content_score,
             'wordpress_post_id': self.wordpress_post_id,
             'published_at': self.published_at.isoformat() if self.published_at else None,
@@ -207,4 +264,322 @@ class Article(db.Model):
         }
     
     def __repr__(self):
-        return f'<Article {self.title}>'
\ No newline at end of file
+        return f'<Article {self.title}>'
+
+
+class KeywordCheckpoint(db.Model):
+    """Model for the saved output of one pipeline stage of a keyword, so a retry can resume from it"""
+    __tablename__ = 'keyword_checkpoints'
+    __table_args__ = (
+        db.UniqueConstraint('keyword_id', 'stage', name='uq_keyword_checkpoints_keyword_stage'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    keyword_id = db.Column(db.Integer, db.ForeignKey('keywords_queue.id'), nullable=False)
+    
+    # Stage Output
+    stage = db.Column(db.String(50), nullable=False)  # neuron_query, draft, optimized, media, published
+    data = db.Column(JSON)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    
+    def to_dict(self):
+        """Convert model to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'keyword_id': self.keyword_id,
+            'stage': self.stage,
+            'data': self.data,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<KeywordCheckpoint {self.keyword_id} {self.stage}>'
+
+
+class ContentBlob(db.Model):
+    """Model for compressed article content, stored once per distinct content (database_content.py)"""
+    __tablename__ = 'content_blobs'
+    
+    hash = db.Column(db.String(64), primary_key=True)  # SHA-256 of the uncompressed content
+    encoding = db.Column(db.String(10), nullable=False)  # compression - zlib
+    size = db.Column(db.Integer, nullable=False)  # uncompressed bytes
+    data = db.Column(db.LargeBinary, nullable=False)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f'<ContentBlob {self.hash[:12]} ({self.size} bytes)>'
+
+
+class ArticleRevision(db.Model):
+    """Model for a version of a keyword's article - one per pipeline stage that produces HTML, and the published one"""
+    __tablename__ = 'article_revisions'
+    __table_args__ = (
+        db.Index('ix_article_revisions_keyword_created', 'keyword_id', 'created_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    keyword_id = db.Column(db.Integer, db.ForeignKey('keywords_queue.id'), nullable=False)
+    
+    # Revision
+    stage = db.Column(db.String(50), nullable=False)  # draft, optimized, media, published
+    title = db.Column(db.String(500))
+    meta_description = db.Column(db.Text)
+    content_hash = db.Column(db.String(64), db.ForeignKey('content_blobs.hash'), nullable=False)
+    content_score = db.Column(db.Integer)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    
+    def to_dict(self):
+        """Convert model to dictionary for JSON serialization - without the content"""
+        return {
+            'id': self.id,
+            'keyword_id': self.keyword_id,
+            'stage': self.stage,
+            'title': self.title,
+            'meta_description': self.meta_description,
+            'content_hash': self.content_hash,
+            'content_score': self.content_score,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ArticleRevision {self.keyword_id} {self.stage}>'
+
+
+# Archive (database_archive.py): finished keywords, their articles and revisions, moved out of the
+# hot tables once past the retention window. Rows keep their ids; finished_at - when the keyword
+# finished - is part of the primary key because on Postgres the tables are partitioned by it (by
+# month). No foreign keys - the archive outlives the rows they would point at.
+
+class KeywordArchive(db.Model):
+    """Model for an archived keyword - completed, failed or dead letter"""
+    __tablename__ = 'keywords_queue_archive'
+    __table_args__ = (
+        # keyset-paginated listing, history report, and dedupe against archived keywords
+        db.Index('ix_keywords_queue_archive_project_created', 'project_id', 'created_at', 'id'),
+        db.Index('ix_keywords_queue_archive_project_finished', 'project_id', 'finished_at'),
+        db.Index('ix_keywords_queue_archive_project_normalized', 'project_id', 'normalized_keyword'),
+        {'postgresql_partition_by': 'RANGE (finished_at)'},
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # its keywords_queue id
+    finished_at = db.Column(db.DateTime(timezone=True), primary_key=True)
+    project_id = db.Column(db.Integer, nullable=False)
+    schedule_id = db.Column(db.Integer)
+    
+    # Keyword Information
+    keyword = db.Column(db.String(255), nullable=False)
+    normalized_keyword = db.Column(db.String(255))
+    category_id = db.Column(db.Integer)
+    tags_json = db.Column(JSON)
+    priority = db.Column(db.Integer)
+    
+    # Final Status - a string, archived keywords never change status
+    status = db.Column(db.String(20), nullable=False)
+    claimed_at = db.Column(db.DateTime(timezone=True))
+    scheduled_for = db.Column(db.DateTime(timezone=True))
+    processed_at = db.Column(db.DateTime(timezone=True))
+    error_message = db.Column(db.Text)
+    error_class = db.Column(db.String(20))
+    attempts = db.Column(db.Integer)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime(timezone=True))
+    archived_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    
+    def to_dict(self):
+        """Convert model to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'project_id': self.project_id,
+            'schedule_id': self.schedule_id,
+            'keyword': self.keyword,
+            'category_id': self.category_id,
+            'tags': json.loads(self.tags_json) if isinstance(self.tags_json, str) else self.tags_json or [],
+            'priority': self.priority,
+            'status': self.status,
+            'claimed_at': self.claimed_at.isoformat() if self.claimed_at else None,
+            'scheduled_for': self.scheduled_for.isoformat() if self.scheduled_for else None,
+            'processed_at': self.processed_at.isoformat() if self.processed_at else None,
+            'error_message': self.error_message,
+            'error_class': self.error_class,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+    
+    def __repr__(self):
+        return f'<KeywordArchive {self.keyword} ({self.status})>'
+
+
+class ArticleArchive(db.Model):
+    """Model for the article of an archived keyword"""
+    __tablename__ = 'articles_archive'
+    __table_args__ = (
+        db.Index('ix_articles_archive_project_created', 'project_id', 'created_at', 'id'),
+        {'postgresql_partition_by': 'RANGE (finished_at)'},
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # its articles id
+    finished_at = db.Column(db.DateTime(timezone=True), primary_key=True)  # of its keyword
+    project_id = db.Column(db.Integer, nullable=False)
+    keyword_id = db.Column(db.Integer, nullable=False)
+    
+    # Article Information
+    title = db.Column(db.String(500))
+    meta_description = db.Column(db.Text)
+    content_hash = db.Column(db.String(64))  # content_blobs.hash
+    content_score = db.Column(db.Integer)
+    wordpress_post_id = db.Column(db.Integer)
+    
+    # Timestamps
+    published_at = db.Column(db.DateTime(timezone=True))
+    created_at = db.Column(db.DateTime(timezone=True))
+    archived_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    
+    def to_dict(self):
+        """Convert model to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'project_id': self.project_id,
+            'keyword_id': self.keyword_id,
+            'title': self.title,
+            'meta_description': self.meta_description,
+            'has_content': self.content_hash is not None,
+            'content_score': self.content_score,
+            'wordpress_post_id': self.wordpress_post_id,
+            'published_at': self.published_at.isoformat() if self.published_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ArticleArchive {self.title}>'
+
+
+class ArticleRevisionArchive(db.Model):
+    """Model for a revision of an archived keyword's article"""
+    __tablename__ = 'article_revisions_archive'
+    __table_args__ = (
+        db.Index('ix_article_revisions_archive_keyword_created', 'keyword_id', 'created_at'),
+        {'postgresql_partition_by': 'RANGE (finished_at)'},
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # its article_revisions id
+    finished_at = db.Column(db.DateTime(timezone=True), primary_key=True)  # of its keyword
+    keyword_id = db.Column(db.Integer, nullable=False)
+    
+    # Revision
+    stage = db.Column(db.String(50), nullable=False)
+    title = db.Column(db.String(500))
+    meta_description = db.Column(db.Text)
+    content_hash = db.Column(db.String(64), nullable=False)  # content_blobs.hash
+    content_score = db.Column(db.Integer)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime(timezone=True))
+    archived_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    
+    def to_dict(self):
+        """Convert model to dictionary for JSON serialization - without the content"""
+        return {
+            'id': self.id,
+            'keyword_id': self.keyword_id,
+            'stage': self.stage,
+            'title': self.title,
+            'meta_description': self.meta_description,
+            'content_hash': self.content_hash,
+            'content_score': self.content_score,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ArticleRevisionArchive {self.keyword_id} {self.stage}>'
+
+
+
+class ProjectStats(db.Model):
+    """Model for a project's keyword counters by status and its article count, kept up to date on every status change"""
+    __tablename__ = 'project_stats'
+    
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), primary_key=True)
+    
+    # Keyword Counters (one per keyword status)
+    pending = db.Column(db.Integer, nullable=False, default=0)
+    processing = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    paused = db.Column(db.Integer, nullable=False, default=0)
+    dead_letter = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Article Counter
+    articles = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Archived Counters - keywords and articles moved to the archive tables (database_archive.py),
+    # no longer in the counters above
+    archived_completed = db.Column(db.Integer, nullable=False, default=0)
+    archived_failed = db.Column(db.Integer, nullable=False, default=0)
+    archived_dead_letter = db.Column(db.Integer, nullable=False, default=0)
+    archived_articles = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Timestamps
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    reconciled_at = db.Column(db.DateTime(timezone=True))
+    
+    def keyword_counts(self, archived=False):
+        """Get the keyword counters as {status: count} - of the keywords in keywords_queue, plus the archived ones if archived"""
+        counts = {status: getattr(self, status) or 0 for status in KeywordQueue.__table__.c.status.type.enums}
+        if archived:
+            for status in ('completed', 'failed', 'dead_letter'):
+                counts[status] += getattr(self, f'archived_{status}') or 0
+        return counts
+    
+    def to_dict(self):
+        """Convert model to dictionary for JSON serialization"""
+        return {
+            'project_id': self.project_id,
+            **self.keyword_counts(),
+            'articles': self.articles,
+            'archived_completed': self.archived_completed,
+            'archived_failed': self.archived_failed,
+            'archived_dead_letter': self.archived_dead_letter,
+            'archived_articles': self.archived_articles,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'reconciled_at': self.reconciled_at.isoformat() if self.reconciled_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ProjectStats {self.project_id}>'
+
+
+# Counts as SQL expressions (correlated subqueries), deferred: loading a row counts nothing
+# until the count is read - query.options(undefer(...)) counts in the same query instead
+Project.total_keywords = db.column_property(
+    db.select(db.func.count(KeywordQueue.id))
+    .where(KeywordQueue.project_id == Project.id)
+    .correlate_except(KeywordQueue)
+    .scalar_subquery(),
+    deferred=True
+)
+Project.active_schedules = db.column_property(
+    db.select(db.func.count(Schedule.id))
+    .where(Schedule.project_id == Project.id, Schedule.is_active.is_(True))
+    .correlate_except(Schedule)
+    .scalar_subquery(),
+    deferred=True
+)
+Schedule.pending_keywords = db.column_property(
+    db.select(db.func.count(KeywordQueue.id))
+    .where(KeywordQueue.schedule_id == Schedule.id, KeywordQueue.status == 'pending')
+    .correlate_except(KeywordQueue)
+    .scalar_subquery(),
+    deferred=True
+)
\ No newline at end of file
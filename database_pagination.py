@@ -0,0 +1,115 @@
+"""
+Keyset (cursor) pagination for the keyword and article listings.
+
+Pages are ordered by (created_at, id) and continue from an opaque cursor - the last row's
+created_at and id - with WHERE (created_at, id) < (cursor), so every page is an index range
+scan however deep it is, unlike OFFSET. The total is only estimated (count_estimate), for the
+X-Total-Count-Estimate header.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+from database_models import db
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# without the planner's estimate (Postgres), rows are counted up to this many
+COUNT_ESTIMATE_CAP = 10000
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    payload = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """(created_at, id) of a cursor - ValueError if it isn't one of ours"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(payload)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+
+
+def parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """An ISO date or datetime filter - UTC unless it has an offset - ValueError if malformed"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Invalid date: {value}')
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def page_size(value: Optional[str]) -> int:
+    """The requested page size, clamped to 1..MAX_PAGE_SIZE"""
+    if not value:
+        return DEFAULT_PAGE_SIZE
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except ValueError:
+        raise ValueError(f'Invalid limit: {value}')
+
+
+def like_prefix(prefix: str) -> str:
+    """A LIKE pattern matching values that start with prefix"""
+    return prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def keyset_page(query, model, cursor: Optional[str], limit: int, descending: bool = True) -> Tuple[List, Optional[str]]:
+    """
+    One page of query, ordered by (model.created_at, model.id), after cursor -
+    (rows, cursor of the next page or None on the last page)
+    """
+    created_at, row_id = model.created_at, model.id
+    if cursor:
+        after_created_at, after_id = decode_cursor(cursor)
+        # the plain created_at bound lets the index seek straight to the cursor -
+        # on the OR alone SQLite scans the project's whole index range
+        if descending:
+            query = query.filter(created_at <= after_created_at,
+                                 or_(created_at < after_created_at,
+                                     and_(created_at == after_created_at, row_id < after_id)))
+        else:
+            query = query.filter(created_at >= after_created_at,
+                                 or_(created_at > after_created_at,
+                                     and_(created_at == after_created_at, row_id > after_id)))
+
+    if descending:
+        query = query.order_by(created_at.desc(), row_id.desc())
+    else:
+        query = query.order_by(created_at.asc(), row_id.asc())
+
+    # one row more than the page tells whether there's a next page
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def count_estimate(query) -> str:
+    """
+    Roughly how many rows query matches, without counting them all: the planner's estimate on
+    Postgres, elsewhere an exact count up to COUNT_ESTIMATE_CAP ("10000+" beyond it)
+    """
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        compiled = query.statement.compile(dialect=connection.dialect)
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return str(int(plan[0]['Plan']['Plan Rows']))
+
+    count = db.session.query(db.func.count()).select_from(
+        query.order_by(None).limit(COUNT_ESTIMATE_CAP + 1).subquery()
+    ).scalar()
+    return f'{COUNT_ESTIMATE_CAP}+' if count > COUNT_ESTIMATE_CAP else str(count)
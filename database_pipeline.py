@@ -0,0 +1,233 @@
+"""
+Staged execution of claimed keywords.
+
+The article pipeline runs as stages - Neuron query, GPT draft, GPT optimization,
+images + publishing - each with its own worker pool and a bounded queue in front of it.
+A keyword moves on to the next stage's queue when a stage is done; a full queue blocks
+the stage feeding it (backpressure), so a slow external service holds back the stages
+before it instead of piling up work. Stage outputs are saved as keyword checkpoints,
+so they - not the in-memory queues - are the durable state: a keyword that is reclaimed
+after a crash re-enters the pipeline at its first stage without a checkpoint.
+"""
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from configs import (
+    app,
+    pipeline_neuron_workers,
+    pipeline_gpt_workers,
+    pipeline_publish_workers,
+    pipeline_queue_size,
+    openai_tokens_per_minute,
+    pipeline_tokens_per_article_estimate,
+)
+from database_models import KeywordQueue, Project
+from database_checkpoints import KeywordCheckpoints
+from database_scheduler import (
+    KeywordJob,
+    lease_heartbeat,
+    load_claimed_keyword,
+    begin_keyword_attempt,
+    publish_keyword,
+    record_keyword_result,
+    record_keyword_exception,
+)
+from routes.create_article import run_article_stage
+
+
+class TokenRateLimiter:
+    """
+    Tokens-per-minute budget shared by all GPT stage workers (a token bucket refilled continuously).
+    tokens_per_minute <= 0 means unlimited.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.tokens_per_minute = tokens_per_minute
+        self._available = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> None:
+        """Block until tokens are available, then take them"""
+        if self.tokens_per_minute <= 0:
+            return
+        # a single request bigger than the whole budget waits for a full bucket
+        tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._available = min(
+                    self.tokens_per_minute,
+                    self._available + (now - self._updated) * self.tokens_per_minute / 60
+                )
+                self._updated = now
+                if self._available >= tokens:
+                    self._available -= tokens
+                    return
+                wait_seconds = (tokens - self._available) * 60 / self.tokens_per_minute
+            time.sleep(wait_seconds)
+
+
+@dataclass
+class PipelineStage:
+    """One stage: run(keyword, project, checkpoints) -> None, or the publish result for the last stage"""
+    name: str
+    workers: int
+    run: Callable[[KeywordQueue, Project, KeywordCheckpoints], Optional[dict]]
+
+
+openai_rate_limiter = TokenRateLimiter(openai_tokens_per_minute)
+
+
+def _article_stage(stage: str, tokens_estimate: int = 0):
+    def run(keyword: KeywordQueue, project: Project, checkpoints: KeywordCheckpoints):
+        if tokens_estimate:
+            openai_rate_limiter.acquire(tokens_estimate)
+        run_article_stage(
+            stage,
+            checkpoints,
+            project.neuron_project_id or "default",
+            keyword.keyword,
+            project.default_engine,
+            project.default_language,
+            project.website_url
+        )
+    return run
+
+
+def default_stages() -> List[PipelineStage]:
+    # the draft takes about a third of an article's GPT tokens, the optimization rounds the rest
+    return [
+        # mostly waiting for Neuron to finish the query - many workers are cheap
+        PipelineStage('neuron_query', pipeline_neuron_workers, _article_stage('neuron_query')),
+        PipelineStage('draft', pipeline_gpt_workers,
+                      _article_stage('draft', pipeline_tokens_per_article_estimate // 3)),
+        PipelineStage('optimized', pipeline_gpt_workers,
+                      _article_stage('optimized', pipeline_tokens_per_article_estimate * 2 // 3)),
+        # images + WordPress; requests per WordPress host are also capped by the WordPress client
+        PipelineStage('publish', pipeline_publish_workers,
+                      lambda keyword, project, checkpoints: publish_keyword(keyword, project, checkpoints)),
+    ]
+
+
+class StagedPipeline:
+    """Runs claimed keyword jobs through the stages, each stage on its own worker pool"""
+
+    def __init__(self, stages: Optional[List[PipelineStage]] = None, queue_size: int = pipeline_queue_size):
+        self.stages = stages or default_stages()
+        self.queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in self.stages]
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+        self._pending = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def run(self, jobs: List[KeywordJob]) -> Tuple[int, int]:
+        """Process the jobs, returns (succeeded, failed) once all of them are done"""
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for n in range(max(1, stage.workers)):
+                thread = threading.Thread(target=self._worker, args=(index,),
+                                          name=f"pipeline-{stage.name}-{n}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        with self._lock:
+            self._pending = len(jobs)
+
+        for job in jobs:
+            entry_stage = self._start(job)
+            if entry_stage is not None:
+                # blocks while the stage's queue is full
+                self.queues[entry_stage].put(job)
+
+        with self._finished:
+            while self._pending:
+                self._finished.wait()
+
+        # stop the workers
+        for index, stage in enumerate(self.stages):
+            for _ in range(max(1, stage.workers)):
+                self.queues[index].put(None)
+        for thread in threads:
+            thread.join()
+
+        return self.succeeded, self.failed
+
+    def _start(self, job: KeywordJob) -> Optional[int]:
+        """Begin the keyword's attempt. Returns the stage to start at, or None if it can't run."""
+        with app.app_context():
+            claimed = load_claimed_keyword(job)
+            if claimed is None:
+                self._finish(job, None)
+                return None
+            keyword, project = claimed
+
+            lease_heartbeat.register(job.keyword_id)
+            try:
+                begin_keyword_attempt(keyword, project)
+            except Exception as e:
+                record_keyword_exception(keyword, e)
+                self._finish(job, False)
+                return None
+
+        # resume at the first stage without a checkpoint
+        completed = set(KeywordCheckpoints(job.keyword_id).completed_stages())
+        for index, stage in enumerate(self.stages[:-1]):
+            if stage.name not in completed:
+                return index
+        return len(self.stages) - 1
+
+    def _worker(self, index: int) -> None:
+        stage = self.stages[index]
+        is_last = index == len(self.stages) - 1
+
+        while True:
+            job = self.queues[index].get()
+            if job is None:
+                return
+
+            next_stage = None
+            with app.app_context():
+                claimed = load_claimed_keyword(job)
+                if claimed is None:
+                    self._finish(job, None)
+                    continue
+                keyword, project = claimed
+
+                try:
+                    result = stage.run(keyword, project, KeywordCheckpoints(job.keyword_id))
+                    lease_heartbeat.touch(job.keyword_id)
+                    if is_last:
+                        self._finish(job, record_keyword_result(keyword, result))
+                    else:
+                        next_stage = index + 1
+                except Exception as e:
+                    record_keyword_exception(keyword, e)
+                    self._finish(job, False)
+
+            if next_stage is not None:
+                # blocks while the next stage is backed up
+                self.queues[next_stage].put(job)
+
+    def _finish(self, job: KeywordJob, success: Optional[bool]) -> None:
+        lease_heartbeat.unregister(job.keyword_id)
+        self._done(success)
+
+    def _done(self, success: Optional[bool]) -> None:
+        """Count a finished job - success None: the claim was lost to another worker, neither outcome"""
+        with self._finished:
+            if success:
+                self.succeeded += 1
+            elif success is not None:
+                self.failed += 1
+            self._pending -= 1
+            self._finished.notify_all()
+
+
+def run_pipeline_jobs(jobs: List[KeywordJob]) -> Tuple[int, int]:
+    """Run claimed keyword jobs through the staged pipeline. Returns (succeeded, failed)."""
+    return StagedPipeline().run(jobs)
@@ -2,15 +2,307 @@
 Database-based scheduler for processing keywords from projects
 """
 import logging
+import os
+import random
+import socket
+import threading
+import time
 import traceback
-from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+import uuid
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time, timedelta, timezone, tzinfo
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from configs import app
+import requests
+from sqlalchemy import select, update
+
+from configs import (
+    app,
+    scheduler_max_workers,
+    scheduler_max_workers_per_project,
+    scheduler_execution_mode,
+    keyword_lease_seconds,
+    keyword_lease_heartbeat_seconds,
+    keyword_lease_stall_seconds,
+    schedule_window_hours,
+    keyword_max_attempts,
+    keyword_retry_base_seconds,
+    keyword_retry_max_seconds,
+)
 from database_models import db, Project, Schedule, KeywordQueue, Article
+from database_checkpoints import KeywordCheckpoints, STAGE_MEDIA, STAGE_OPTIMIZED
+from database_archive import archive_finished_keywords
+from database_content import record_revision
+from database_stats import apply_stats_deltas, queue_stats, reconcile_project_stats
 from routes.publish_to_wordpress import create_article_and_publish_internal
 
-WORKER_ID = "database-scheduler"
+WORKER_ID_PREFIX = "database-scheduler"
+
+
+def _system_clock() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# where "now" comes from - scheduler_simulation.py swaps in a virtual clock
+clock: Callable[[], datetime] = _system_clock
+
+
+def utcnow() -> datetime:
+    """Current time, in UTC"""
+    return clock()
+
+
+# (pid, worker id) - regenerated in a forked child, e.g. a gunicorn worker
+_worker_identity = (None, None)
+
+
+def get_worker_id() -> str:
+    """Identity of this scheduler process: '<prefix>:<host>:<pid>:<random>', unique across nodes and forks"""
+    global _worker_identity
+    pid = os.getpid()
+    if _worker_identity[0] != pid:
+        _worker_identity = (pid, f"{WORKER_ID_PREFIX}:{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}")
+    return _worker_identity[1]
+
+
+class LeaseHeartbeat:
+    """
+    Background thread that keeps the leases of this process's in-flight keywords alive.
+
+    Every interval seconds the lease of each registered keyword that reported progress
+    (touch) within stall_seconds is extended to now + lease_seconds - in one UPDATE, and only
+    while the keyword is still claimed by this worker. Held keywords (claimed, waiting for a
+    worker) are renewed too, without a stall check until they are registered. A crashed worker
+    stops renewing, so its keywords become claimable again within lease_seconds instead of hours.
+    """
+
+    def __init__(self, lease_seconds: int, interval_seconds: int, stall_seconds: int):
+        self.lease_seconds = lease_seconds
+        self.interval_seconds = interval_seconds
+        self.stall_seconds = stall_seconds
+        self._last_progress = {}  # keyword id -> monotonic time of last progress, None while held
+        self._stalled = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def hold(self, keyword_ids: Iterable[int]) -> None:
+        """Keep the leases of claimed keywords that wait for a worker alive, until register/unregister"""
+        with self._lock:
+            for keyword_id in keyword_ids:
+                self._last_progress.setdefault(keyword_id, None)
+            self._start_thread()
+
+    def register(self, keyword_id: int) -> None:
+        """A keyword's processing starts - from now on its lease is renewed only while it makes progress"""
+        with self._lock:
+            self._last_progress[keyword_id] = time.monotonic()
+            self._stalled.discard(keyword_id)
+            self._start_thread()
+
+    def _start_thread(self) -> None:
+        # (re)started lazily - threads don't survive a fork
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="keyword-lease-heartbeat", daemon=True)
+            self._thread.start()
+
+    def touch(self, keyword_id: int) -> None:
+        """Report progress on a keyword"""
+        with self._lock:
+            if keyword_id in self._last_progress:
+                self._last_progress[keyword_id] = time.monotonic()
+
+    def unregister(self, keyword_id: int) -> None:
+        with self._lock:
+            self._last_progress.pop(keyword_id, None)
+            self._stalled.discard(keyword_id)
+
+    def renew(self) -> int:
+        """Renew the leases of the keywords that are making progress. Returns the number renewed."""
+        now_monotonic = time.monotonic()
+        with self._lock:
+            live = [keyword_id for keyword_id, last in self._last_progress.items()
+                    if last is None or now_monotonic - last < self.stall_seconds]
+            newly_stalled = set(self._last_progress) - set(live) - self._stalled
+            self._stalled |= newly_stalled
+
+        for keyword_id in newly_stalled:
+            logging.warning(f"Keyword {keyword_id} made no progress for {self.stall_seconds}s, "
+                            f"no longer renewing its lease")
+        if not live:
+            return 0
+
+        with app.app_context():
+            renewed = db.session.execute(
+                update(KeywordQueue).where(
+                    KeywordQueue.id.in_(live),
+                    KeywordQueue.status == 'processing',
+                    KeywordQueue.processing_by == get_worker_id()
+                ).values(
+                    lease_until=utcnow() + timedelta(seconds=self.lease_seconds)
+                ).execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+
+        if renewed < len(live):
+            logging.warning(f"Lost the lease of {len(live) - renewed} of {len(live)} in-flight keywords")
+        return renewed
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval_seconds)
+            with self._lock:
+                if not self._last_progress:
+                    # nothing in flight - exit, the next register() starts a new thread
+                    self._thread = None
+                    return
+            try:
+                self.renew()
+            except Exception as e:
+                logging.exception(f"Error renewing keyword leases: {e}")
+
+
+lease_heartbeat = LeaseHeartbeat(
+    keyword_lease_seconds,
+    keyword_lease_heartbeat_seconds,
+    keyword_lease_stall_seconds
+)
+
+
+@dataclass(frozen=True)
+class KeywordJob:
+    """A claimed keyword, as plain values that can be handed to another thread/session"""
+    keyword_id: int
+    project_id: int
+    keyword: str
+    priority: int = 1
+
+
+@dataclass(frozen=True)
+class ScheduleSlot:
+    """A keyword a schedule may still claim in this run - claimed once a worker is free for it"""
+    schedule_id: int
+    project_id: int
+    number: int
+    priority: int = 1
+
+
+class FairShareQueue:
+    """
+    Weighted fair-share queue of keyword jobs across projects (stride scheduling).
+
+    Every job taken from a project advances the project's virtual time by 1 / weight, and the
+    next job comes from the project with the lowest virtual time that may run now - so each
+    project gets a share of the workers proportional to its weight, and one big project can't
+    use up the upstream quota before the others get a turn. Within a project, jobs are taken
+    by priority, then in the order they were added. (Jobs are KeywordJobs, or ScheduleSlots
+    when keywords are claimed as workers become free.)
+    """
+
+    def __init__(self, weights: Optional[Dict[int, float]] = None, record_waits: bool = True):
+        self.weights = weights or {}
+        self.record_waits = record_waits  # into dispatch_wait_stats
+        self._jobs: Dict[int, deque] = {}
+        self._virtual_time: Dict[int, float] = {}
+        self._enqueued_at: Dict[KeywordJob, float] = {}  # job -> monotonic time it was queued
+
+    def __len__(self) -> int:
+        return sum(len(jobs) for jobs in self._jobs.values())
+
+    def push(self, job: KeywordJob) -> None:
+        jobs = self._jobs.get(job.project_id)
+        if not jobs:
+            # a project (re)joining starts at the current virtual time - no credit for having been idle
+            active = [self._virtual_time[p] for p, queued in self._jobs.items() if queued]
+            self._virtual_time[job.project_id] = max(
+                self._virtual_time.get(job.project_id, 0.0),
+                min(active) if active else 0.0
+            )
+            jobs = self._jobs[job.project_id] = deque()
+
+        # keep priority order within the project (stable for equal priorities)
+        index = len(jobs)
+        while index > 0 and jobs[index - 1].priority < job.priority:
+            index -= 1
+        jobs.insert(index, job)
+        self._enqueued_at[job] = time.monotonic()
+
+    def pop(self, can_run: Callable[[int], bool] = lambda project_id: True) -> Optional[KeywordJob]:
+        """Next job of the project with the lowest virtual time for which can_run(project_id), or None"""
+        candidates = [p for p, jobs in self._jobs.items() if jobs and can_run(p)]
+        if not candidates:
+            return None
+
+        project_id = min(candidates, key=lambda p: (self._virtual_time[p], p))
+        job = self._jobs[project_id].popleft()
+        self._virtual_time[project_id] += 1.0 / max(self.weights.get(project_id, 1), 1e-9)
+
+        enqueued_at = self._enqueued_at.pop(job, None)
+        if enqueued_at is not None and self.record_waits:
+            dispatch_wait_stats.record(project_id, time.monotonic() - enqueued_at)
+        return job
+
+    def remove(self, predicate: Callable[[KeywordJob], bool]) -> None:
+        """Drop the queued jobs for which predicate(job)"""
+        for jobs in self._jobs.values():
+            for job in [job for job in jobs if predicate(job)]:
+                jobs.remove(job)
+                self._enqueued_at.pop(job, None)
+
+
+class DispatchWaitStats:
+    """Per-project time keyword jobs waited in this process for a worker (since start)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[int, dict] = {}
+
+    def record(self, project_id: int, seconds: float) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(project_id, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            stats['count'] += 1
+            stats['total_seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+    def snapshot(self) -> Dict[int, dict]:
+        with self._lock:
+            return {
+                project_id: {
+                    'count': stats['count'],
+                    'avg_wait_seconds': round(stats['total_seconds'] / stats['count'], 3),
+                    'max_wait_seconds': round(stats['max_seconds'], 3),
+                }
+                for project_id, stats in self._stats.items()
+            }
+
+
+dispatch_wait_stats = DispatchWaitStats()
+
+
+def project_weights(project_ids) -> Dict[int, float]:
+    """Fair-share weight of each project: its daily_keywords_limit"""
+    project_ids = list(set(project_ids))
+    if not project_ids:
+        return {}
+    with app.app_context():
+        rows = db.session.query(Project.id, Project.daily_keywords_limit).filter(Project.id.in_(project_ids)).all()
+    return {project_id: float(limit or 1) for project_id, limit in rows}
+
+
+def fair_share_order(jobs: List[KeywordJob], weights: Optional[Dict[int, float]] = None) -> List[KeywordJob]:
+    """The jobs interleaved across projects by weighted fair share"""
+    fair_queue = FairShareQueue(weights, record_waits=False)
+    for job in jobs:
+        fair_queue.push(job)
+    ordered = []
+    while True:
+        job = fair_queue.pop()
+        if job is None:
+            return ordered
+        ordered.append(job)
+
 
 def get_eligible_projects() -> List[Project]:
     """Get all active projects that should be processed"""
@@ -27,115 +319,509 @@ def get_project_schedules(project_id: int) -> List[Schedule]:
         ).all()
 
 
-def should_schedule_run_today(schedule: Schedule) -> bool:
-    """Check if schedule should run today based on days_of_week"""
-    today = datetime.now().weekday()  # 0=Monday, 6=Sunday
-    
-    # Convert Python weekday to our format (1=Sunday, 7=Saturday)
-    our_weekday = 1 if today == 6 else today + 2
-    
-    days_of_week = schedule.get_days_of_week()
-    return our_weekday in days_of_week
+def schedule_timezone(schedule: Schedule) -> tzinfo:
+    """The schedule's timezone (UTC if it is missing or unknown)"""
+    try:
+        return ZoneInfo(schedule.timezone or 'UTC')
+    except (ZoneInfoNotFoundError, ValueError):
+        logging.warning(f"Unknown timezone '{schedule.timezone}' for schedule {schedule.name}, using UTC")
+        return timezone.utc
+
+
+def schedule_runs_on(schedule: Schedule, local_date: date) -> bool:
+    """Check if the schedule runs on a date (in its own timezone) based on days_of_week"""
+    # Convert the ISO weekday (1=Monday, 7=Sunday) to our format (1=Sunday, 7=Saturday)
+    our_weekday = local_date.isoweekday() % 7 + 1
+    return our_weekday in schedule.get_days_of_week()
+
+
+def should_schedule_run_today(schedule: Schedule, now: Optional[datetime] = None) -> bool:
+    """Check if schedule should run today - today in the schedule's own timezone"""
+    now = now or utcnow()
+    return schedule_runs_on(schedule, now.astimezone(schedule_timezone(schedule)).date())
+
+
+def schedule_day_start(schedule: Schedule, now: datetime) -> datetime:
+    """Local midnight of the schedule's current day, in UTC"""
+    tz = schedule_timezone(schedule)
+    local_date = now.astimezone(tz).date()
+    return datetime.combine(local_date, dt_time.min, tzinfo=tz).astimezone(timezone.utc)
+
 
+def schedule_slots(schedule: Schedule, local_date: date,
+                   window_hours: float = schedule_window_hours) -> List[datetime]:
+    """
+    The schedule's slots on a local date, in UTC: daily_limit slots spread evenly over
+    window_hours starting at start_time (one keyword per slot). Empty if it doesn't run that day.
+    """
+    if not schedule.daily_limit or not schedule_runs_on(schedule, local_date):
+        return []
 
-def claim_keywords_for_schedule(schedule: Schedule, limit: int) -> List[KeywordQueue]:
-    """Claim pending keywords for processing"""
+    tz = schedule_timezone(schedule)
+    start = datetime.combine(local_date, schedule.start_time or dt_time.min, tzinfo=tz).astimezone(timezone.utc)
+    spacing = timedelta(hours=window_hours) / schedule.daily_limit
+    return [start + i * spacing for i in range(schedule.daily_limit)]
+
+
+def next_schedule_slot(schedule: Schedule, now: datetime, claimed_today: int,
+                       window_hours: float = schedule_window_hours) -> Optional[datetime]:
+    """
+    When the schedule's next keyword is due, in UTC (in the past if it is behind),
+    given how many keywords it claimed since its local midnight. None if it never runs.
+    """
+    local_today = now.astimezone(schedule_timezone(schedule)).date()
+
+    today_slots = schedule_slots(schedule, local_today, window_hours)
+    if claimed_today < len(today_slots):
+        return today_slots[claimed_today]
+
+    # today is done - first slot of the next day the schedule runs
+    for days_ahead in range(1, 8):
+        slots = schedule_slots(schedule, local_today + timedelta(days=days_ahead), window_hours)
+        if slots:
+            return slots[0]
+    return None
+
+
+def claim_keywords_for_schedule(schedule: Schedule, limit: int) -> List[KeywordJob]:
+    """
+    Atomically claim up to limit lease-expired or pending keywords of a schedule for this worker.
+
+    Keywords whose lease expired (their worker died) are taken over first, then pending ones by
+    priority and age - each an UPDATE ... WHERE id IN (SELECT ... LIMIT n) read off its own index,
+    so two schedulers never get the same keyword: on Postgres the candidate rows are locked
+    FOR UPDATE SKIP LOCKED (concurrent claimers take the next rows instead of waiting) and the
+    claimed rows come back with RETURNING; on SQLite the statement holds the database write lock,
+    and the claimed rows are read back by worker id + lease in the same transaction.
+    The project's pending/processing counters change in the same transaction.
+    """
     with app.app_context():
         # Get current time
-        now = datetime.now(timezone.utc)
-        lease_until = now + timedelta(hours=2)  # 2-hour lease
-        
-        # Find pending keywords or keywords with expired leases
-        keywords = KeywordQueue.query.filter(
+        now = utcnow()
+        lease_until = now + timedelta(seconds=keyword_lease_seconds)  # renewed by lease_heartbeat while processing
+        worker_id = get_worker_id()
+        dialect = db.session.connection().dialect  # connected, so server capabilities are known
+
+        of_schedule = db.and_(
             KeywordQueue.project_id == schedule.project_id,
-            KeywordQueue.schedule_id == schedule.id,
-            db.or_(
-                KeywordQueue.status == 'pending',
-                db.and_(
-                    KeywordQueue.status == 'processing',
-                    KeywordQueue.lease_until < now
+            KeywordQueue.schedule_id == schedule.id
+        )
+        # ix_keywords_queue_processing_lease
+        expired = db.and_(
+            KeywordQueue.status == 'processing',
+            KeywordQueue.lease_until < now
+        )
+        # ix_keywords_queue_pending_claim - and not waiting for a retry
+        pending = db.and_(
+            KeywordQueue.status == 'pending',
+            db.or_(KeywordQueue.scheduled_for.is_(None), KeywordQueue.scheduled_for <= now)
+        )
+        columns = (KeywordQueue.id, KeywordQueue.project_id, KeywordQueue.keyword,
+                   KeywordQueue.priority, KeywordQueue.created_at)
+
+        rows = []
+        claimed = {}  # status before the claim -> number of keywords
+        for status, kind in (('processing', expired), ('pending', pending)):
+            remaining = limit - sum(claimed.values())
+            if remaining <= 0:
+                break
+            candidates = select(KeywordQueue.id).where(of_schedule, kind).order_by(
+                KeywordQueue.priority.desc(),
+                KeywordQueue.created_at.asc()
+            ).limit(remaining)
+            if dialect.name == 'postgresql':
+                candidates = candidates.with_for_update(skip_locked=True)
+
+            # re-checking the filter on the outer UPDATE keeps it safe where rows can't be locked
+            claim = update(KeywordQueue).where(
+                KeywordQueue.id.in_(candidates.scalar_subquery()),
+                of_schedule,
+                kind
+            ).values(
+                status='processing',
+                processing_by=worker_id,
+                lease_until=lease_until,
+                claimed_at=now
+            ).execution_options(synchronize_session=False)
+
+            if dialect.update_returning:
+                returned = db.session.execute(claim.returning(*columns)).all()
+                rows.extend(returned)
+                claimed[status] = len(returned)
+            else:
+                claimed[status] = db.session.execute(claim).rowcount
+
+        if not dialect.update_returning:
+            rows = db.session.execute(
+                select(*columns).where(
+                    KeywordQueue.processing_by == worker_id,
+                    KeywordQueue.lease_until == lease_until
                 )
+            ).all()
+
+        claimed_pending = claimed.get('pending', 0)
+        if claimed_pending:
+            apply_stats_deltas(db.session.connection(), {
+                schedule.project_id: {'pending': -claimed_pending, 'processing': claimed_pending}
+            })
+
+        db.session.commit()
+
+        # RETURNING gives no order guarantee - keep the claim order
+        rows.sort(key=lambda row: (-(row.priority or 0), row.created_at))
+        return [KeywordJob(row.id, row.project_id, row.keyword, row.priority or 1) for row in rows]
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Timezone-aware UTC datetime (SQLite returns naive datetimes)"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def schedule_claims_since(schedule_id: int, since: datetime) -> Tuple[int, Optional[datetime]]:
+    """(number of keywords of the schedule claimed since `since`, time of the latest claim)"""
+    with app.app_context():
+        count, last_claimed_at = db.session.query(
+            db.func.count(KeywordQueue.id),
+            db.func.max(KeywordQueue.claimed_at)
+        ).filter(
+            KeywordQueue.schedule_id == schedule_id,
+            KeywordQueue.claimed_at >= since
+        ).one()
+        return count, as_utc(last_claimed_at)
+
+
+# --- retry policy ---
+
+ERROR_TRANSIENT = 'transient'
+ERROR_PERMANENT = 'permanent'
+
+# HTTP statuses worth retrying: timeouts, rate limits, upstream/server errors
+TRANSIENT_HTTP_STATUSES = {408, 425, 429}
+
+# exceptions (by class name, so the upstream SDKs needn't be imported here) that mean "try again later"
+TRANSIENT_ERROR_NAMES = {'APIConnectionError', 'APITimeoutError', 'RateLimitError', 'InternalServerError'}
+
+# ... and that mean retrying won't help (unless their HTTP status says otherwise)
+PERMANENT_ERROR_NAMES = {'NeuronResponseError'}
+
+
+class PermanentKeywordError(Exception):
+    """A failure retrying can't fix (missing configuration, invalid input)"""
+
+
+def classify_error(e: Exception) -> str:
+    """ERROR_TRANSIENT (retry later) or ERROR_PERMANENT (retrying won't help) for an exception"""
+    if isinstance(e, PermanentKeywordError):
+        return ERROR_PERMANENT
+    if isinstance(e, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError)):
+        return ERROR_TRANSIENT
+
+    # OpenAI: an exhausted quota is a billing problem, not a rate limit
+    if getattr(e, 'code', None) == 'insufficient_quota':
+        return ERROR_PERMANENT
+
+    status = getattr(e, 'status_code', None)
+    if status is None and getattr(e, 'response', None) is not None:
+        status = getattr(e.response, 'status_code', None)
+    if isinstance(status, int):
+        if status in TRANSIENT_HTTP_STATUSES or status >= 500:
+            return ERROR_TRANSIENT
+        if 400 <= status < 500:
+            # bad credentials / project ids / requests
+            return ERROR_PERMANENT
+
+    if type(e).__name__ in TRANSIENT_ERROR_NAMES:
+        return ERROR_TRANSIENT
+    if type(e).__name__ in PERMANENT_ERROR_NAMES:
+        return ERROR_PERMANENT
+
+    # anything else unexpected (including a KeyError/ValueError from our own code) - retried, up to the attempt limit
+    return ERROR_TRANSIENT
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next attempt: base * 2^(attempts - 1), capped, with jitter"""
+    delay = min(keyword_retry_max_seconds, keyword_retry_base_seconds * 2 ** max(0, attempts - 1))
+    # "equal jitter" - between half and all of the delay, so failed keywords don't retry in lockstep
+    return timedelta(seconds=delay / 2 + random.uniform(0, delay / 2))
+
+
+def record_keyword_failure(keyword: KeywordQueue, error_message: str, error_class: str) -> None:
+    """
+    Reschedule a transient failure with backoff, or move the keyword to the dead letter
+    state when the failure is permanent or it ran out of attempts. Doesn't commit.
+    """
+    keyword.error_message = error_message[:500]  # Truncate long error messages
+    keyword.error_class = error_class
+    keyword.processing_by = None
+    keyword.lease_until = None
+
+    if error_class == ERROR_TRANSIENT and (keyword.attempts or 0) < keyword_max_attempts:
+        # Retry later
+        keyword.status = 'pending'
+        keyword.scheduled_for = utcnow() + retry_delay(keyword.attempts or 1)
+        logging.warning(f"Keyword {keyword.keyword} failed (attempt {keyword.attempts}/{keyword_max_attempts}), "
+                        f"retrying at {keyword.scheduled_for}: {keyword.error_message}")
+    else:
+        keyword.status = 'dead_letter'
+        logging.error(f"Keyword {keyword.keyword} moved to dead letter ({error_class}, "
+                      f"attempt {keyword.attempts}): {keyword.error_message}")
+
+
+def begin_keyword_attempt(keyword: KeywordQueue, project: Project) -> None:
+    """Count the attempt, and check the project can be published to"""
+    # Increment attempts
+    keyword.attempts += 1
+    db.session.commit()
+
+    # Publish with the project's own WordPress site and credentials
+    if not (project.website_url and project.wordpress_user and project.wordpress_password):
+        raise PermanentKeywordError(f"Project {project.name} has no WordPress credentials configured")
+
+
+def publish_keyword(keyword: KeywordQueue, project: Project, checkpoints: KeywordCheckpoints) -> dict:
+    """Create the keyword's article and publish it to the project's WordPress site"""
+    keyword_id = keyword.id
+
+    # Call the existing article creation function
+    return create_article_and_publish_internal(
+        keyword=keyword.keyword,
+        project_id=project.neuron_project_id or "default",  # Use project's neuron ID
+        engine=project.default_engine,
+        language=project.default_language,
+        site=project.website_url,
+        keyword_id=keyword_id,  # idempotency: a retry updates the post it already published
+        wp_site=project.website_url,
+        wp_user=project.wordpress_user,
+        wp_password=project.wordpress_password,
+        on_progress=lambda: lease_heartbeat.touch(keyword_id),
+        checkpoints=checkpoints  # a retry resumes after the last completed stage
+    )
+
+
+def record_keyword_result(keyword: KeywordQueue, result: dict) -> bool:
+    """Mark the keyword completed (with its article record) or failed - see record_keyword_failure - from a publish result"""
+    success = bool(result.get("success"))
+    
+    if success:
+        # Mark as completed and create article record
+        keyword.status = 'completed'
+        keyword.processed_at = utcnow()
+        keyword.error_message = None
+        keyword.error_class = None
+        
+        # Create (or, for a re-published keyword, update) the article record
+        article = Article.query.filter_by(keyword_id=keyword.id).first()
+        if article is None:
+            article = Article(
+                project_id=keyword.project_id,
+                keyword_id=keyword.id
             )
-        ).order_by(
-            KeywordQueue.priority.desc(),
-            KeywordQueue.created_at.asc()
-        ).limit(limit).all()
+            db.session.add(article)
+
+        article.title = result.get('title', 'Generated Article')
+        article.content_score = result.get('content_score')
+        article.wordpress_post_id = result.get('wordpress_post_id')
+        article.published_at = utcnow()
+        record_published_content(keyword, article)
         
-        # Claim the keywords
-        claimed_keywords = []
-        for keyword in keywords:
-            keyword.status = 'processing'
-            keyword.processing_by = WORKER_ID
-            keyword.lease_until = lease_until
-            claimed_keywords.append(keyword)
+        logging.info(f"Successfully processed keyword: {keyword.keyword}")
         
-        db.session.commit()
-        return claimed_keywords
+    else:
+        # Retry later, or dead letter
+        record_keyword_failure(
+            keyword,
+            result.get('message') or result.get('error') or 'Unknown error',
+            ERROR_TRANSIENT
+        )
+    
+    db.session.commit()
+
+    if success:
+        # done - the stage outputs are not needed anymore
+        KeywordCheckpoints(keyword.id).clear()
+    return success
+
+
+def record_published_content(keyword: KeywordQueue, article: Article) -> None:
+    """
+    Keep the published HTML (with its images) and meta description with the article -
+    from the stage checkpoints, before they are cleared - so it can be republished
+    without generating it again
+    """
+    checkpoints = KeywordCheckpoints(keyword.id)
+    media = checkpoints.get(STAGE_MEDIA) or {}
+    optimized = checkpoints.get(STAGE_OPTIMIZED) or {}
+
+    article.meta_description = optimized.get('main_article_description') or article.meta_description
+    if media.get('article_html'):
+        revision = record_revision(keyword.id, 'published', media['article_html'], article.title,
+                                   article.meta_description, article.content_score)
+        article.content_hash = revision.content_hash
+
+
+def record_keyword_exception(keyword: KeywordQueue, e: Exception) -> None:
+    """Reschedule or dead-letter the keyword after an exception, by the error's class"""
+    error_msg = f"{type(e).__name__}: {e}"
+    logging.exception(f"Exception processing keyword {keyword.keyword}: {error_msg}")
+    
+    db.session.rollback()
+    record_keyword_failure(keyword, error_msg, classify_error(e))
+    db.session.commit()
 
 
 def process_keyword(keyword: KeywordQueue, project: Project) -> bool:
-    """Process a single keyword"""
+    """Process a single keyword (in the current app context / session)"""
+    try:
+        logging.info(f"Processing keyword: {keyword.keyword} for project: {project.name}")
+        
+        begin_keyword_attempt(keyword, project)
+        result = publish_keyword(keyword, project, KeywordCheckpoints(keyword.id))
+        return record_keyword_result(keyword, result)
+        
+    except Exception as e:
+        record_keyword_exception(keyword, e)
+        return False
+
+
+def load_claimed_keyword(job: KeywordJob) -> Optional[Tuple[KeywordQueue, Project]]:
+    """
+    (keyword, project) of a job, in the current session - None if this worker no longer holds the claim.
+    The claim is re-checked and its lease extended in one UPDATE, so a keyword whose lease ran out -
+    and that another worker may be taking over - is never started.
+    """
+    now = utcnow()
+    renewed = db.session.execute(
+        update(KeywordQueue).where(
+            KeywordQueue.id == job.keyword_id,
+            KeywordQueue.status == 'processing',
+            KeywordQueue.processing_by == get_worker_id(),
+            KeywordQueue.lease_until >= now
+        ).values(
+            lease_until=now + timedelta(seconds=keyword_lease_seconds)
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    if not renewed:
+        # our lease expired - the keyword is (or will be) reclaimed
+        logging.warning(f"Keyword {job.keyword} is no longer claimed by this worker, skipping")
+        return None
+
+    keyword = db.session.get(KeywordQueue, job.keyword_id)
+    project = db.session.get(Project, job.project_id)
+    if keyword is None or project is None:
+        logging.warning(f"Claimed keyword {job.keyword_id} or its project no longer exists")
+        return None
+    return keyword, project
+
+
+def process_keyword_job(job: KeywordJob) -> Optional[bool]:
+    """
+    Process one claimed keyword in an app context - and so a scoped SQLAlchemy session - of its own.
+    None if this worker lost the claim (the keyword is another worker's now, not a failure).
+    """
     with app.app_context():
         try:
-            logging.info(f"Processing keyword: {keyword.keyword} for project: {project.name}")
-            
-            # Increment attempts
-            keyword.attempts += 1
-            db.session.commit()
-            
-            # Call the existing article creation function
-            result = create_article_and_publish_internal(
-                keyword=keyword.keyword,
-                project_id=project.neuron_project_id or "default",  # Use project's neuron ID
-                engine=project.default_engine,
-                language=project.default_language,
-                site=project.website_url
-            )
-            
-            success = bool(result.get("success"))
-            
-            if success:
-                # Mark as completed and create article record
-                keyword.status = 'completed'
-                keyword.processed_at = datetime.now(timezone.utc)
-                keyword.error_message = None
-                
-                # Create article record
-                article = Article(
-                    project_id=keyword.project_id,
-                    keyword_id=keyword.id,
-                    title=result.get('title', 'Generated Article'),
-                    content_score=result.get('content_score'),
-                    published_at=datetime.now(timezone.utc)
-                )
-                db.session.add(article)
-                
-                logging.info(f"Successfully processed keyword: {keyword.keyword}")
-                
-            else:
-                # Mark as failed
-                keyword.status = 'failed'
-                keyword.error_message = result.get('message') or result.get('error') or 'Unknown error'
-                logging.warning(f"Failed to process keyword: {keyword.keyword} - {keyword.error_message}")
-            
-            db.session.commit()
-            return success
-            
-        except Exception as e:
-            error_msg = f"{type(e).__name__}: {e}"
-            logging.exception(f"Exception processing keyword {keyword.keyword}: {error_msg}")
-            
-            # Mark as failed
-            keyword.status = 'failed'
-            keyword.error_message = error_msg[:500]  # Truncate long error messages
-            db.session.commit()
-            
-            return False
+            claimed = load_claimed_keyword(job)
+            if claimed is None:
+                return None
+
+            lease_heartbeat.register(job.keyword_id)
+            return process_keyword(*claimed)
+        finally:
+            lease_heartbeat.unregister(job.keyword_id)
+
+
+def run_keyword_jobs(schedules: List[Schedule],
+                     max_workers: int = scheduler_max_workers,
+                     max_workers_per_project: int = scheduler_max_workers_per_project,
+                     weights: Optional[Dict[int, float]] = None) -> Tuple[int, int]:
+    """
+    Claim and run the keywords of schedules on a worker pool, up to each schedule's daily_limit.
+    Keywords are claimed only as workers become free for them, so no claim waits out its lease here.
+    At most max_workers jobs run at once, and at most max_workers_per_project of one project;
+    free workers go to projects by weighted fair share (weights: project id -> weight, default equal),
+    and within a project round-robin over its schedules, by keyword priority within a schedule.
+    max_workers=1 processes strictly in sequence.
+    Returns (succeeded, failed) - a keyword whose claim was lost to another worker is neither.
+    """
+    max_workers = max(1, max_workers)
+    max_workers_per_project = max(1, max_workers_per_project)
+
+    by_id = {schedule.id: schedule for schedule in schedules}
+    slots = FairShareQueue(weights)
+    for number in range(max((schedule.daily_limit or 0 for schedule in schedules), default=0)):
+        for schedule in schedules:
+            if number < (schedule.daily_limit or 0):
+                slots.push(ScheduleSlot(schedule.id, schedule.project_id, number))
+
+    in_flight = {}
+    running_per_project = defaultdict(int)
+    succeeded = 0
+    failed = 0
+    lost = 0
+
+    def claim_for_free_workers() -> None:
+        while len(in_flight) < max_workers and len(slots):
+            # slots for the free workers, by fair share, then claimed per schedule in one statement each
+            wanted = Counter()  # schedule id -> keywords to claim
+            taken = Counter()  # project id -> of those
+
+            def project_has_free_slot(project_id: int) -> bool:
+                return running_per_project[project_id] + taken[project_id] < max_workers_per_project
+
+            while len(in_flight) + sum(wanted.values()) < max_workers:
+                slot = slots.pop(project_has_free_slot)
+                if slot is None:
+                    break
+                wanted[slot.schedule_id] += 1
+                taken[slot.project_id] += 1
+            if not wanted:
+                return
+
+            for schedule_id, count in wanted.items():
+                jobs = claim_keywords_for_schedule(by_id[schedule_id], count)
+                if len(jobs) < count:
+                    # the schedule has no eligible keywords left
+                    slots.remove(lambda slot: slot.schedule_id == schedule_id)
+                for job in jobs:
+                    in_flight[pool.submit(process_keyword_job, job)] = job
+                    running_per_project[job.project_id] += 1
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="keyword-worker") as pool:
+        while True:
+            claim_for_free_workers()
+            if not in_flight:
+                break
+
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                job = in_flight.pop(future)
+                running_per_project[job.project_id] -= 1
+                try:
+                    success = future.result()
+                except Exception as e:
+                    logging.exception(f"Worker crashed on keyword {job.keyword}: {e}")
+                    success = False
+
+                if success is None:
+                    lost += 1
+                elif success:
+                    succeeded += 1
+                else:
+                    failed += 1
+
+    if lost:
+        logging.warning(f"{lost} keywords were taken over by other workers before they started")
+    return succeeded, failed
 
 
 def run_database_scheduler():
     """Main scheduler function to process keywords from database"""
     logging.info("Starting database scheduler run")
+    jobs: List[KeywordJob] = []
     
     try:
         with app.app_context():
@@ -146,9 +832,8 @@ def run_database_scheduler():
                 logging.info("No active projects found")
                 return
             
-            total_processed = 0
-            total_succeeded = 0
-            total_failed = 0
+            # due today, of every project
+            due_schedules: List[Schedule] = []
             
             for project in projects:
                 logging.info(f"Processing project: {project.name}")
@@ -167,77 +852,258 @@ def run_database_scheduler():
                         continue
                     
                     logging.info(f"Processing schedule: {schedule.name} (limit: {schedule.daily_limit})")
-                    
-                    # Claim keywords for processing
+                    due_schedules.append(schedule)
+            
+            if scheduler_execution_mode == 'pipeline':
+                # Claim the keywords up front and process them stage by stage
+                from database_pipeline import run_pipeline_jobs
+
+                for schedule in due_schedules:
                     keywords = claim_keywords_for_schedule(schedule, schedule.daily_limit)
-                    
                     if not keywords:
                         logging.info(f"No eligible keywords for schedule: {schedule.name}")
                         continue
                     
                     logging.info(f"Claimed {len(keywords)} keywords for processing")
-                    
-                    # Process each keyword
-                    for keyword in keywords:
-                        success = process_keyword(keyword, project)
-                        total_processed += 1
-                        
-                        if success:
-                            total_succeeded += 1
-                        else:
-                            total_failed += 1
+                    jobs.extend(keywords)
+                    # renewed while they wait for a worker
+                    lease_heartbeat.hold(job.keyword_id for job in keywords)
+
+                logging.info(f"Processing {len(jobs)} keywords on the staged pipeline")
+                total_succeeded, total_failed = run_pipeline_jobs(
+                    fair_share_order(jobs, project_weights(job.project_id for job in jobs))
+                )
+            else:
+                # Claim keywords as workers become free, and process them on the worker pool
+                logging.info(f"Processing {len(due_schedules)} schedules with {scheduler_max_workers} workers "
+                             f"({scheduler_max_workers_per_project} per project)")
+                total_succeeded, total_failed = run_keyword_jobs(
+                    due_schedules,
+                    weights=project_weights(schedule.project_id for schedule in due_schedules)
+                )
+            total_processed = total_succeeded + total_failed
             
             logging.info(f"Scheduler run completed. Processed: {total_processed}, "
                         f"Succeeded: {total_succeeded}, Failed: {total_failed}")
     
     except Exception as e:
         logging.exception(f"Error in database scheduler: {e}")
+    finally:
+        # claims the run didn't get to (it failed) - stop renewing them, so they expire and are reclaimed
+        for job in jobs:
+            lease_heartbeat.unregister(job.keyword_id)
 
 
 def get_queue_stats() -> dict:
     """Get current queue statistics"""
     with app.app_context():
-        stats = {
-            'total_projects': Project.query.count(),
-            'active_projects': Project.query.filter_by(status='active').count(),
-            'total_keywords': KeywordQueue.query.count(),
-            'pending_keywords': KeywordQueue.query.filter_by(status='pending').count(),
-            'processing_keywords': KeywordQueue.query.filter_by(status='processing').count(),
-            'completed_keywords': KeywordQueue.query.filter_by(status='completed').count(),
-            'failed_keywords': KeywordQueue.query.filter_by(status='failed').count(),
-            'total_articles': Article.query.count()
-        }
-        
-        # Check for expired processing keywords
-        now = datetime.now(timezone.utc)
-        expired_keywords = KeywordQueue.query.filter(
-            KeywordQueue.status == 'processing',
-            KeywordQueue.lease_until < now
-        ).count()
-        stats['expired_keywords'] = expired_keywords
-        
-        return stats
+        return queue_stats(utcnow())
 
 
-def cleanup_expired_keywords():
-    """Reset expired processing keywords to pending"""
+def _seconds_between(start, end, dialect_name: str):
+    """SQL expression: seconds from start to end"""
+    if dialect_name == 'postgresql':
+        return db.func.extract('epoch', end - start)
+    if dialect_name == 'sqlite':
+        return (db.func.julianday(end) - db.func.julianday(start)) * 86400.0
+    return db.func.timestampdiff(db.text('SECOND'), start, end)  # MySQL
+
+
+def get_fairness_metrics(hours: int = 24) -> dict:
+    """
+    Per-project wait times, to check the fair-share dispatching:
+    - queue: claims in the last `hours` - how long keywords waited from being added to being claimed
+    - backlog: pending keywords now, and the age of the oldest one
+    - dispatch: how long claimed keywords waited for a worker in this process (since it started)
+    plus each project's weight and its share of the claims vs. its share of the weights.
+    """
     with app.app_context():
-        now = datetime.now(timezone.utc)
-        
-        expired_keywords = KeywordQueue.query.filter(
-            KeywordQueue.status == 'processing',
-            KeywordQueue.lease_until < now
-        ).all()
-        
-        for keyword in expired_keywords:
-            keyword.status = 'pending'
-            keyword.processing_by = None
-            keyword.lease_until = None
-            logging.info(f"Reset expired keyword: {keyword.keyword}")
-        
-        if expired_keywords:
-            db.session.commit()
-            logging.info(f"Reset {len(expired_keywords)} expired keywords")
+        now = utcnow()
+        since = now - timedelta(hours=hours)
+        dialect_name = db.session.connection().dialect.name
+        wait_seconds = _seconds_between(KeywordQueue.created_at, KeywordQueue.claimed_at, dialect_name)
+
+        queue_rows = db.session.query(
+            KeywordQueue.project_id,
+            db.func.count(KeywordQueue.id),
+            db.func.avg(wait_seconds),
+            db.func.max(wait_seconds)
+        ).filter(
+            KeywordQueue.claimed_at >= since
+        ).group_by(KeywordQueue.project_id).all()
+
+        backlog_rows = db.session.query(
+            KeywordQueue.project_id,
+            db.func.count(KeywordQueue.id),
+            db.func.min(KeywordQueue.created_at)
+        ).filter(
+            KeywordQueue.status == 'pending'
+        ).group_by(KeywordQueue.project_id).all()
+
+        projects = db.session.query(Project.id, Project.name, Project.daily_keywords_limit).all()
+
+    dispatch = dispatch_wait_stats.snapshot()
+    total_claimed = sum(row[1] for row in queue_rows)
+    total_weight = sum(float(limit or 1) for _, _, limit in projects)
+    queue = {row[0]: row for row in queue_rows}
+    backlog = {row[0]: row for row in backlog_rows}
+
+    metrics = []
+    for project_id, name, limit in projects:
+        weight = float(limit or 1)
+        _, claimed, avg_wait, max_wait = queue.get(project_id, (project_id, 0, None, None))
+        _, pending, oldest_pending = backlog.get(project_id, (project_id, 0, None))
+        oldest_pending = as_utc(oldest_pending)
+        metrics.append({
+            'project_id': project_id,
+            'name': name,
+            'weight': weight,
+            'weight_share': round(weight / total_weight, 4) if total_weight else None,
+            'claimed': claimed,
+            'claimed_share': round(claimed / total_claimed, 4) if total_claimed else None,
+            'avg_queue_wait_seconds': round(float(avg_wait), 1) if avg_wait is not None else None,
+            'max_queue_wait_seconds': round(float(max_wait), 1) if max_wait is not None else None,
+            'pending': pending,
+            'oldest_pending_age_seconds': round((now - oldest_pending).total_seconds(), 1) if oldest_pending else None,
+            'dispatch': dispatch.get(project_id),
+        })
+
+    return {'window_hours': hours, 'projects': metrics}
+
+
+# --- bulk state transitions ---
+# Set-based: one UPDATE per status transition however many keywords it changes, with the
+# project_stats counters moved in the same transaction. Each returns how many keywords changed.
+
+def _bulk_transition(from_status: str, to_status: str, criteria: list, values: Optional[dict] = None,
+                     project_id: Optional[int] = None) -> int:
+    """Move the keywords in from_status matching criteria to to_status (setting values too). Doesn't commit."""
+    where = [KeywordQueue.status == from_status, *criteria]
+    if project_id is not None:
+        where.append(KeywordQueue.project_id == project_id)
+    statement = update(KeywordQueue).where(*where).values(
+        status=to_status, **(values or {})
+    ).execution_options(synchronize_session=False)
+    connection = db.session.connection()
+
+    if project_id is not None:
+        changed = {project_id: db.session.execute(statement).rowcount}
+    elif connection.dialect.update_returning:
+        changed = Counter(db.session.execute(statement.returning(KeywordQueue.project_id)).scalars())
+    else:
+        # counted just before the UPDATE (no RETURNING) - reconcile_project_stats corrects
+        # a concurrent change in between
+        changed = dict(db.session.query(KeywordQueue.project_id, db.func.count(KeywordQueue.id)).filter(
+            *where
+        ).group_by(KeywordQueue.project_id).all())
+        db.session.execute(statement)
+
+    apply_stats_deltas(connection, {
+        changed_project_id: {from_status: -count, to_status: count}
+        for changed_project_id, count in changed.items()
+    })
+    return sum(changed.values())
+
+
+def reset_expired_keywords(project_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Release the keywords whose lease expired (their worker died) back to pending - or to the dead
+    letter state once out of attempts. {'reset': n, 'dead_letter': n}
+    """
+    with app.app_context():
+        expired = [KeywordQueue.lease_until < utcnow()]
+        released = {'processing_by': None, 'lease_until': None}
+
+        # it keeps taking its worker down - don't hand it out again
+        dead_letter = _bulk_transition(
+            'processing', 'dead_letter',
+            expired + [db.func.coalesce(KeywordQueue.attempts, 0) >= keyword_max_attempts],
+            dict(released, error_message='Lease expired on every attempt', error_class=ERROR_TRANSIENT),
+            project_id
+        )
+        reset = _bulk_transition('processing', 'pending', expired, released, project_id)
+        db.session.commit()
+
+    if reset or dead_letter:
+        logging.info(f"Reset {reset} expired keywords, {dead_letter} out of attempts moved to dead letter")
+    return {'reset': reset, 'dead_letter': dead_letter}
+
+
+def retry_failed_keywords(project_id: Optional[int] = None, schedule_id: Optional[int] = None,
+                          error_class: Optional[str] = None) -> int:
+    """
+    Queue failed and dead letter keywords again, with their attempts reset - all of them, or a
+    project's / schedule's, or those whose last failure was of error_class
+    """
+    criteria = []
+    if schedule_id is not None:
+        criteria.append(KeywordQueue.schedule_id == schedule_id)
+    if error_class is not None:
+        criteria.append(KeywordQueue.error_class == error_class)
+    values = {'attempts': 0, 'scheduled_for': None, 'processing_by': None, 'lease_until': None}
+
+    with app.app_context():
+        retried = sum(_bulk_transition(status, 'pending', criteria, values, project_id)
+                      for status in ('failed', 'dead_letter'))
+        db.session.commit()
+
+    logging.info(f"Queued {retried} failed keywords again")
+    return retried
+
+
+def set_keywords_paused(project_id: int, paused: bool, schedule_id: Optional[int] = None) -> int:
+    """Pause a project's (or one of its schedules') pending keywords, or resume its paused ones"""
+    criteria = [KeywordQueue.schedule_id == schedule_id] if schedule_id is not None else []
+    from_status, to_status = ('pending', 'paused') if paused else ('paused', 'pending')
+
+    with app.app_context():
+        changed = _bulk_transition(from_status, to_status, criteria, project_id=project_id)
+        db.session.commit()
+    return changed
+
+
+def set_keywords_priority(project_id: int, priority: int, keyword_ids: Optional[List[int]] = None,
+                          schedule_id: Optional[int] = None, statuses: Optional[List[str]] = None) -> int:
+    """Set the priority of a project's keywords - all, or those with the given ids / schedule / statuses"""
+    where = [KeywordQueue.project_id == project_id]
+    if keyword_ids is not None:
+        where.append(KeywordQueue.id.in_(keyword_ids))
+    if schedule_id is not None:
+        where.append(KeywordQueue.schedule_id == schedule_id)
+    if statuses:
+        where.append(KeywordQueue.status.in_(statuses))
+
+    with app.app_context():
+        changed = db.session.execute(
+            update(KeywordQueue).where(*where).values(priority=priority).execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+    return changed
+
+
+def cleanup_expired_keywords():
+    """Reset expired processing keywords to pending (dead letter once out of attempts)"""
+    reset_expired_keywords()
+
+
+def reconcile_project_stats_job():
+    """Entry point for APScheduler - recounts the per-project counters and corrects any drift"""
+    try:
+        with app.app_context():
+            corrected = reconcile_project_stats()
+        if corrected:
+            logging.warning(f"Corrected the counters of {corrected} projects")
+    except Exception as e:
+        logging.exception(f"Error reconciling project stats: {e}")
+
+
+def archive_finished_keywords_job():
+    """Entry point for APScheduler - moves keywords finished before the retention window to the archive tables"""
+    try:
+        with app.app_context():
+            archive_finished_keywords()
+    except Exception as e:
+        logging.exception(f"Error archiving finished keywords: {e}")
 
 
 # Wrapper function for APScheduler compatibility
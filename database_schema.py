@@ -0,0 +1,49 @@
+"""
+Startup check that the database schema is the one the code expects.
+
+The schema is only changed by the migrations in migrations/ (Flask-Migrate), applied out of
+band before a deploy - `flask --app configs db upgrade` - never by the app or the worker
+starting up. At startup check_schema() reads the alembic_version row, one query, and compares
+it with the head revision of migrations/versions.
+"""
+import logging
+import os
+from typing import Optional
+
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from database_models import db
+
+MIGRATIONS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+
+def head_revision() -> str:
+    """The revision of the newest migration"""
+    return ScriptDirectory(MIGRATIONS_DIRECTORY).get_current_head()
+
+
+def current_revision() -> Optional[str]:
+    """The revision the database was migrated to - None if it isn't under migrations yet"""
+    try:
+        with db.engine.connect() as connection:
+            return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except SQLAlchemyError:
+        # no alembic_version table
+        return None
+
+
+def check_schema() -> bool:
+    """Whether the database is migrated to the head revision - logged if it isn't. In the caller's app context"""
+    current, head = current_revision(), head_revision()
+    if current == head:
+        return True
+
+    if current is None:
+        logging.error("The database isn't under migrations - run `flask --app configs db upgrade` "
+                      "(a database db.create_all() created is upgraded in place)")
+    else:
+        logging.error(f"The database schema is at revision {current}, the code expects {head} - "
+                      f"run `flask --app configs db upgrade`")
+    return False
@@ -0,0 +1,215 @@
+"""
+Queue, project and dashboard statistics.
+
+Every project has a project_stats row of counters - keywords by status, and articles - that
+change in the same transaction as the keywords they count: ORM changes through the session
+hook below, bulk UPDATEs (the claim) through apply_stats_deltas(). The dashboard and project
+listing read the counters, so they cost O(projects) however many keywords are queued.
+reconcile_project_stats() locks the counters, recounts them with grouped aggregate queries
+(status x project) and corrects any drift. Run in the caller's app context.
+
+Archived keywords and articles (database_archive.py) move from the status and article counters
+to the archived_* ones - the stats count both, the listings only what's still in the hot tables.
+
+The per-row counts are also on the models as deferred SQL expressions
+(Project.total_keywords, Project.active_schedules, Schedule.pending_keywords) -
+undefer() them to count in the same query that loads the rows.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from database_models import db, Project, Schedule, KeywordQueue, Article, ProjectStats
+
+KEYWORD_STATUSES = tuple(KeywordQueue.__table__.c.status.type.enums)
+
+# counters of the keywords (by final status) and articles moved to the archive tables (database_archive.py)
+ARCHIVED_COLUMNS = ('archived_completed', 'archived_failed', 'archived_dead_letter', 'archived_articles')
+
+
+# --- grouped counts (the source of truth) ---
+
+def keyword_counts_by_project(project_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, int]]:
+    """{project_id: {status: count}} - one GROUP BY project_id, status"""
+    query = db.session.query(
+        KeywordQueue.project_id,
+        KeywordQueue.status,
+        db.func.count(KeywordQueue.id)
+    ).group_by(KeywordQueue.project_id, KeywordQueue.status)
+    if project_ids is not None:
+        query = query.filter(KeywordQueue.project_id.in_(list(project_ids)))
+
+    counts = defaultdict(dict)
+    for project_id, status, count in query:
+        counts[project_id][status] = count
+    return counts
+
+
+def _counts_by_project(project_column, *criteria, project_ids: Optional[Iterable[int]] = None) -> Dict[int, int]:
+    """{project_id: count of rows} - one GROUP BY project_id"""
+    query = db.session.query(project_column, db.func.count()).filter(*criteria).group_by(project_column)
+    if project_ids is not None:
+        query = query.filter(project_column.in_(list(project_ids)))
+    return dict(query.all())
+
+
+def keyword_status_stats(counts: Dict[str, int]) -> dict:
+    """The keyword part of the stats JSON, from {status: count}"""
+    stats = {'total_keywords': sum(counts.values())}
+    for status in KEYWORD_STATUSES:
+        stats[f'{status}_keywords'] = counts.get(status, 0)
+    return stats
+
+
+# --- counters ---
+
+def apply_stats_deltas(connection, deltas: Dict[int, Dict[str, int]]) -> None:
+    """
+    Add {project_id: {status or 'articles': change}} to the project_stats counters,
+    in the connection's transaction - for changes made with bulk statements
+    """
+    table = ProjectStats.__table__
+    now = datetime.now(timezone.utc)
+    for project_id, changes in deltas.items():
+        values = {column: table.c[column] + change for column, change in changes.items() if change}
+        if project_id is not None and values:
+            connection.execute(
+                table.update().where(table.c.project_id == project_id).values(updated_at=now, **values)
+            )
+
+
+def _status_before_flush(keyword: KeywordQueue) -> Optional[str]:
+    history = inspect(keyword).attrs.status.history
+    return history.deleted[0] if history.deleted else keyword.status
+
+
+@event.listens_for(Session, 'after_flush')
+def _count_flushed_changes(session, flush_context):
+    """Keep the counters in step with the keywords and articles the flush added, changed or deleted"""
+    deltas = defaultdict(lambda: defaultdict(int))
+    new_projects = []
+
+    for obj in session.new:
+        if isinstance(obj, Project):
+            new_projects.append(obj.id)
+        elif isinstance(obj, KeywordQueue):
+            deltas[obj.project_id][obj.status or 'pending'] += 1
+        elif isinstance(obj, Article):
+            deltas[obj.project_id]['articles'] += 1
+
+    for obj in session.dirty:
+        if isinstance(obj, KeywordQueue):
+            before = _status_before_flush(obj)
+            if before != obj.status:
+                deltas[obj.project_id][before] -= 1
+                deltas[obj.project_id][obj.status] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, KeywordQueue):
+            deltas[obj.project_id][_status_before_flush(obj)] -= 1
+        elif isinstance(obj, Article):
+            deltas[obj.project_id]['articles'] -= 1
+
+    if not new_projects and not deltas:
+        return
+
+    connection = session.connection()
+    if new_projects:
+        connection.execute(
+            ProjectStats.__table__.insert(),
+            [{'project_id': project_id, 'updated_at': datetime.now(timezone.utc)} for project_id in new_projects]
+        )
+    apply_stats_deltas(connection, deltas)
+
+
+def reconcile_project_stats() -> int:
+    """
+    Recount every project's counters with grouped queries and correct the ones that drifted
+    (or create missing rows). Returns the number of projects corrected.
+    """
+    now = datetime.now(timezone.utc)
+    # the counter rows are locked before counting: every change to the keywords and articles updates
+    # them in its own transaction, so one committed before the lock is in the counts, and one still
+    # running waits to add its delta on top of the recounted values instead of being overwritten
+    counters = {stats.project_id: stats for stats in ProjectStats.query.order_by(
+        ProjectStats.project_id
+    ).with_for_update().populate_existing()}
+    keywords = keyword_counts_by_project()
+    articles = _counts_by_project(Article.project_id)
+
+    corrected = 0
+    for (project_id,) in db.session.query(Project.id):
+        actual = {status: keywords.get(project_id, {}).get(status, 0) for status in KEYWORD_STATUSES}
+        actual['articles'] = articles.get(project_id, 0)
+
+        stats = counters.get(project_id)
+        if stats is None:
+            stats = ProjectStats(project_id=project_id)
+            db.session.add(stats)
+        stored = {column: getattr(stats, column) for column in actual}
+        if stored != actual:
+            logging.warning(f"Project {project_id} counters drifted: {stored} -> {actual}")
+            for column, value in actual.items():
+                setattr(stats, column, value)
+            stats.updated_at = now
+            corrected += 1
+        stats.reconciled_at = now
+
+    db.session.commit()
+    return corrected
+
+
+def project_counters(project_ids: Optional[Iterable[int]] = None) -> Dict[int, ProjectStats]:
+    """{project_id: ProjectStats} - one query"""
+    query = ProjectStats.query
+    if project_ids is not None:
+        query = query.filter(ProjectStats.project_id.in_(list(project_ids)))
+    return {stats.project_id: stats for stats in query}
+
+
+# --- stats ---
+
+def project_stats(project_ids: Iterable[int]) -> Dict[int, dict]:
+    """
+    {project_id: stats} of the /api/projects listing - keyword counts by status,
+    articles and active schedules - from the counters, plus one grouped query for the schedules
+    """
+    project_ids = list(project_ids)
+    counters = project_counters(project_ids)
+    schedules = _counts_by_project(Schedule.project_id, Schedule.is_active.is_(True), project_ids=project_ids)
+
+    stats = {}
+    for project_id in project_ids:
+        counter = counters.get(project_id)
+        stats[project_id] = {
+            **keyword_status_stats(counter.keyword_counts(archived=True) if counter else {}),
+            'total_articles': counter.articles + counter.archived_articles if counter else 0,
+            'active_schedules': schedules.get(project_id, 0)
+        }
+    return stats
+
+
+def queue_stats(now: datetime) -> dict:
+    """Overall statistics - projects by status, the counters' totals and expired leases"""
+    projects = dict(db.session.query(Project.status, db.func.count(Project.id)).group_by(Project.status).all())
+    columns = KEYWORD_STATUSES + ('articles',) + ARCHIVED_COLUMNS
+    totals = dict(zip(columns, db.session.query(
+        *(db.func.coalesce(db.func.sum(getattr(ProjectStats, column)), 0) for column in columns)
+    ).one()))
+    keywords = {status: totals[status] + totals.get(f'archived_{status}', 0) for status in KEYWORD_STATUSES}
+
+    return {
+        'total_projects': sum(projects.values()),
+        'active_projects': projects.get('active', 0),
+        **keyword_status_stats(keywords),
+        'total_articles': totals['articles'] + totals['archived_articles'],
+        'archived_keywords': sum(totals[column] for column in ARCHIVED_COLUMNS if column != 'archived_articles'),
+        'expired_keywords': KeywordQueue.query.filter(
+            KeywordQueue.status == 'processing',
+            KeywordQueue.lease_until < now
+        ).count()
+    }
@@ -6,30 +6,32 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from flask import render_template
 
 from configs import *
-from database_models import db
+from database_schema import check_schema
 
 from routes.create_article import create_article_bp
 from routes.publish_to_stopdelay_blog import publish_to_stopdelay_blog_bp
 from routes.publish_to_wordpress import publish_to_wordpress_blog_bp
+from routes.image_job_webhook import image_job_webhook_bp
 
 # Import new project management API
 from projects_api import projects_api_bp
 
 # Import both old and new schedulers for backward compatibility
 from modules.scheduler.apscheduler.sheets_keyword_queue_job import keyword_scheduled_job as sheets_scheduler
-from database_scheduler import database_scheduled_job
+from database_scheduler import database_scheduled_job, reconcile_project_stats_job, archive_finished_keywords_job
 
 # Register existing blueprints
 app.register_blueprint(create_article_bp)
 app.register_blueprint(publish_to_stopdelay_blog_bp)
 app.register_blueprint(publish_to_wordpress_blog_bp)
+app.register_blueprint(image_job_webhook_bp)
 
 # Register new project management API
 app.register_blueprint(projects_api_bp)
 
-# Create database tables
+# The schema is migrated out of band (flask --app configs db upgrade) - only check it's current
 with app.app_context():
-    db.create_all()
+    check_schema()
 
 # Dashboard route
 @app.route('/')
@@ -62,16 +64,42 @@ def trigger_scheduler():
 scheduler = BackgroundScheduler(timezone="Asia/Jerusalem")  # or your TZ
 
 # Add the database-based scheduler job to run at midnight every day
-scheduler.add_job(
-    func=database_scheduled_job,
-    trigger='cron',
-    id="daily-database-scheduler",
-    hour=0, minute=0,
-    replace_existing=True,
-    coalesce=True,       # if the server was down at midnight, run once on startup
-    max_instances=1,     # don't overlap if a previous run is still going
-    misfire_grace_time=None  # don't run if we missed midnight
-)
+# (not needed when the keyword worker - worker.py - processes the queue all day)
+if run_daily_database_scheduler:
+    scheduler.add_job(
+        func=database_scheduled_job,
+        trigger='cron',
+        id="daily-database-scheduler",
+        hour=0, minute=0,
+        replace_existing=True,
+        coalesce=True,       # if the server was down at midnight, run once on startup
+        max_instances=1,     # don't overlap if a previous run is still going
+        misfire_grace_time=None  # don't run if we missed midnight
+    )
+
+# Correct any drift of the per-project counters the dashboard reads
+if project_stats_reconcile_minutes > 0:
+    scheduler.add_job(
+        func=reconcile_project_stats_job,
+        trigger='interval',
+        id="project-stats-reconciliation",
+        minutes=project_stats_reconcile_minutes,
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1
+    )
+
+# Move finished keywords past the retention window out of the hot tables
+if archive_interval_minutes > 0:
+    scheduler.add_job(
+        func=archive_finished_keywords_job,
+        trigger='interval',
+        id="keyword-archival",
+        minutes=archive_interval_minutes,
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1
+    )
 
 # Optional: Keep Google Sheets scheduler for backward compatibility
 # Uncomment if you want to run both schedulers
@@ -0,0 +1,102 @@
+"""initial schema
+
+The tables as db.create_all() created them before migrations were added. A database
+created by db.create_all() - before migrations, or by a version in between - is brought
+under migrations with a plain `flask --app configs db upgrade`: the tables it already has
+are left as they are, and the later revisions skip the columns, tables and indexes
+db.create_all() already made. (Stamping it 0001_initial_schema first works too.)
+
+Revision ID: 0001_initial_schema
+Revises: 
+Create Date: 2026-10-19 11:53:47.520746
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_initial_schema'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'projects' not in existing:
+        op.create_table('projects',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('website_url', sa.String(length=255), nullable=False),
+        sa.Column('wordpress_user', sa.String(length=100), nullable=True),
+        sa.Column('wordpress_password', sa.String(length=255), nullable=True),
+        sa.Column('neuron_project_id', sa.String(length=100), nullable=True),
+        sa.Column('default_language', sa.String(length=10), nullable=True),
+        sa.Column('default_engine', sa.String(length=50), nullable=True),
+        sa.Column('daily_keywords_limit', sa.Integer(), nullable=True),
+        sa.Column('status', sa.Enum('active', 'paused', 'inactive', name='project_status'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'schedules' not in existing:
+        op.create_table('schedules',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('daily_limit', sa.Integer(), nullable=True),
+        sa.Column('start_time', sa.Time(), nullable=True),
+        sa.Column('timezone', sa.String(length=50), nullable=True),
+        sa.Column('days_of_week', sa.JSON(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'keywords_queue' not in existing:
+        op.create_table('keywords_queue',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('schedule_id', sa.Integer(), nullable=True),
+        sa.Column('keyword', sa.String(length=255), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('tags_json', sa.JSON(), nullable=True),
+        sa.Column('priority', sa.Integer(), nullable=True),
+        sa.Column('status', sa.Enum('pending', 'processing', 'completed', 'failed', 'paused', name='keyword_status'), nullable=True),
+        sa.Column('processing_by', sa.String(length=100), nullable=True),
+        sa.Column('lease_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('scheduled_for', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+        sa.ForeignKeyConstraint(['schedule_id'], ['schedules.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'articles' not in existing:
+        op.create_table('articles',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('keyword_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=500), nullable=True),
+        sa.Column('content_score', sa.Integer(), nullable=True),
+        sa.Column('wordpress_post_id', sa.Integer(), nullable=True),
+        sa.Column('published_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['keyword_id'], ['keywords_queue.id'], ),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    
+
+def downgrade():
+    op.drop_table('articles')
+    op.drop_table('keywords_queue')
+    op.drop_table('schedules')
+    op.drop_table('projects')
+    # Postgres keeps the enum types after their tables are dropped
+    sa.Enum(name='keyword_status').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='project_status').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,77 @@
+"""keyword claims, checkpoints and retries
+
+- keywords_queue.claimed_at - last claim, counted against the schedule's daily limit
+- keywords_queue.error_class - transient / permanent, of the last failure
+- the 'dead_letter' keyword status
+- keyword_checkpoints - saved stage outputs, so a retried keyword resumes
+
+A database that db.create_all() already gave some of these is upgraded too: existing
+tables and columns are left as they are.
+
+Revision ID: 0002_keyword_claims_checkpoints_retries
+Revises: 0001_initial_schema
+Create Date: 2026-10-19 12:10:02.114388
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_keyword_claims_checkpoints_retries'
+down_revision = '0001_initial_schema'
+branch_labels = None
+depends_on = None
+
+OLD_KEYWORD_STATUS = sa.Enum('pending', 'processing', 'completed', 'failed', 'paused', name='keyword_status')
+NEW_KEYWORD_STATUS = sa.Enum('pending', 'processing', 'completed', 'failed', 'paused', 'dead_letter', name='keyword_status')
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {column['name'] for column in inspector.get_columns('keywords_queue')}
+
+    if 'claimed_at' not in columns:
+        op.add_column('keywords_queue', sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+    if 'error_class' not in columns:
+        op.add_column('keywords_queue', sa.Column('error_class', sa.String(length=20), nullable=True))
+
+    if bind.dialect.name == 'postgresql':
+        # ALTER TYPE ... ADD VALUE can't run inside a transaction before Postgres 12
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE keyword_status ADD VALUE IF NOT EXISTS 'dead_letter'")
+    else:
+        # MySQL's ENUM column, or SQLite's VARCHAR (as long as the longest value)
+        with op.batch_alter_table('keywords_queue') as batch_op:
+            batch_op.alter_column('status', existing_type=OLD_KEYWORD_STATUS,
+                                  type_=NEW_KEYWORD_STATUS, existing_nullable=True)
+
+    if not inspector.has_table('keyword_checkpoints'):
+        op.create_table('keyword_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('keyword_id', sa.Integer(), nullable=False),
+        sa.Column('stage', sa.String(length=50), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['keyword_id'], ['keywords_queue.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('keyword_id', 'stage', name='uq_keyword_checkpoints_keyword_stage')
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    op.drop_table('keyword_checkpoints')
+
+    # dead letters go back to plain failures
+    op.execute("UPDATE keywords_queue SET status = 'failed' WHERE status = 'dead_letter'")
+    with op.batch_alter_table('keywords_queue') as batch_op:
+        if bind.dialect.name != 'postgresql':
+            batch_op.alter_column('status', existing_type=NEW_KEYWORD_STATUS,
+                                  type_=OLD_KEYWORD_STATUS, existing_nullable=True)
+        # Postgres can't drop a value from an enum type - 'dead_letter' stays, unused
+        batch_op.drop_column('error_class')
+        batch_op.drop_column('claimed_at')
@@ -0,0 +1,55 @@
+"""keywords_queue indexes
+
+Composite (and, on Postgres and SQLite, partial) indexes for the keyword queue's hot queries -
+the claim, expired lease cleanup, status counts and the schedules' daily limit. Before them
+every claim scanned the whole table. Postgres builds them CONCURRENTLY, so a large queue keeps
+taking writes while they are built.
+
+Measured with modules/tests/keyword_queue_benchmark.py.
+
+Revision ID: 0003_keywords_queue_indexes
+Revises: 0002_keyword_claims_checkpoints_retries
+Create Date: 2026-10-19 12:31:40.907512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_keywords_queue_indexes'
+down_revision = '0002_keyword_claims_checkpoints_retries'
+branch_labels = None
+depends_on = None
+
+# (name, columns, partial index condition)
+INDEXES = [
+    ('ix_keywords_queue_pending_claim', ['schedule_id', sa.text('priority DESC'), 'created_at'], "status = 'pending'"),
+    ('ix_keywords_queue_processing_lease', ['schedule_id', 'lease_until'], "status = 'processing'"),
+    ('ix_keywords_queue_status_project', ['status', 'project_id'], None),
+    ('ix_keywords_queue_schedule_claimed', ['schedule_id', 'claimed_at'], None),
+]
+
+
+def upgrade():
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    existing = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('keywords_queue')}
+
+    for name, columns, where in INDEXES:
+        if name in existing:
+            # created by db.create_all()
+            continue
+        kwargs = {}
+        if where:
+            kwargs.update(postgresql_where=sa.text(where), sqlite_where=sa.text(where))
+        if postgres:
+            # CREATE INDEX CONCURRENTLY can't run inside a transaction
+            with op.get_context().autocommit_block():
+                op.create_index(name, 'keywords_queue', columns, postgresql_concurrently=True, **kwargs)
+        else:
+            op.create_index(name, 'keywords_queue', columns, **kwargs)
+
+
+def downgrade():
+    for name, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='keywords_queue')
@@ -0,0 +1,65 @@
+"""project_stats counters
+
+Per-project keyword counters by status and article count, kept up to date on every
+status change (database_stats.py) - filled here from the current keywords and articles.
+
+Revision ID: 0004_project_stats
+Revises: 0003_keywords_queue_indexes
+Create Date: 2026-10-19 13:02:17.664020
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_project_stats'
+down_revision = '0003_keywords_queue_indexes'
+branch_labels = None
+depends_on = None
+
+KEYWORD_STATUSES = ('pending', 'processing', 'completed', 'failed', 'paused', 'dead_letter')
+
+
+def upgrade():
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table('project_stats'):
+        # created by db.create_all() - its counters are corrected by the reconciliation job
+        return
+
+    project_stats = op.create_table('project_stats',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('pending', sa.Integer(), nullable=False),
+    sa.Column('processing', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.Column('failed', sa.Integer(), nullable=False),
+    sa.Column('paused', sa.Integer(), nullable=False),
+    sa.Column('dead_letter', sa.Integer(), nullable=False),
+    sa.Column('articles', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('reconciled_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('project_id')
+    )
+
+    # backfill: one grouped count of the keywords and one of the articles
+    keywords = {}
+    for project_id, status, count in bind.execute(sa.text(
+            "SELECT project_id, status, COUNT(*) FROM keywords_queue GROUP BY project_id, status")):
+        keywords.setdefault(project_id, {})[status] = count
+    articles = dict(bind.execute(sa.text("SELECT project_id, COUNT(*) FROM articles GROUP BY project_id")).all())
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    for (project_id,) in bind.execute(sa.text("SELECT id FROM projects")):
+        row = {status: keywords.get(project_id, {}).get(status, 0) for status in KEYWORD_STATUSES}
+        row.update(project_id=project_id, articles=articles.get(project_id, 0), updated_at=now, reconciled_at=now)
+        rows.append(row)
+    if rows:
+        op.bulk_insert(project_stats, rows)
+
+
+def downgrade():
+    op.drop_table('project_stats')
@@ -0,0 +1,79 @@
+"""keyword dedupe by normalized keyword
+
+- keywords_queue.normalized_keyword - NFKC, case-folded, whitespace collapsed
+  (database_models.normalize_keyword), filled in for the existing keywords
+- a unique (project_id, normalized_keyword) index, so a keyword is queued once per project
+  and bulk imports can skip the ones already queued with ON CONFLICT DO NOTHING
+
+Keywords that were queued more than once before this keep their rows, but only the oldest
+one gets a normalized_keyword - NULLs don't collide in the unique index.
+
+Revision ID: 0005_keyword_normalized_dedupe
+Revises: 0004_project_stats
+Create Date: 2026-10-19 14:20:51.301877
+
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_keyword_normalized_dedupe'
+down_revision = '0004_project_stats'
+branch_labels = None
+depends_on = None
+
+INDEX = 'uq_keywords_queue_project_normalized'
+BATCH_SIZE = 1000
+
+
+def normalize_keyword(keyword):
+    # database_models.normalize_keyword as of this revision
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', keyword)).strip().casefold()[:255]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {column['name'] for column in inspector.get_columns('keywords_queue')}
+    if INDEX in {index['name'] for index in inspector.get_indexes('keywords_queue')}:
+        # created by db.create_all()
+        return
+
+    if 'normalized_keyword' not in columns:
+        op.add_column('keywords_queue', sa.Column('normalized_keyword', sa.String(length=255), nullable=True))
+
+    # backfill, oldest keyword first - later duplicates stay NULL
+    seen = set()
+    updates = []
+    duplicates = 0
+    rows = bind.execute(sa.text("SELECT id, project_id, keyword FROM keywords_queue ORDER BY id")).all()
+    for keyword_id, project_id, keyword in rows:
+        normalized = normalize_keyword(keyword or '')
+        if not normalized or (project_id, normalized) in seen:
+            duplicates += 1
+            continue
+        seen.add((project_id, normalized))
+        updates.append({'id': keyword_id, 'normalized': normalized})
+    update = sa.text("UPDATE keywords_queue SET normalized_keyword = :normalized WHERE id = :id")
+    for start in range(0, len(updates), BATCH_SIZE):
+        bind.execute(update, updates[start:start + BATCH_SIZE])
+    if duplicates:
+        print(f"{duplicates} keywords already queued in their project (or empty) were left without a normalized_keyword")
+
+    if bind.dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY can't run inside a transaction
+        with op.get_context().autocommit_block():
+            op.create_index(INDEX, 'keywords_queue', ['project_id', 'normalized_keyword'],
+                            unique=True, postgresql_concurrently=True)
+    else:
+        op.create_index(INDEX, 'keywords_queue', ['project_id', 'normalized_keyword'], unique=True)
+
+
+def downgrade():
+    op.drop_index(INDEX, table_name='keywords_queue')
+    with op.batch_alter_table('keywords_queue') as batch_op:
+        batch_op.drop_column('normalized_keyword')
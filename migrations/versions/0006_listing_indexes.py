@@ -0,0 +1,50 @@
+"""keyword and article listing indexes
+
+(project_id, created_at, id) indexes for the keyset-paginated keyword and article listings
+(database_pagination.py) - each page is a range scan of the project's part of the index -
+and (project_id, status, created_at, id) for the keyword listing filtered by status.
+Postgres builds them CONCURRENTLY.
+
+Revision ID: 0006_listing_indexes
+Revises: 0005_keyword_normalized_dedupe
+Create Date: 2026-10-19 15:08:33.520147
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_listing_indexes'
+down_revision = '0005_keyword_normalized_dedupe'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns)
+INDEXES = [
+    ('ix_keywords_queue_project_created', 'keywords_queue', ['project_id', 'created_at', 'id']),
+    ('ix_keywords_queue_project_status_created', 'keywords_queue', ['project_id', 'status', 'created_at', 'id']),
+    ('ix_articles_project_created', 'articles', ['project_id', 'created_at', 'id']),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    postgres = bind.dialect.name == 'postgresql'
+
+    for name, table, columns in INDEXES:
+        if name in {index['name'] for index in inspector.get_indexes(table)}:
+            # created by db.create_all()
+            continue
+        if postgres:
+            # CREATE INDEX CONCURRENTLY can't run inside a transaction
+            with op.get_context().autocommit_block():
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+        else:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
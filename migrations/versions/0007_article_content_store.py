@@ -0,0 +1,72 @@
+"""article content store
+
+- content_blobs - zlib-compressed article HTML, stored once per distinct content and keyed
+  by its SHA-256 (database_content.py)
+- article_revisions - the draft, optimized, media and published versions of a keyword's article
+- articles.meta_description and articles.content_hash - the published article, so it can be
+  republished without generating it again
+
+Revision ID: 0007_article_content_store
+Revises: 0006_listing_indexes
+Create Date: 2026-10-19 16:02:44.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_article_content_store'
+down_revision = '0006_listing_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('content_blobs'):
+        op.create_table('content_blobs',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('encoding', sa.String(length=10), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('hash')
+        )
+
+    if not inspector.has_table('article_revisions'):
+        op.create_table('article_revisions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('keyword_id', sa.Integer(), nullable=False),
+        sa.Column('stage', sa.String(length=50), nullable=False),
+        sa.Column('title', sa.String(length=500), nullable=True),
+        sa.Column('meta_description', sa.Text(), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('content_score', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['content_hash'], ['content_blobs.hash'], ),
+        sa.ForeignKeyConstraint(['keyword_id'], ['keywords_queue.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_article_revisions_keyword_created', 'article_revisions', ['keyword_id', 'created_at'])
+
+    columns = {column['name'] for column in inspector.get_columns('articles')}
+    if 'content_hash' not in columns:
+        # batch: SQLite can't add a foreign key to an existing table
+        with op.batch_alter_table('articles') as batch_op:
+            if 'meta_description' not in columns:
+                batch_op.add_column(sa.Column('meta_description', sa.Text(), nullable=True))
+            batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+            batch_op.create_foreign_key('fk_articles_content_hash', 'content_blobs', ['content_hash'], ['hash'])
+
+
+def downgrade():
+    with op.batch_alter_table('articles') as batch_op:
+        batch_op.drop_constraint('fk_articles_content_hash', type_='foreignkey')
+        batch_op.drop_column('content_hash')
+        batch_op.drop_column('meta_description')
+
+    op.drop_index('ix_article_revisions_keyword_created', table_name='article_revisions')
+    op.drop_table('article_revisions')
+    op.drop_table('content_blobs')
@@ -0,0 +1,124 @@
+"""keyword archive
+
+- keywords_queue_archive, articles_archive, article_revisions_archive - finished keywords,
+  their articles and revisions, moved out of the hot tables after the retention window
+  (database_archive.py). Partitioned by month of finished_at on Postgres - the partitions
+  are created by the archiver, as months are archived.
+- project_stats.archived_* - counters of the archived keywords (by final status) and articles
+- ix_articles_keyword - a keyword's article, looked up by every completion and archived batch
+
+Revision ID: 0008_keyword_archive
+Revises: 0007_article_content_store
+Create Date: 2026-10-19 19:41:05.230417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_keyword_archive'
+down_revision = '0007_article_content_store'
+branch_labels = None
+depends_on = None
+
+ARCHIVED_COUNTERS = ('archived_completed', 'archived_failed', 'archived_dead_letter', 'archived_articles')
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('keywords_queue_archive'):
+        op.create_table('keywords_queue_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('schedule_id', sa.Integer(), nullable=True),
+        sa.Column('keyword', sa.String(length=255), nullable=False),
+        sa.Column('normalized_keyword', sa.String(length=255), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('tags_json', sa.JSON(), nullable=True),
+        sa.Column('priority', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('scheduled_for', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('error_class', sa.String(length=20), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id', 'finished_at'),
+        postgresql_partition_by='RANGE (finished_at)'
+        )
+        op.create_index('ix_keywords_queue_archive_project_created', 'keywords_queue_archive',
+                        ['project_id', 'created_at', 'id'])
+        op.create_index('ix_keywords_queue_archive_project_finished', 'keywords_queue_archive',
+                        ['project_id', 'finished_at'])
+        op.create_index('ix_keywords_queue_archive_project_normalized', 'keywords_queue_archive',
+                        ['project_id', 'normalized_keyword'])
+
+    if not inspector.has_table('articles_archive'):
+        op.create_table('articles_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('keyword_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=500), nullable=True),
+        sa.Column('meta_description', sa.Text(), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('content_score', sa.Integer(), nullable=True),
+        sa.Column('wordpress_post_id', sa.Integer(), nullable=True),
+        sa.Column('published_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id', 'finished_at'),
+        postgresql_partition_by='RANGE (finished_at)'
+        )
+        op.create_index('ix_articles_archive_project_created', 'articles_archive', ['project_id', 'created_at', 'id'])
+
+    if not inspector.has_table('article_revisions_archive'):
+        op.create_table('article_revisions_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('keyword_id', sa.Integer(), nullable=False),
+        sa.Column('stage', sa.String(length=50), nullable=False),
+        sa.Column('title', sa.String(length=500), nullable=True),
+        sa.Column('meta_description', sa.Text(), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('content_score', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id', 'finished_at'),
+        postgresql_partition_by='RANGE (finished_at)'
+        )
+        op.create_index('ix_article_revisions_archive_keyword_created', 'article_revisions_archive',
+                        ['keyword_id', 'created_at'])
+
+    if 'ix_articles_keyword' not in {index['name'] for index in inspector.get_indexes('articles')}:
+        op.create_index('ix_articles_keyword', 'articles', ['keyword_id'])
+
+    columns = {column['name'] for column in inspector.get_columns('project_stats')}
+    with op.batch_alter_table('project_stats') as batch_op:
+        for counter in ARCHIVED_COUNTERS:
+            if counter not in columns:
+                # nothing is archived yet
+                batch_op.add_column(sa.Column(counter, sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('project_stats') as batch_op:
+        for counter in reversed(ARCHIVED_COUNTERS):
+            batch_op.drop_column(counter)
+
+    op.drop_index('ix_articles_keyword', table_name='articles')
+
+    # the archived keywords are lost - move them back to keywords_queue first if they're needed
+    op.drop_index('ix_article_revisions_archive_keyword_created', table_name='article_revisions_archive')
+    op.drop_table('article_revisions_archive')
+    op.drop_index('ix_articles_archive_project_created', table_name='articles_archive')
+    op.drop_table('articles_archive')
+    op.drop_index('ix_keywords_queue_archive_project_normalized', table_name='keywords_queue_archive')
+    op.drop_index('ix_keywords_queue_archive_project_finished', table_name='keywords_queue_archive')
+    op.drop_index('ix_keywords_queue_archive_project_created', table_name='keywords_queue_archive')
+    op.drop_table('keywords_queue_archive')
@@ -0,0 +1,99 @@
+"""
+Cold start benchmark of the Vercel app (api/index.py): how long importing it takes and how many
+database statements and connections it makes before serving its first request.
+
+    python -m modules.tests.cold_start_benchmark
+    python -m modules.tests.cold_start_benchmark --app /path/to/older/checkout/api/index.py
+
+Every run imports the app in a fresh interpreter, like a new serverless instance. The database is
+BENCHMARK_DATABASE_URL, or an SQLite file in the temp directory, migrated first (api/manage.py) when
+the app has migrations. Every statement can be delayed by --latency-ms, for the round-trip to a
+remote database that SQLite doesn't have.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATABASE_URL = os.getenv(
+    'BENCHMARK_DATABASE_URL',
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'cold_start_benchmark.db')}"
+)
+
+# run in the fresh interpreter: counts the statements and new connections while importing the app
+PROBE = '''
+import importlib.util, json, sys, time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+app_path, latency = sys.argv[1], float(sys.argv[2]) / 1000
+counts = {'statements': 0, 'connections': 0}
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_statement(*args):
+    counts['statements'] += 1
+    time.sleep(latency)
+
+@event.listens_for(Pool, 'connect')
+def count_connection(*args):
+    counts['connections'] += 1
+    time.sleep(latency)
+
+started = time.perf_counter()
+spec = importlib.util.spec_from_file_location('cold_start_app', app_path)
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+counts['seconds'] = time.perf_counter() - started
+print('COLD_START ' + json.dumps(counts))
+'''
+
+
+def prepare_database(app_path: str) -> None:
+    """Migrate the scratch database, if the app has migrations"""
+    manage = os.path.join(os.path.dirname(app_path), 'manage.py')
+    if not os.path.exists(manage):
+        # older checkouts create their tables on startup
+        return
+    subprocess.run([sys.executable, '-m', 'flask', '--app', manage, 'db', 'upgrade'],
+                   env=dict(os.environ, POSTGRES_URL=DATABASE_URL), cwd=os.path.dirname(os.path.dirname(app_path)),
+                   check=True, capture_output=True)
+
+
+def cold_start(app_path: str, latency_ms: float) -> dict:
+    result = subprocess.run([sys.executable, '-c', PROBE, app_path, str(latency_ms)],
+                            env=dict(os.environ, POSTGRES_URL=DATABASE_URL),
+                            cwd=os.path.dirname(os.path.dirname(app_path)),
+                            check=True, capture_output=True, text=True)
+    for line in result.stdout.splitlines():
+        if line.startswith('COLD_START '):
+            return json.loads(line[len('COLD_START '):])
+    raise RuntimeError(f"No result from the cold start:\n{result.stdout}\n{result.stderr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app', default=os.path.join(ROOT, 'api', 'index.py'), help="the app module to import")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="delay of every statement and new connection")
+    args = parser.parse_args()
+    app_path = os.path.abspath(args.app)
+
+    prepare_database(app_path)
+    runs = [cold_start(app_path, args.latency_ms) for _ in range(args.runs)]
+
+    seconds = [run['seconds'] for run in runs]
+    print(f"{app_path} ({args.runs} cold starts, {args.latency_ms:g}ms per round-trip)")
+    print(f"  statements:  {runs[-1]['statements']}")
+    print(f"  connections: {runs[-1]['connections']}")
+    print(f"  import:      median {statistics.median(seconds) * 1000:.0f}ms, "
+          f"min {min(seconds) * 1000:.0f}ms, max {max(seconds) * 1000:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark of the keyword queue's hot queries, without and with the keywords_queue indexes
+(migrations/versions/0003_keywords_queue_indexes.py):
+
+    python -m modules.tests.keyword_queue_benchmark
+
+Seeds KEYWORD_BENCHMARK_ROWS keywords (default 300,000) into a scratch database -
+BENCHMARK_DATABASE_URL, or an SQLite file in the temp directory - then times the claim,
+expired lease cleanup, schedule claim counting and get_queue_stats, drops the indexes
+and times them again.
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+# never the real queue - the benchmark drops and recreates every table
+os.environ['DATABASE_URL'] = os.getenv(
+    'BENCHMARK_DATABASE_URL',
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'keyword_queue_benchmark.db')}"
+)
+
+from sqlalchemy import insert, update
+
+from configs import app
+from database_models import db, Project, Schedule, KeywordQueue
+from database_stats import reconcile_project_stats
+from database_scheduler import (
+    claim_keywords_for_schedule,
+    cleanup_expired_keywords,
+    get_queue_stats,
+    schedule_claims_since,
+)
+
+ROWS = int(os.getenv('KEYWORD_BENCHMARK_ROWS', '300000'))
+PROJECTS = 20
+REPEAT = 20
+
+# share of the queue in each status - most of a long-lived queue is done
+STATUS_WEIGHTS = {'completed': 80, 'pending': 14, 'failed': 2, 'dead_letter': 1, 'processing': 1, 'paused': 2}
+
+
+def seed():
+    """Recreate the tables and fill them with ROWS keywords, spread over PROJECTS projects"""
+    random.seed(1)
+    now = datetime.now(timezone.utc)
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        schedules = []
+        for i in range(PROJECTS):
+            project = Project(name=f"benchmark {i}", website_url=f"https://benchmark-{i}.example.com",
+                              wordpress_user='benchmark', wordpress_password='benchmark')
+            db.session.add(project)
+            db.session.flush()
+            schedule = Schedule(project_id=project.id, name=f"benchmark {i}", daily_limit=10)
+            db.session.add(schedule)
+            db.session.flush()
+            schedules.append(schedule)
+        db.session.commit()
+
+        rows = []
+        for i in range(ROWS):
+            schedule = schedules[i % PROJECTS]
+            status = random.choices(statuses, weights)[0]
+            created_at = now - timedelta(minutes=random.randint(0, 60 * 24 * 365))
+            claimed = status in ('processing', 'completed', 'failed', 'dead_letter')
+            rows.append({
+                'project_id': schedule.project_id,
+                'schedule_id': schedule.id,
+                'keyword': f"benchmark keyword {i}",
+                'priority': random.choice((1, 1, 1, 2, 3)),
+                'status': status,
+                'created_at': created_at,
+                'claimed_at': created_at + timedelta(hours=1) if claimed else None,
+                # a few of the in-flight keywords have an expired lease
+                'lease_until': now + timedelta(minutes=random.choice((-5, 5, 5, 5))) if status == 'processing' else None,
+                'processing_by': 'benchmark' if status == 'processing' else None,
+                'attempts': 1 if claimed else 0,
+            })
+            if len(rows) == 10000:
+                db.session.execute(insert(KeywordQueue), rows)
+                rows = []
+        if rows:
+            db.session.execute(insert(KeywordQueue), rows)
+        db.session.commit()
+
+        # the bulk insert bypassed the project_stats counters
+        reconcile_project_stats()
+        return [schedule.id for schedule in schedules]
+
+
+def set_indexes(enabled: bool):
+    with app.app_context():
+        with db.engine.begin() as connection:
+            for index in KeywordQueue.__table__.indexes:
+                index.drop(connection, checkfirst=True)
+                if enabled:
+                    index.create(connection)
+            if connection.dialect.name in ('sqlite', 'postgresql'):
+                connection.exec_driver_sql('ANALYZE')
+
+
+def timed(fn, after=None) -> float:
+    """Median milliseconds of fn over REPEAT runs - after(result), untimed, runs after each one"""
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+        if after:
+            after(result)
+    return statistics.median(timings)
+
+
+def measure(schedule_ids) -> dict:
+    since = datetime.now(timezone.utc) - timedelta(hours=24)
+    schedule_ids = iter(schedule_ids * REPEAT)
+
+    def claim():
+        with app.app_context():
+            schedule = db.session.get(Schedule, next(schedule_ids))
+            return claim_keywords_for_schedule(schedule, 5)
+
+    def unclaim(jobs):
+        # back to pending, so every run claims from the same queue
+        with app.app_context():
+            db.session.execute(
+                update(KeywordQueue)
+                .where(KeywordQueue.id.in_([job.keyword_id for job in jobs]))
+                .values(status='pending', processing_by=None, lease_until=None, claimed_at=None),
+                execution_options={"synchronize_session": False}
+            )
+            db.session.commit()
+
+    def claims_since():
+        with app.app_context():
+            schedule_claims_since(next(schedule_ids), since)
+
+    return {
+        'claim 5 keywords': timed(claim, unclaim),
+        'cleanup expired leases': timed(cleanup_expired_keywords),
+        'schedule claims (24h)': timed(claims_since),
+        'queue stats': timed(get_queue_stats),
+    }
+
+
+def tests():
+    print(f"Seeding {ROWS:,} keywords into {os.environ['DATABASE_URL']}")
+    schedule_ids = seed()
+
+    set_indexes(False)
+    before = measure(schedule_ids)
+    set_indexes(True)
+    after = measure(schedule_ids)
+
+    print(f"\n{'query':<28}{'no indexes':>14}{'indexes':>12}{'speedup':>10}")
+    for name in before:
+        print(f"{name:<28}{before[name]:>11.2f} ms{after[name]:>9.2f} ms{before[name] / after[name]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    tests()
@@ -0,0 +1,228 @@
+"""
+A local stand-in for the WordPress REST API, for exercising the publishing
+code without a real site. Implements just the routes we use:
+
+    POST    /wp-json/wp/v2/media            upload
+    POST    /wp-json/wp/v2/media/<id>       alt/title update
+    GET     /wp-json/wp/v2/users/me         authenticated user
+    GET     /wp-json/wp/v2/posts            list (slug filter)
+    POST    /wp-json/wp/v2/posts            create
+    POST    /wp-json/wp/v2/posts/<id>       update
+
+Every request is recorded in .requests_log as (method, path).
+"""
+import json
+import re
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+
+class StandInWordPress:
+
+    # the WordPress user every request is authenticated as
+    USER_ID = 1
+
+    def __init__(self, registered_meta: tuple = ("ai_content_maker_idempotency_key",)):
+        # meta keys registered with show_in_rest - other meta is dropped, like WordPress does
+        self.registered_meta = registered_meta
+        self.media = {}
+        self.posts = {}
+        self.requests_log = []
+        self._next_id = 100
+        self._lock = threading.Lock()
+        self._server = None
+
+    # ---------- lifecycle ----------
+
+    def start(self) -> str:
+        """Start serving on a free local port. Returns the site URL."""
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                url = urlsplit(self.path)
+                stand_in.requests_log.append((method, url.path))
+
+                if not self.headers.get("Authorization", "").startswith("Basic "):
+                    status, body = 401, {"code": "rest_not_logged_in"}
+                else:
+                    status, body = stand_in.dispatch(
+                        method, url.path, parse_qs(url.query), raw, self.headers
+                    )
+
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def count(self, method: str, path_pattern: str) -> int:
+        return len([1 for m, p in self.requests_log if m == method and re.fullmatch(path_pattern, p)])
+
+    # ---------- routing ----------
+
+    def _new_id(self) -> int:
+        with self._lock:
+            self._next_id += 1
+            return self._next_id
+
+    def dispatch(self, method, path, query, raw, headers):
+        route = path[len("/wp-json"):] if path.startswith("/wp-json") else path
+
+        body = {}
+        if raw and headers.get("Content-Type", "").startswith("application/json"):
+            body = json.loads(raw)
+        return self._route(method, route, query, body, raw, headers)
+
+    def _route(self, method, route, query, body, raw=b"", headers=None):
+        m = re.fullmatch(r"/wp/v2/media/(\d+)", route)
+        if route == "/wp/v2/media" and method == "POST":
+            media_id = self._new_id()
+            disposition = (headers or {}).get("Content-Disposition", "")
+            self.media[media_id] = {
+                "id": media_id,
+                "source_url": f"https://example.com/uploads/{media_id}.png",
+                "size": len(raw),
+                "disposition": disposition,
+            }
+            return 201, self.media[media_id]
+        if m and method == "POST":
+            media = self.media.get(int(m.group(1)))
+            if media is None:
+                return 404, {"code": "rest_post_invalid_id"}
+            media.update(body)
+            return 200, media
+
+        if route == "/wp/v2/users/me" and method == "GET":
+            return 200, {"id": self.USER_ID, "name": "stand-in"}
+
+        m = re.fullmatch(r"/wp/v2/posts/(\d+)", route)
+        if route == "/wp/v2/posts" and method == "GET":
+            posts = list(self.posts.values())
+            if "slug" in query:
+                posts = [p for p in posts if p.get("slug") == query["slug"][0]]
+            return 200, posts
+        if route == "/wp/v2/posts" and method == "POST":
+            post_id = self._new_id()
+            self.posts[post_id] = {
+                "id": post_id,
+                "author": self.USER_ID,
+                "link": f"https://example.com/?p={post_id}",
+                "meta": {k: "" for k in self.registered_meta},
+            }
+            self._update_post(self.posts[post_id], body)
+            return 201, self.posts[post_id]
+        if m and method == "POST":
+            post = self.posts.get(int(m.group(1)))
+            if post is None:
+                return 404, {"code": "rest_post_invalid_id"}
+            self._update_post(post, body)
+            return 200, post
+
+        return 404, {"code": "rest_no_route"}
+
+    def _update_post(self, post, body):
+        body = dict(body)
+        meta = body.pop("meta", {}) or {}
+        post.update(body)
+        post["meta"].update({k: v for k, v in meta.items() if k in self.registered_meta})
+
+
+def _publish_three_images(site):
+    # imported here so the stand-in server itself has no dependency on configs
+    from modules.third_party_modules.wordpress.wordpress_general import wp_upload_media_bytes
+    from modules.third_party_modules.wordpress.wordpress_client import get_wordpress_client
+
+    updates = []
+    for i in range(3):
+        media = wp_upload_media_bytes(site, "user", "app-pass", b"\x89PNG...", f"image-{i}.png")
+        updates.append({"media_id": media["id"], "alt_text": f"alt {i}", "title": f"title {i}"})
+
+    payload = {"title": "Stand-in post", "content": "<p>hi</p>", "status": "publish",
+               "featured_media": updates[-1]["media_id"]}
+    return get_wordpress_client(site, "user", "app-pass").publish_post(payload, updates)
+
+
+def tests():
+
+    # 1) meta updates as individual requests before the post, then one post creation
+    stand_in = StandInWordPress()
+    site = stand_in.start()
+    try:
+        post = _publish_three_images(site)
+        assert post["title"] == "Stand-in post"
+        assert stand_in.count("POST", r"/wp-json/wp/v2/media/\d+") == 3
+        assert stand_in.count("POST", r"/wp-json/wp/v2/posts") == 1
+        assert all(m.get("alt_text") for m in stand_in.media.values())
+        assert not any(p.startswith("/wp-json/batch/") for _, p in stand_in.requests_log)
+        print(f"publishing OK: {stand_in.requests_log}")
+    finally:
+        stand_in.stop()
+
+    # 2) idempotent publishing: a retry finds its post by slug and updates it in place
+    from modules.third_party_modules.wordpress.wordpress_general import (
+        wordpress_post_slug,
+        publishing_idempotency_key,
+        find_existing_post,
+        _build_post_payload,
+        IDEMPOTENCY_META_KEY,
+    )
+    from modules.third_party_modules.wordpress.wordpress_client import get_wordpress_client
+
+    for registered_meta in (("ai_content_maker_idempotency_key",), ()):
+        stand_in = StandInWordPress(registered_meta=registered_meta)
+        site = stand_in.start()
+        try:
+            client = get_wordpress_client(site, "user", "app-pass")
+            slug = wordpress_post_slug("Best Coffee in Tel Aviv")
+            assert find_existing_post(site, "user", "app-pass", slug, 42) is None
+
+            key_v1 = publishing_idempotency_key(42, "Title", "<p>v1</p>")
+            client.publish_post(_build_post_payload("Title", "<p>v1</p>", slug=slug, idempotency_key=key_v1))
+
+            existing = find_existing_post(site, "user", "app-pass", slug, 42)
+            assert existing is not None
+            if registered_meta:
+                assert existing["meta"][IDEMPOTENCY_META_KEY] == key_v1
+                # another keyword with the same slug is not a match
+                assert find_existing_post(site, "user", "app-pass", slug, 43) is None
+
+            key_v2 = publishing_idempotency_key(42, "Title", "<p>v2</p>")
+            assert key_v2 != key_v1
+            client.publish_post(
+                _build_post_payload("Title", "<p>v2</p>", slug=slug, idempotency_key=key_v2),
+                post_id=existing["id"]
+            )
+            assert len(stand_in.posts) == 1
+            assert stand_in.posts[existing["id"]]["content"] == "<p>v2</p>"
+            print(f"idempotent publishing OK (registered meta: {bool(registered_meta)})")
+        finally:
+            stand_in.stop()
+
+
+if __name__ == "__main__":
+    tests()
@@ -0,0 +1,290 @@
+"""
+Shared asynchronous tracker for long-running image generation jobs
+(imagineapi.dev, Midjourney-style APIs).
+
+Instead of every caller sleeping in its own thread between status checks,
+jobs are registered with one ImageJobPoller. A single asyncio task polls all
+outstanding job IDs, backs off per job while its status does not change, and
+resolves the waiting futures when a job completes, fails or times out.
+Providers that support webhooks can push status updates with notify(),
+which resolves the job without waiting for the next poll.
+"""
+import asyncio
+import concurrent.futures
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+JOB_PENDING = "pending"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# webhook payloads kept for jobs that are not tracked (yet)
+MAX_EARLY_PAYLOADS = 500
+
+
+class ImageJobFailed(Exception):
+    """Raised (through the job future) when the provider reports a failed job."""
+
+    def __init__(self, job_id: str, payload: Dict[str, Any]):
+        super().__init__(f"Image generation failed for ID={job_id}.")
+        self.job_id = job_id
+        self.payload = payload
+
+
+@dataclass
+class _TrackedJob:
+    job_id: str
+    future: concurrent.futures.Future
+    deadline: float
+    min_interval: float
+    interval: float
+    next_poll_at: float
+    last_status: Optional[str] = None
+    polling: bool = False
+
+
+class ImageJobPoller:
+    """
+    Tracks image jobs on a dedicated background event loop.
+
+    :param fetch_status: blocking callable(job_id) -> provider status payload.
+                         It runs in the loop's thread pool, never on the loop itself.
+    :param classify_status: callable(payload) -> (state, status_label) where state is
+                            JOB_PENDING, JOB_COMPLETED or JOB_FAILED.
+    :param min_interval: first/shortest delay (seconds) between two polls of one job.
+    :param max_interval: longest delay (seconds) between two polls of one job.
+    :param backoff_factor: interval multiplier applied while a job's status is unchanged.
+    :param timeout: default seconds before a tracked job fails with TimeoutError.
+    :param max_concurrent_polls: cap on status requests in flight at the same time.
+    """
+
+    def __init__(
+        self,
+        fetch_status: Callable[[str], Dict[str, Any]],
+        classify_status: Callable[[Dict[str, Any]], tuple],
+        min_interval: float = 2.0,
+        max_interval: float = 30.0,
+        backoff_factor: float = 1.5,
+        timeout: float = 1200.0,
+        max_concurrent_polls: int = 8,
+    ):
+        self.fetch_status = fetch_status
+        self.classify_status = classify_status
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.max_concurrent_polls = max_concurrent_polls
+
+        self._jobs: Dict[str, _TrackedJob] = {}
+        # webhook payloads that arrived before the job was registered
+        self._early_payloads: Dict[str, Dict[str, Any]] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._poll_slots: Optional[asyncio.Semaphore] = None
+        self._start_lock = threading.Lock()
+
+    # ---------- Loop lifecycle ----------
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is not None:
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._wakeup = asyncio.Event()
+                self._poll_slots = asyncio.Semaphore(self.max_concurrent_polls)
+                loop.create_task(self._poll_loop())
+                started.set()
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name="image-job-poller", daemon=True)
+            self._thread.start()
+            started.wait()
+            self._loop = loop
+            return loop
+
+    def close(self) -> None:
+        """Stop the background loop. Outstanding jobs are cancelled."""
+        with self._start_lock:
+            loop = self._loop
+            if loop is None:
+                return
+            self._loop = None
+
+        def stop():
+            for job in list(self._jobs.values()):
+                job.future.cancel()
+            self._jobs.clear()
+            loop.stop()
+
+        loop.call_soon_threadsafe(stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    # ---------- Public API ----------
+
+    def track(self, job_id: str, timeout: Optional[float] = None,
+              min_interval: Optional[float] = None) -> concurrent.futures.Future:
+        """
+        Start tracking an already submitted job. Thread-safe.
+        Returns a concurrent.futures.Future resolved with the final status payload.
+        """
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        loop = self._ensure_started()
+        loop.call_soon_threadsafe(
+            self._register, str(job_id), future,
+            self.timeout if timeout is None else timeout,
+            self.min_interval if min_interval is None else min_interval,
+        )
+        return future
+
+    def submit(self, submit_job: Callable[..., str], *args,
+               timeout: Optional[float] = None) -> concurrent.futures.Future:
+        """
+        Call submit_job(*args) (which must return the provider job ID) and track the job.
+        A failed submission raises submit_job's exception here, synchronously - only the
+        job itself (failure, timeout) is reported through the returned future.
+        """
+        job_id = submit_job(*args)
+        return self.track(job_id, timeout=timeout)
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Awaitable variant of track(), usable from any event loop."""
+        return await asyncio.wrap_future(self.track(job_id, timeout=timeout))
+
+    def wait_sync(self, job_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Blocking variant of track() for thread-based callers."""
+        return self.track(job_id, timeout=timeout).result()
+
+    def notify(self, job_id: str, payload: Dict[str, Any]) -> None:
+        """Push a status payload (e.g. from a webhook). Thread-safe."""
+        loop = self._ensure_started()
+        loop.call_soon_threadsafe(self._handle_payload, str(job_id), payload, True)
+
+    def outstanding(self) -> int:
+        return len(self._jobs)
+
+    # ---------- Loop internals (run on the poller thread only) ----------
+
+    def _register(self, job_id, future, timeout, min_interval) -> None:
+        now = time.monotonic()
+        existing = self._jobs.get(job_id)
+        if existing is not None:
+            # Several callers waiting on the same job share one poll schedule
+            existing.future.add_done_callback(lambda f: _copy_future(f, future))
+            return
+
+        self._jobs[job_id] = _TrackedJob(
+            job_id=job_id,
+            future=future,
+            deadline=now + timeout,
+            min_interval=min_interval,
+            interval=min_interval,
+            next_poll_at=now + min_interval,
+        )
+        early = self._early_payloads.pop(job_id, None)
+        if early is not None:
+            self._handle_payload(job_id, early, True)
+        self._wakeup.set()
+
+    def _handle_payload(self, job_id: str, payload: Dict[str, Any], pushed: bool = False) -> None:
+        job = self._jobs.get(job_id)
+        if job is None:
+            if pushed:
+                self._early_payloads[job_id] = payload
+                if len(self._early_payloads) > MAX_EARLY_PAYLOADS:
+                    self._early_payloads.pop(next(iter(self._early_payloads)))
+            return
+
+        try:
+            state, status_label = self.classify_status(payload)
+        except Exception as e:
+            self._finish(job, exception=e)
+            return
+
+        if state == JOB_COMPLETED:
+            self._finish(job, result=payload)
+        elif state == JOB_FAILED:
+            self._finish(job, exception=ImageJobFailed(job_id, payload))
+        else:
+            # adaptive interval: back off while nothing changes, reset on progress
+            if status_label != job.last_status:
+                job.interval = job.min_interval
+            else:
+                job.interval = min(job.interval * self.backoff_factor, self.max_interval)
+            job.last_status = status_label
+            job.next_poll_at = time.monotonic() + job.interval
+
+    def _finish(self, job: _TrackedJob, result=None, exception=None) -> None:
+        self._jobs.pop(job.job_id, None)
+        if job.future.done():
+            return
+        if exception is not None:
+            job.future.set_exception(exception)
+        else:
+            job.future.set_result(result)
+
+    async def _poll_one(self, job: _TrackedJob) -> None:
+        try:
+            async with self._poll_slots:
+                payload = await asyncio.get_running_loop().run_in_executor(
+                    None, self.fetch_status, job.job_id
+                )
+            self._handle_payload(job.job_id, payload)
+        except Exception as e:
+            # transient fetch errors just count as "no change"
+            print(f"Status check failed for image job {job.job_id}: {e}")
+            job.interval = min(job.interval * self.backoff_factor, self.max_interval)
+            job.next_poll_at = time.monotonic() + job.interval
+        finally:
+            job.polling = False
+            self._wakeup.set()
+
+    async def _poll_loop(self) -> None:
+        while True:
+            now = time.monotonic()
+
+            for job in list(self._jobs.values()):
+                if job.future.cancelled():
+                    self._jobs.pop(job.job_id, None)
+                elif now >= job.deadline:
+                    self._finish(job, exception=TimeoutError(
+                        f"Image generation timed out for ID={job.job_id}."))
+                elif not job.polling and job.next_poll_at <= now:
+                    job.polling = True
+                    asyncio.get_running_loop().create_task(self._poll_one(job))
+
+            waiting = [j for j in self._jobs.values() if not j.polling]
+            if waiting:
+                delay = min(min(j.next_poll_at, j.deadline) for j in waiting) - time.monotonic()
+            else:
+                delay = self.max_interval if self._jobs else None
+
+            self._wakeup.clear()
+            try:
+                if delay is None:
+                    await self._wakeup.wait()
+                else:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(delay, 0.05))
+            except asyncio.TimeoutError:
+                pass
+
+
+def _copy_future(source: concurrent.futures.Future, target: concurrent.futures.Future) -> None:
+    if target.done():
+        return
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
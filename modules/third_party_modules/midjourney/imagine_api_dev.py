@@ -1,11 +1,17 @@
+import asyncio
 import http.client
 import json
 import pprint
-import time
 import requests
 from io import BytesIO
 
 from configs import *
+from modules.third_party_modules.midjourney.image_job_poller import (
+    ImageJobPoller,
+    JOB_PENDING,
+    JOB_COMPLETED,
+    JOB_FAILED,
+)
 
 '''
 def midjourney_create_image(
@@ -115,6 +121,67 @@ def download_image(image_url):
         return None
 
 
+##########################################
+# shared job poller
+##########################################
+
+def _get_image_status(image_id):
+    return send_request('GET', f"/items/images/{image_id}")
+
+
+def _classify_image_status(response_data):
+    if "data" not in response_data:
+        raise ValueError("No 'data' field found in image status response.")
+
+    status = response_data["data"].get("status")
+    if status == "completed":
+        return JOB_COMPLETED, status
+    if status == "failed":
+        return JOB_FAILED, status
+    return JOB_PENDING, status
+
+
+# one poll loop for every imagineapi.dev image in this process
+imagine_job_poller = ImageJobPoller(
+    _get_image_status,
+    _classify_image_status,
+    min_interval=imagine_poll_min_interval_seconds,
+    max_interval=imagine_poll_max_interval_seconds,
+)
+
+
+def _submit_image(prompt):
+    prompt_response_data = send_request('POST', '/items/images/', prompt)
+    print(f'prompt_response_data -')
+    pprint.pp(prompt_response_data)
+    if "data" not in prompt_response_data or "id" not in prompt_response_data["data"]:
+        raise ValueError("The response for image creation did not contain a valid 'data' or 'id' field.")
+    return prompt_response_data["data"]["id"]
+
+
+def _download_completed_image(response_data):
+    image_data = response_data["data"]
+
+    print(f'response_data -')
+    pprint.pp(response_data)
+
+    # Choose whether to download from image_data['url'] or the first in 'upscaled_urls'
+    # We'll pick the first upscaled URL, but you can adjust as needed.
+    upscaled_urls = image_data.get("upscaled_urls", [])
+    if not upscaled_urls:
+        # fallback to 'url' if upscaled_urls is empty
+        image_url = image_data.get("url")
+        if not image_url:
+            raise ValueError("No valid URLs found to download the completed image.")
+    else:
+        image_url = upscaled_urls[0]  # pick first upscaled URL
+
+    image_in_memory = download_image(image_url)
+    if not image_in_memory:
+        raise Exception("Image download failed for a completed image.")
+    return image_in_memory
+
+
 ##########################################
 # New wrapper function
 ##########################################
@@ -128,67 +195,28 @@ def generate_image_from_prompt(
     """
     End-to-end function that:
     1) Sends a prompt to create a Midjourney image.
-    2) Polls until the image is completed or failed, or until timeout.
+    2) Waits on the shared job poller until the image is completed or failed, or until timeout.
     3) If completed, downloads the image and returns it as a BytesIO object.
 
     :param prompt: The Midjourney-style prompt string.
-    :param sleep_delay_ms: Delay (in milliseconds) between status checks.
+    :param sleep_delay_ms: Shortest delay (in milliseconds) between status checks of this image.
     :param timeout_ms: Maximum time (in milliseconds) to keep retrying before timing out.
     :return: BytesIO object of the image if successful, otherwise raises an Exception or TimeoutError.
     """
 
-    start_time = time.time()
     try:
         # 1. Send creation request
-        prompt_response_data = send_request('POST', '/items/images/', prompt)
-        print(f'prompt_response_data -')
-        pprint.pp(prompt_response_data)
-        if "data" not in prompt_response_data or "id" not in prompt_response_data["data"]:
-            raise ValueError("The response for image creation did not contain a valid 'data' or 'id' field.")
-        image_id = prompt_response_data["data"]["id"]
-
-        # 2. Poll for completion
-        while True:
-            elapsed_ms = (time.time() - start_time) * 1000
-            if elapsed_ms >= timeout_ms:
-                raise TimeoutError(f"Image generation timed out after {timeout_ms} ms.")
-
-            # Check the image status
-            response_data = send_request('GET', f"/items/images/{image_id}")
-            if "data" not in response_data:
-                raise ValueError("No 'data' field found in image status response.")
-            image_data = response_data["data"]
-
-            status = image_data.get("status")
-            if status in ["completed", "failed"]:
-
-                print(f'response_data -')
-                pprint.pp(response_data)
-                if status == "failed":
-                    raise Exception(f"Image generation failed for ID={image_id}.")
-
-                # 3. If completed, attempt download
-                #    Choose whether to download from image_data['url'] or the first in 'upscaled_urls'
-                #    We'll pick the first upscaled URL, but you can adjust as needed.
-                upscaled_urls = image_data.get("upscaled_urls", [])
-                if not upscaled_urls:
-                    # fallback to 'url' if upscaled_urls is empty
-                    image_url = image_data.get("url")
-                    if not image_url:
-                        raise ValueError("No valid URLs found to download the completed image.")
-                else:
-                    image_url = upscaled_urls[0]  # pick first upscaled URL
-
-                image_in_memory = download_image(image_url)
-                if image_in_memory:
-                    # 4. Return the BytesIO object
-                    return image_in_memory
-                else:
-                    raise Exception("Image download failed for a completed image.")
-            else:
-                # Not completed yet
-                print(f"Image (ID={image_id}) is not finished. Current status: {status}")
-                time.sleep(sleep_delay_ms / 1000.0)
+        image_id = _submit_image(prompt)
+
+        # 2. Wait for completion (polled together with every other outstanding image)
+        response_data = imagine_job_poller.track(
+            image_id,
+            timeout=timeout_ms / 1000.0,
+            min_interval=sleep_delay_ms / 1000.0
+        ).result()
+
+        # 3. Download and return the BytesIO object
+        return _download_completed_image(response_data)
 
     except TimeoutError:
         # Reraise or handle the timeout
@@ -200,6 +228,19 @@ def generate_image_from_prompt(
         raise
 
 
+async def generate_image_from_prompt_async(
+    prompt,
+    timeout_ms=1200000     # 20 minutes
+):
+    """
+    Awaitable version of generate_image_from_prompt(): no thread is held
+    while the image is generating.
+    """
+    image_id = await asyncio.to_thread(_submit_image, prompt)
+    response_data = await imagine_job_poller.wait(image_id, timeout=timeout_ms / 1000.0)
+    return await asyncio.to_thread(_download_completed_image, response_data)
+
+
 def tests():
 
     prompt = "a pretty lady at the beach --ar 9:21 --chaos 40 --stylize 1000"
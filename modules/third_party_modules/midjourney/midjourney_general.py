@@ -1,3 +1,4 @@
+import asyncio
 import requests
 import time
 import json
@@ -7,6 +8,14 @@ import os
 from PIL import Image
 import io
 
+from modules.third_party_modules.midjourney.image_job_poller import (
+    ImageJobPoller,
+    ImageJobFailed,
+    JOB_PENDING,
+    JOB_COMPLETED,
+    JOB_FAILED,
+)
+
 
 class MidjourneyAPI:
     def __init__(self, api_key: str):
@@ -25,6 +34,67 @@ class MidjourneyAPI:
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
+        # every generation started by this client is polled by one shared loop
+        self.job_poller = ImageJobPoller(
+            self._get_generation_status,
+            self._classify_generation_status,
+            min_interval=5,
+            max_interval=30,
+        )
+
+    def _get_generation_status(self, job_id: str) -> Dict[Any, Any]:
+        status_response = requests.get(
+            f"{self.base_url}/generations/{job_id}",
+            headers=self.headers
+        )
+        status_response.raise_for_status()
+        return status_response.json()
+
+    @staticmethod
+    def _classify_generation_status(generation_status: Dict[Any, Any]) -> tuple:
+        status = generation_status.get('status')
+        if status == 'completed':
+            return JOB_COMPLETED, status
+        if status == 'failed':
+            return JOB_FAILED, status
+        return JOB_PENDING, status
+
+    def _submit_generation(self, prompt: str, image_quality: str) -> str:
+        # Prepare the generation request
+        payload = {
+            "prompt": prompt,
+            "model": "midjourney-v6",  # Using latest model
+            "quality": image_quality,
+            "aspect_ratio": "1:1",  # Square format good for blog posts
+            "num_variations": 4,  # Generate 4 to pick the best one
+        }
+
+        # Submit the initial generation request
+        response = requests.post(
+            f"{self.base_url}/generations",
+            headers=self.headers,
+            json=payload
+        )
+        response.raise_for_status()
+
+        # Get the generation job ID
+        return response.json()['job_id']
+
+    @staticmethod
+    def _build_result(prompt: str, generation_status: Dict[Any, Any], start_time: float) -> Dict[Any, Any]:
+        # Find the highest-rated variation
+        variations = generation_status['variations']
+        best_variation = max(
+            variations,
+            key=lambda x: x.get('rating', 0)
+        )
+
+        return {
+            'image_url': best_variation['image_url'],
+            'prompt': prompt,
+            'generation_time': time.time() - start_time,
+            'model_version': generation_status['model_version']
+        }
 
     def generate_blog_image(
             self,
@@ -55,63 +125,41 @@ class MidjourneyAPI:
             TimeoutError: If image generation exceeds max_wait_time
             RequestError: If there's an API communication error
         """
-        # Prepare the generation request
-        payload = {
-            "prompt": prompt,
-            "model": "midjourney-v6",  # Using latest model
-            "quality": image_quality,
-            "aspect_ratio": "1:1",  # Square format good for blog posts
-            "num_variations": 4,  # Generate 4 to pick the best one
-        }
-
         try:
-            # Submit the initial generation request
-            response = requests.post(
-                f"{self.base_url}/generations",
-                headers=self.headers,
-                json=payload
-            )
-            response.raise_for_status()
+            start_time = time.time()
+            job_id = self._submit_generation(prompt, image_quality)
 
-            # Get the generation job ID
-            job_id = response.json()['job_id']
+            # Wait on the shared poller instead of sleeping in this thread
+            generation_status = self.job_poller.track(job_id, timeout=max_wait_time).result()
+            return self._build_result(prompt, generation_status, start_time)
 
-            # Poll for results
-            start_time = time.time()
-            while time.time() - start_time < max_wait_time:
-                status_response = requests.get(
-                    f"{self.base_url}/generations/{job_id}",
-                    headers=self.headers
-                )
-                status_response.raise_for_status()
-
-                generation_status = status_response.json()
-
-                if generation_status['status'] == 'completed':
-                    # Find the highest-rated variation
-                    variations = generation_status['variations']
-                    best_variation = max(
-                        variations,
-                        key=lambda x: x.get('rating', 0)
-                    )
-
-                    return {
-                        'image_url': best_variation['image_url'],
-                        'prompt': prompt,
-                        'generation_time': time.time() - start_time,
-                        'model_version': generation_status['model_version']
-                    }
-
-                elif generation_status['status'] == 'failed':
-                    raise Exception(f"Generation failed: {generation_status.get('error')}")
-
-                time.sleep(5)  # Wait 5 seconds before polling again
+        except ImageJobFailed as e:
+            raise Exception(f"Generation failed: {e.payload.get('error')}")
 
+        except TimeoutError:
             raise TimeoutError("Image generation exceeded maximum wait time")
 
         except requests.exceptions.RequestException as e:
             raise Exception(f"API communication error: {str(e)}")
 
+    async def generate_blog_image_async(
+            self,
+            prompt: str,
+            max_wait_time: int = 300,
+            image_quality: str = "HD"
+    ) -> Dict[Any, Any]:
+        """
+        Awaitable version of generate_blog_image(). Many generations can be
+        awaited concurrently; they are all tracked by this client's single poll loop.
+        """
+        start_time = time.time()
+        job_id = await asyncio.to_thread(self._submit_generation, prompt, image_quality)
+        try:
+            generation_status = await self.job_poller.wait(job_id, timeout=max_wait_time)
+        except ImageJobFailed as e:
+            raise Exception(f"Generation failed: {e.payload.get('error')}")
+        return self._build_result(prompt, generation_status, start_time)
+
     def download_image(self, image_url: str, save_path: str) -> str:
         """
         Downloads and saves the generated image.
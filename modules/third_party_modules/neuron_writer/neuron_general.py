@@ -12,6 +12,35 @@ headers = {
 }
 
 
+class NeuronResponseError(Exception):
+    """
+    Neuron answered with an error status, or with a body that isn't the expected JSON
+    (e.g. no query id for a bad project id). status_code is the HTTP status, if it was an error.
+    """
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _neuron_response_data(response, endpoint, required_keys=()):
+    """JSON body of a Neuron API response - raises NeuronResponseError unless it's a success with required_keys"""
+    if not response.ok:
+        raise NeuronResponseError(
+            f"Neuron {endpoint} failed with HTTP {response.status_code}: {response.text[:500]}",
+            response.status_code
+        )
+    try:
+        response_data = response.json()
+    except ValueError:
+        raise NeuronResponseError(f"Neuron {endpoint} returned a response that isn't JSON: {response.text[:500]}")
+
+    missing = [key for key in required_keys if not isinstance(response_data, dict) or key not in response_data]
+    if missing:
+        raise NeuronResponseError(f"Neuron {endpoint} response has no {', '.join(missing)}: {response.text[:500]}")
+    return response_data
+
+
 def neuron_new_query(project_id,keyword,engine,language):
 
     # Creating a new query:
@@ -33,7 +62,7 @@ def neuron_new_query(project_id,keyword,engine,language):
     print("Response Headers:", response.headers)
     print("Response Text:", response.text)
 
-    return response.json()
+    return _neuron_response_data(response, "/new-query", ["query"])
 
 
 def neuron_get_query(query_id):
@@ -51,7 +80,7 @@ def neuron_get_query(query_id):
         data=payload
     )
 
-    response_data = response.json()
+    response_data = _neuron_response_data(response, "/get-query", ["status"])
 
     # Pretty-print the JSON response
     print()
@@ -76,7 +105,7 @@ def neuron_import_content(query_id,html_content,title,description):
         headers=headers,
         data=payload)
 
-    response_data = response.json()
+    response_data = _neuron_response_data(response, "/import-content", ["content_score"])
 
     # Pretty-print the JSON response
     print(json.dumps(response_data, indent=4, ensure_ascii=False))
@@ -99,7 +128,7 @@ def neuron_evaluate_content(query_id,html_content,title,description):
         headers=headers,
         data=payload)
 
-    response_data = response.json()
+    response_data = _neuron_response_data(response, "/evaluate-content", ["content_score"])
 
     # Pretty-print the JSON response
     print(json.dumps(response_data, indent=4, ensure_ascii=False))
@@ -0,0 +1,213 @@
+import base64
+import json
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from configs import (
+    wordpress_pool_maxsize,
+    wordpress_max_concurrency_per_host,
+    wordpress_http_retries,
+)
+
+# only methods that are safe to repeat are retried on 429/5xx responses;
+# POSTs (uploads, post creation) are never re-sent automatically
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class WordPressClient:
+    """
+    REST client for one WordPress site.
+
+    Keeps a pooled keep-alive session (one TLS handshake per connection, not per call),
+    builds the Basic auth header once, encodes/decodes JSON in one place,
+    and caps the number of concurrent requests per host across all clients.
+    """
+
+    # host -> semaphore, shared by every client talking to that host
+    _host_slots: Dict[str, threading.BoundedSemaphore] = {}
+    _host_slots_lock = threading.Lock()
+
+    def __init__(
+        self,
+        site: str,
+        user: str,
+        app_pass: str,
+        pool_maxsize: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        retries: Optional[int] = None,
+    ):
+        self.site = site.rstrip('/')
+        self.api_base = f"{self.site}/wp-json"
+        self.host = urlsplit(self.site).netloc.lower()
+
+        self.max_concurrency = max_concurrency or wordpress_max_concurrency_per_host
+        pool_maxsize = max(pool_maxsize or wordpress_pool_maxsize, self.max_concurrency)
+        retries = wordpress_http_retries if retries is None else retries
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=0.5,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._current_user_id: Optional[int] = None
+
+        token = base64.b64encode(f"{user}:{app_pass}".encode()).decode()
+        self.session.headers.update({
+            "Authorization": f"Basic {token}",
+            "Accept": "application/json",
+        })
+
+    # ---------- Core helpers ----------
+
+    def _host_slot(self) -> threading.BoundedSemaphore:
+        with WordPressClient._host_slots_lock:
+            slot = WordPressClient._host_slots.get(self.host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_concurrency)
+                WordPressClient._host_slots[self.host] = slot
+            return slot
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        json_body: Optional[Any] = None,
+        data: Optional[bytes] = None,
+        headers: Optional[dict] = None,
+        params: Optional[dict] = None,
+        timeout: float = 60,
+    ) -> Any:
+        """
+        Send a request to /wp-json/<path> and return the decoded JSON body.
+        Raises requests.HTTPError on non-2xx responses.
+        """
+        url = f"{self.api_base}/{path.lstrip('/')}"
+        headers = dict(headers or {})
+        if json_body is not None:
+            data = json.dumps(json_body)
+            headers.setdefault("Content-Type", "application/json")
+
+        with self._host_slot():
+            r = self.session.request(method, url, data=data, headers=headers,
+                                     params=params, timeout=timeout)
+        r.raise_for_status()
+        return r.json() if r.content else None
+
+    def close(self) -> None:
+        self.session.close()
+
+    # ---------- Media ----------
+
+    def upload_media(self, image_bytes: bytes, filename: str, mime_type: Optional[str] = None) -> dict:
+        """Upload a binary image to WP Media Library. Returns media JSON dict."""
+        if not mime_type:
+            mime_type = mimetypes.guess_type(filename)[0] or "image/png"
+        headers = {
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Type": mime_type,
+        }
+        return self.request("POST", "wp/v2/media", data=image_bytes, headers=headers, timeout=120)
+
+    def update_media_meta(self, media_id: int, alt_text: str = "", title: str = "") -> dict:
+        """Set alt text and title for a media item."""
+        return self.request("POST", f"wp/v2/media/{media_id}", json_body=_media_meta_payload(alt_text, title))
+
+    def update_media_metas(self, media_meta_updates: List[dict]) -> None:
+        """
+        Apply [{"media_id": 12, "alt_text": "...", "title": "..."}, ...] - one request per item,
+        up to max_concurrency at once over the pooled session. (Not through /batch/v1: core's
+        attachments controller doesn't allow batching.) Raises the first failure.
+        """
+        def update(item):
+            return self.update_media_meta(item["media_id"], item.get("alt_text", ""), item.get("title", ""))
+
+        if len(media_meta_updates) <= 1:
+            for item in media_meta_updates:
+                update(item)
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(media_meta_updates))) as pool:
+            list(pool.map(update, media_meta_updates))
+
+    # ---------- Posts ----------
+
+    def create_post(self, payload: dict) -> dict:
+        return self.request("POST", "wp/v2/posts", json_body=payload)
+
+    def update_post(self, post_id: int, payload: dict) -> dict:
+        return self.request("POST", f"wp/v2/posts/{post_id}", json_body=payload)
+
+    def current_user_id(self) -> Optional[int]:
+        """ID of the WordPress user we authenticate as (fetched once per client)."""
+        if self._current_user_id is None:
+            self._current_user_id = (self.request("GET", "wp/v2/users/me") or {}).get("id")
+        return self._current_user_id
+
+    def find_posts_by_slug(self, slug: str) -> List[dict]:
+        """Posts (any status we may have created) with this slug, including their meta."""
+        return self.request("GET", "wp/v2/posts", params={
+            "slug": slug,
+            "status": "publish,future,draft,pending,private",
+            "context": "edit",
+        }) or []
+
+    def publish_post(self, payload: dict, media_meta_updates: Optional[List[dict]] = None,
+                     post_id: Optional[int] = None) -> dict:
+        """
+        Apply pending media meta updates and create the post
+        (or update post_id in place when given).
+
+        media_meta_updates: [{"media_id": 12, "alt_text": "...", "title": "..."}, ...]
+
+        The media updates are individual pooled requests (see update_media_metas), sent
+        before the post so it never goes live with images missing their alt text.
+        Returns the created/updated post JSON.
+        """
+        self.update_media_metas(media_meta_updates or [])
+
+        if post_id:
+            return self.update_post(post_id, payload)
+        return self.create_post(payload)
+
+
+def _media_meta_payload(alt_text: str = "", title: str = "") -> dict:
+    payload = {}
+    if alt_text:
+        payload["alt_text"] = alt_text
+    if title:
+        payload["title"] = title
+    return payload
+
+
+_clients: Dict[tuple, WordPressClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_wordpress_client(site: str, user: str, app_pass: str) -> WordPressClient:
+    """Return the process-wide client for (site, user), creating it on first use."""
+    key = (site.rstrip('/'), user, app_pass)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = WordPressClient(site, user, app_pass)
+            _clients[key] = client
+        return client
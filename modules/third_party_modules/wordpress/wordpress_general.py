@@ -1,5 +1,7 @@
 import base64, json, requests
+import hashlib
 import mimetypes
+import re
 from typing import Optional, Tuple
 
 from configs import *
@@ -7,6 +9,7 @@ from typing import Optional, Union
 
 from modules.third_party_modules.openai.openai_images import generate_image_bytes
 from modules.utils.filename import make_wp_safe_filename
+from modules.third_party_modules.wordpress.wordpress_client import get_wordpress_client
 
 
 def wordpress_upload_post(
@@ -97,35 +100,59 @@ def wp_upload_media_bytes(
     mime_type: Optional[str] = None,
 ) -> dict:
     """Upload a binary image to WP Media Library. Returns media JSON dict."""
-    if not mime_type:
-        mime_type = mimetypes.guess_type(filename)[0] or "image/png"
-    headers = {
-        **_wp_auth_header(user, app_pass),
-        "Content-Disposition": f'attachment; filename="{filename}"',
-        "Content-Type": mime_type,
-    }
-    url = f"{site.rstrip('/')}/wp-json/wp/v2/media"
-    r = requests.post(url, headers=headers, data=image_bytes, timeout=120)
-    r.raise_for_status()
-    return r.json()
+    return get_wordpress_client(site, user, app_pass).upload_media(
+        image_bytes,
+        filename,
+        mime_type
+    )
 
 
 def wp_update_media_meta(site: str, user: str, app_pass: str, media_id: int,
                       alt_text: str = "", title: str = "") -> dict:
     """Set alt text and title for a media item."""
-    url = f"{site.rstrip('/')}/wp-json/wp/v2/media/{media_id}"
-    headers = {
-        **_wp_auth_header(user, app_pass),
-        "Content-Type": "application/json",
-    }
-    payload = {}
-    if alt_text:
-        payload["alt_text"] = alt_text
-    if title:
-        payload["title"] = title
-    r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
-    r.raise_for_status()
-    return r.json()
+    return get_wordpress_client(site, user, app_pass).update_media_meta(
+        media_id,
+        alt_text,
+        title
+    )
+
+# --- idempotent publishing ---
+
+# post meta holding "<keyword id>:<content hash>" of the content we published.
+# It is only stored/returned by WordPress if the site registers it with show_in_rest,
+# so lookups fall back to the slug alone.
+IDEMPOTENCY_META_KEY = "ai_content_maker_idempotency_key"
+
+
+def wordpress_post_slug(keyword: str) -> str:
+    """Stable post slug for a keyword (unicode letters kept, WordPress percent-encodes them)."""
+    slug = re.sub(r"[^\w]+", "-", (keyword or "").lower()).strip("-_")
+    return slug or "article"
+
+
+def publishing_idempotency_key(keyword_id, title: str, content_html: str) -> str:
+    """'<keyword id>:<hash of the generated title + content>'."""
+    content_hash = hashlib.sha256(f"{title}\n{content_html}".encode("utf-8")).hexdigest()[:16]
+    return f"{keyword_id}:{content_hash}"
+
+
+def find_existing_post(site: str, user: str, app_pass: str, slug: str, keyword_id) -> Optional[dict]:
+    """
+    Find a post we already published for this keyword, by slug, then:
+    - if the site exposes the idempotency meta key: the key must belong to the same keyword id
+    - otherwise: the post must have been written by our WordPress user
+    """
+    client = get_wordpress_client(site, user, app_pass)
+    key_prefix = f"{keyword_id}:"
+    for post in client.find_posts_by_slug(slug):
+        meta = post.get("meta") or {}
+        if IDEMPOTENCY_META_KEY in meta:
+            if str(meta[IDEMPOTENCY_META_KEY] or "").startswith(key_prefix):
+                return post
+        elif post.get("author") == client.current_user_id():
+            return post
+    return None
+
 
 # --- add these helpers in wordpress_general.py ---
 
@@ -144,7 +171,9 @@ def _build_post_payload(title: str,
                         status: str = "publish",
                         featured_media_id: Optional[int] = None,
                         meta_description: Optional[str] = None,
-                        seo_plugin: str = "yoast") -> dict:
+                        seo_plugin: str = "yoast",
+                        slug: Optional[str] = None,
+                        idempotency_key: Optional[str] = None) -> dict:
     payload = {
         "title": title,
         "content": content_html,
@@ -152,6 +181,10 @@ def _build_post_payload(title: str,
     }
     if featured_media_id:
         payload["featured_media"] = featured_media_id
+    if slug:
+        payload["slug"] = slug
+    if idempotency_key:
+        payload.setdefault("meta", {})[IDEMPOTENCY_META_KEY] = idempotency_key
 
     # Optional: meta description
     if meta_description:
@@ -172,18 +205,11 @@ def _build_post_payload(title: str,
     return payload
 
 
-def create_post_with_featured_image(
-    site: str,
-    user: str,
-    app_pass: str,
-    keyword: str,
-    title: str,
-    content_html: str,
-    status: str = "publish",
-    meta_description: Optional[str] = None,
-    seo_plugin: str = "yoast",  # "yoast" | "rankmath" | "aioseo" | "none"
-) -> dict:
-
+def upload_featured_image(site: str, user: str, app_pass: str, keyword: str, title: str) -> dict:
+    """
+    Generate the article's main image and upload it to the Media Library.
+    Returns the alt/title update to apply to it: {"media_id": ..., "alt_text": ..., "title": ...}
+    """
     image_prompt = openai_image_prompt_pattern.format(
         article_topic=keyword
     )
@@ -207,34 +233,62 @@ def create_post_with_featured_image(
         filename,
         mime
     )
-    featured_media_id = int(media["id"])
 
-    # 3) Set alt text + title on the media
-    wp_update_media_meta(
-        site,
-        user,
-        app_pass,
-        featured_media_id,
-        title,
-        keyword
-    )
+    # 3) alt text + title for the media
+    #    (sent together with the post creation)
+    return {
+        "media_id": int(media["id"]),
+        "alt_text": title,
+        "title": keyword,
+    }
+
+
+def create_post_with_featured_image(
+    site: str,
+    user: str,
+    app_pass: str,
+    keyword: str,
+    title: str,
+    content_html: str,
+    status: str = "publish",
+    meta_description: Optional[str] = None,
+    seo_plugin: str = "yoast",  # "yoast" | "rankmath" | "aioseo" | "none"
+    media_meta_updates: Optional[list] = None,  # deferred updates, e.g. from process_article_html
+    slug: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+    existing_post: Optional[dict] = None,  # from find_existing_post() - updated in place
+    featured_media_id: Optional[int] = None,  # already uploaded (e.g. upload_featured_image) - not generated again
+) -> dict:
+
+    media_meta_updates = list(media_meta_updates or [])
+
+    if featured_media_id:
+        featured_media_id = int(featured_media_id)
+    elif existing_post and existing_post.get("featured_media"):
+        # retry of an already published article - keep its featured image
+        featured_media_id = int(existing_post["featured_media"])
+    else:
+        featured_update = upload_featured_image(site, user, app_pass, keyword, title)
+        featured_media_id = featured_update["media_id"]
+        media_meta_updates.append(featured_update)
 
     """Create a post and set its featured image."""
-    url = f"{site.rstrip('/')}/wp-json/wp/v2/posts"
-    headers = {
-        **_wp_auth_header(user, app_pass),
-        "Content-Type": "application/json",
-    }
     payload = _build_post_payload(
         title=title,
         content_html=content_html,
         status=status,
         featured_media_id=featured_media_id,
         meta_description=meta_description,
-        seo_plugin=seo_plugin
+        seo_plugin=seo_plugin,
+        slug=slug,
+        idempotency_key=idempotency_key
+    )
+
+    # 4) media meta updates (pooled, concurrent) + post creation (or in-place update)
+    return get_wordpress_client(site, user, app_pass).publish_post(
+        payload,
+        media_meta_updates,
+        post_id=existing_post["id"] if existing_post else None
     )
-    r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
-    r.raise_for_status()
-    return r.json()
 
 
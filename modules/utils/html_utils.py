@@ -41,7 +41,8 @@ def process_article_html(
         site,
         user,
         app_pass,
-        html
+        html,
+        media_meta_updates=None
 ) -> str:
     """
     1) Find figure.ai-image blocks
@@ -49,6 +50,9 @@ def process_article_html(
     3) Upload to WP
     4) Replace src tokens, set media alt/title
     5) Optionally drop data-* attributes
+
+    If media_meta_updates (a list) is given, the alt/title updates are appended to it
+    instead of being sent one by one, so they can be sent concurrently before the post creation.
     """
     soup = BeautifulSoup(html, "html.parser")
     figures = _find_ai_figures(soup)
@@ -76,14 +80,21 @@ def process_article_html(
         media_id = int(media["id"])
         image_title = alt[:60]
         # 3. Update alt/title in the media library
-        wp_update_media_meta(
-            site,
-            user,
-            app_pass,
-            media_id,
-            alt,
-            image_title
-        )
+        if media_meta_updates is not None:
+            media_meta_updates.append({
+                "media_id": media_id,
+                "alt_text": alt,
+                "title": image_title,
+            })
+        else:
+            wp_update_media_meta(
+                site,
+                user,
+                app_pass,
+                media_id,
+                alt,
+                image_title
+            )
         # 4. Replace token in the corresponding <img>
         token = f"__AIIMG:{fid}__"
         img = soup.find("img", src=token)
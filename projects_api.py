@@ -2,8 +2,27 @@
 API endpoints for project management
 """
 from flask import Blueprint, jsonify, request
-from database_models import db, Project, Schedule, KeywordQueue, Article
-from datetime import datetime
+from database_models import (
+    db, Project, Schedule, KeywordQueue, Article, ArticleRevision,
+    KeywordArchive, ArticleArchive, ArticleRevisionArchive, normalize_keyword
+)
+from configs import archive_retention_days
+from database_archive import ARCHIVED_STATUSES, archive_finished_keywords, project_history
+from database_content import load_content
+from database_keyword_import import import_format, import_keywords
+from database_pagination import count_estimate, keyset_page, like_prefix, page_size, parse_datetime
+from database_scheduler import (
+    ERROR_PERMANENT,
+    ERROR_TRANSIENT,
+    get_fairness_metrics,
+    reset_expired_keywords,
+    retry_failed_keywords,
+    set_keywords_paused,
+    set_keywords_priority,
+)
+from database_stats import KEYWORD_STATUSES, project_counters, project_stats, queue_stats
+from datetime import datetime, timezone
+from sqlalchemy.orm import joinedload, undefer
 import traceback
 
 # Create a Blueprint for project management
@@ -13,22 +32,18 @@ projects_api_bp = Blueprint('projects-api', __name__)
 def get_projects():
     """Get all projects with statistics"""
     try:
-        projects = Project.query.all()
+        projects = Project.query.options(
+            undefer(Project.total_keywords),
+            undefer(Project.active_schedules)
+        ).all()
+        stats = project_stats(project.id for project in projects)
         projects_data = []
         
         for project in projects:
             project_dict = project.to_dict()
             
             # Add additional statistics
-            project_dict['stats'] = {
-                'total_keywords': len(project.keywords),
-                'pending_keywords': len([k for k in project.keywords if k.status == 'pending']),
-                'processing_keywords': len([k for k in project.keywords if k.status == 'processing']),
-                'completed_keywords': len([k for k in project.keywords if k.status == 'completed']),
-                'failed_keywords': len([k for k in project.keywords if k.status == 'failed']),
-                'total_articles': len(project.articles),
-                'active_schedules': len([s for s in project.schedules if s.is_active])
-            }
+            project_dict['stats'] = stats[project.id]
             
             projects_data.append(project_dict)
         
@@ -105,11 +120,20 @@ def create_project():
 def get_project(project_id):
     """Get a specific project with detailed information"""
     try:
-        project = Project.query.get_or_404(project_id)
+        project = Project.query.options(
+            undefer(Project.total_keywords),
+            undefer(Project.active_schedules)
+        ).get_or_404(project_id)
         project_data = project.to_dict()
         
         # Add detailed information
-        project_data['schedules'] = [schedule.to_dict() for schedule in project.schedules]
+        project_data['schedules'] = [
+            schedule.to_dict() for schedule in
+            Schedule.query.options(undefer(Schedule.pending_keywords))
+            .filter_by(project_id=project_id)
+            .order_by(Schedule.id)
+            .all()
+        ]
         project_data['recent_keywords'] = [
             kw.to_dict() for kw in 
             KeywordQueue.query.filter_by(project_id=project_id)
@@ -134,6 +158,262 @@ def get_project(project_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@projects_api_bp.route('/api/projects/<int:project_id>/keywords', methods=['GET'])
+def get_project_keywords(project_id):
+    """
+    A page of a project's keywords, newest first (?order=asc for oldest first).
+    Query parameters: limit, cursor (next_cursor of the previous page), status (comma-separated),
+    schedule_id, created_after / created_before (ISO dates) and q (keyword prefix).
+    The X-Total-Count-Estimate header estimates how many keywords match.
+    """
+    try:
+        project = Project.query.get_or_404(project_id)
+        args = request.args
+        
+        statuses = [status for status in args.get('status', '').split(',') if status]
+        if any(status not in KEYWORD_STATUSES for status in statuses):
+            return jsonify({'success': False, 'error': f'status must be one of {", ".join(KEYWORD_STATUSES)}'}), 400
+        schedule_id = args.get('schedule_id', type=int)
+        created_after = parse_datetime(args.get('created_after'))
+        created_before = parse_datetime(args.get('created_before'))
+        prefix = normalize_keyword(args.get('q', ''))
+        
+        query = KeywordQueue.query.filter(KeywordQueue.project_id == project.id)
+        if statuses:
+            query = query.filter(KeywordQueue.status.in_(statuses))
+        if schedule_id is not None:
+            query = query.filter(KeywordQueue.schedule_id == schedule_id)
+        if created_after:
+            query = query.filter(KeywordQueue.created_at >= created_after)
+        if created_before:
+            query = query.filter(KeywordQueue.created_at < created_before)
+        if prefix:
+            query = query.filter(KeywordQueue.normalized_keyword.like(like_prefix(prefix), escape='\\'))
+        
+        if schedule_id is None and not (created_after or created_before or prefix):
+            # by project and status only - the project_stats counters have the exact count
+            counters = project_counters([project.id]).get(project.id)
+            counts = counters.keyword_counts() if counters else {}
+            estimate = str(sum(count for status, count in counts.items() if not statuses or status in statuses))
+        else:
+            estimate = count_estimate(query)
+        
+        keywords, next_cursor = keyset_page(query, KeywordQueue, args.get('cursor'), page_size(args.get('limit')),
+                                            descending=args.get('order', 'desc') != 'asc')
+        
+        response = jsonify({
+            'success': True,
+            'keywords': [keyword.to_dict() for keyword in keywords],
+            'next_cursor': next_cursor
+        })
+        response.headers['X-Total-Count-Estimate'] = estimate
+        return response
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in get_project_keywords: {type(e).__name__}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@projects_api_bp.route('/api/projects/<int:project_id>/keywords/archive', methods=['GET'])
+def get_project_archived_keywords(project_id):
+    """
+    A page of a project's archived keywords (database_archive.py), newest first (?order=asc for oldest first).
+    Query parameters: limit, cursor, status (comma-separated: completed, failed, dead_letter),
+    finished_after / finished_before (ISO dates - on Postgres only those months' partitions are read)
+    and q (keyword prefix). The X-Total-Count-Estimate header estimates how many keywords match.
+    """
+    try:
+        project = Project.query.get_or_404(project_id)
+        args = request.args
+        
+        statuses = [status for status in args.get('status', '').split(',') if status]
+        if any(status not in ARCHIVED_STATUSES for status in statuses):
+            return jsonify({'success': False, 'error': f'status must be one of {", ".join(ARCHIVED_STATUSES)}'}), 400
+        finished_after = parse_datetime(args.get('finished_after'))
+        finished_before = parse_datetime(args.get('finished_before'))
+        prefix = normalize_keyword(args.get('q', ''))
+        
+        query = KeywordArchive.query.filter(KeywordArchive.project_id == project.id)
+        if statuses:
+            query = query.filter(KeywordArchive.status.in_(statuses))
+        if finished_after:
+            query = query.filter(KeywordArchive.finished_at >= finished_after)
+        if finished_before:
+            query = query.filter(KeywordArchive.finished_at < finished_before)
+        if prefix:
+            query = query.filter(KeywordArchive.normalized_keyword.like(like_prefix(prefix), escape='\\'))
+        
+        if not (finished_after or finished_before or prefix):
+            counters = project_counters([project.id]).get(project.id)
+            estimate = str(sum(getattr(counters, f'archived_{status}') for status in ARCHIVED_STATUSES
+                               if not statuses or status in statuses) if counters else 0)
+        else:
+            estimate = count_estimate(query)
+        
+        keywords, next_cursor = keyset_page(query, KeywordArchive, args.get('cursor'), page_size(args.get('limit')),
+                                            descending=args.get('order', 'desc') != 'asc')
+        
+        response = jsonify({
+            'success': True,
+            'keywords': [keyword.to_dict() for keyword in keywords],
+            'next_cursor': next_cursor
+        })
+        response.headers['X-Total-Count-Estimate'] = estimate
+        return response
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in get_project_archived_keywords: {type(e).__name__}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@projects_api_bp.route('/api/projects/<int:project_id>/history', methods=['GET'])
+def get_project_history(project_id):
+    """A project's finished keywords by status and its articles per month (?months=12), archived ones included"""
+    try:
+        project = Project.query.get_or_404(project_id)
+        months = request.args.get('months', 12, type=int)
+        if not 1 <= months <= 120:
+            return jsonify({'success': False, 'error': 'months must be between 1 and 120'}), 400
+        
+        return jsonify({
+            'success': True,
+            'project_id': project.id,
+            'history': project_history(project.id, months)
+        })
+        
+    except Exception as e:
+        print(f"Error in get_project_history: {type(e).__name__}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@projects_api_bp.route('/api/projects/<int:project_id>/articles', methods=['GET'])
+def get_project_articles(project_id):
+    """
+    A page of a project's articles, newest first (?order=asc for oldest first).
+    Query parameters: limit, cursor (next_cursor of the previous page),
+    created_after / created_before (ISO dates) and q (title prefix).
+    The X-Total-Count-Estimate header estimates how many articles match.
+    """
+    try:
+        project = Project.query.get_or_404(project_id)
+        args = request.args
+        
+        created_after = parse_datetime(args.get('created_after'))
+        created_before = parse_datetime(args.get('created_before'))
+        prefix = args.get('q', '').strip()
+        
+        query = Article.query.options(joinedload(Article.keyword)).filter(Article.project_id == project.id)
+        if created_after:
+            query = query.filter(Article.created_at >= created_after)
+        if created_before:
+            query = query.filter(Article.created_at < created_before)
+        if prefix:
+            query = query.filter(Article.title.ilike(like_prefix(prefix), escape='\\'))
+        
+        if not (created_after or created_before or prefix):
+            counters = project_counters([project.id]).get(project.id)
+            estimate = str(counters.articles if counters else 0)
+        else:
+            estimate = count_estimate(query)
+        
+        articles, next_cursor = keyset_page(query, Article, args.get('cursor'), page_size(args.get('limit')),
+                                            descending=args.get('order', 'desc') != 'asc')
+        
+        response = jsonify({
+            'success': True,
+            'articles': [article.to_dict() for article in articles],
+            'next_cursor': next_cursor
+        })
+        response.headers['X-Total-Count-Estimate'] = estimate
+        return response
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in get_project_articles: {type(e).__name__}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def _get_article_or_404(article_id):
+    """An article - or, once its keyword was archived, its archived copy"""
+    return Article.query.get(article_id) or ArticleArchive.query.filter_by(id=article_id).first_or_404()
+
+
+def _revision_model(article):
+    return ArticleRevision if isinstance(article, Article) else ArticleRevisionArchive
+
+
+@projects_api_bp.route('/api/articles/<int:article_id>/content', methods=['GET'])
+def get_article_content(article_id):
+    """An article with its published HTML - loaded (and decompressed) only here, not in the listings"""
+    try:
+        article = _get_article_or_404(article_id)
+        content = load_content(article.content_hash)
+        if content is None:
+            return jsonify({'success': False, 'error': 'No content stored for this article'}), 404
+        
+        return jsonify({
+            'success': True,
+            'article': article.to_dict(),
+            'content': content
+        })
+        
+    except Exception as e:
+        print(f"Error in get_article_content: {type(e).__name__}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@projects_api_bp.route('/api/articles/<int:article_id>/revisions', methods=['GET'])
+def get_article_revisions(article_id):
+    """The revisions of an article - draft, optimized, media, published - without their content"""
+    try:
+        article = _get_article_or_404(article_id)
+        revision_model = _revision_model(article)
+        revisions = revision_model.query.filter_by(keyword_id=article.keyword_id).order_by(
+            revision_model.created_at, revision_model.id
+        ).all()
+        
+        return jsonify({
+            'success': True,
+            'revisions': [revision.to_dict() for revision in revisions]
+        })
+        
+    except Exception as e:
+        print(f"Error in get_article_revisions: {type(e).__name__}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@projects_api_bp.route('/api/articles/<int:article_id>/revisions/<int:revision_id>', methods=['GET'])
+def get_article_revision(article_id, revision_id):
+    """One revision of an article, with its content"""
+    try:
+        article = _get_article_or_404(article_id)
+        revision = _revision_model(article).query.filter_by(id=revision_id, keyword_id=article.keyword_id).first()
+        if revision is None:
+            return jsonify({'success': False, 'error': 'Revision not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'revision': revision.to_dict(),
+            'content': load_content(revision.content_hash)
+        })
+        
+    except Exception as e:
+        print(f"Error in get_article_revision: {type(e).__name__}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @projects_api_bp.route('/api/projects/<int:project_id>/keywords', methods=['POST'])
 def add_keywords_to_project(project_id):
     """Add keywords to a project"""
@@ -157,6 +437,7 @@ def add_keywords_to_project(project_id):
         
         added_keywords = []
         skipped_keywords = []
+        added_normalized = set()
         
         for keyword_data in keywords_list:
             if isinstance(keyword_data, str):
@@ -175,10 +456,14 @@ def add_keywords_to_project(project_id):
             if not keyword_text:
                 continue
             
-            # Check if keyword already exists for this project
-            existing_keyword = KeywordQueue.query.filter_by(
+            # Check if keyword already exists for this project (or earlier in the list)
+            normalized = normalize_keyword(keyword_text)
+            existing_keyword = normalized in added_normalized or KeywordQueue.query.filter_by(
+                project_id=project_id,
+                normalized_keyword=normalized
+            ).first() or KeywordArchive.query.filter_by(
                 project_id=project_id,
-                keyword=keyword_text
+                normalized_keyword=normalized
             ).first()
             
             if existing_keyword:
@@ -197,6 +482,7 @@ def add_keywords_to_project(project_id):
             
             db.session.add(keyword)
             added_keywords.append(keyword_text)
+            added_normalized.add(normalized)
         
         db.session.commit()
         
@@ -215,21 +501,197 @@ def add_keywords_to_project(project_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@projects_api_bp.route('/api/projects/<int:project_id>/keywords/import', methods=['POST'])
+def import_keywords_to_project(project_id):
+    """
+    Bulk-add keywords from a CSV or JSONL upload - the request body, or a multipart 'file'.
+    The format is ?format=csv|jsonl, or taken from the file name or content type.
+    Keywords already queued for the project are skipped and counted as duplicates.
+    """
+    try:
+        project = Project.query.get_or_404(project_id)
+        
+        upload = request.files.get('file') if request.mimetype == 'multipart/form-data' else None
+        if upload is not None:
+            stream, fmt = upload.stream, import_format(request.args.get('format'), upload.filename, upload.mimetype)
+        else:
+            stream, fmt = request.stream, import_format(request.args.get('format'), None, request.mimetype)
+        if fmt is None:
+            return jsonify({'success': False, 'error': 'Upload format must be csv or jsonl'}), 400
+        
+        # Queue for the requested schedule, or the project's default one
+        schedule_id = request.args.get('schedule_id', type=int)
+        if schedule_id is not None:
+            schedule = Schedule.query.filter_by(id=schedule_id, project_id=project.id).first()
+            if schedule is None:
+                return jsonify({'success': False, 'error': 'Schedule not found in this project'}), 400
+        else:
+            schedule = Schedule.query.filter_by(project_id=project.id, is_active=True).first()
+        
+        result = import_keywords(project.id, schedule.id if schedule else None, stream, fmt)
+        
+        return jsonify({
+            'success': result.aborted is None,
+            'message': f'Added {result.inserted} keywords, skipped {result.duplicates} duplicates '
+                       f'and {result.invalid} invalid lines',
+            **result.to_dict()
+        }), 200 if result.aborted is None else 400
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in import_keywords_to_project: {type(e).__name__}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def _bulk_schedule_id(project_id, data):
+    """The optional schedule_id of a bulk operation - ValueError unless it's one of the project's schedules"""
+    schedule_id = data.get('schedule_id')
+    if schedule_id is None:
+        return None
+    if not isinstance(schedule_id, int) or Schedule.query.filter_by(id=schedule_id, project_id=project_id).first() is None:
+        raise ValueError('Schedule not found in this project')
+    return schedule_id
+
+
+@projects_api_bp.route('/api/keywords/reset-expired', methods=['POST'])
+def reset_expired():
+    """Release keywords whose lease expired back to pending (dead letter once out of attempts) - {"project_id"} optional"""
+    try:
+        data = request.get_json(silent=True) or {}
+        project_id = data.get('project_id')
+        if project_id is not None and not isinstance(project_id, int):
+            return jsonify({'success': False, 'error': 'project_id must be an integer'}), 400
+        
+        return jsonify({'success': True, **reset_expired_keywords(project_id)})
+        
+    except Exception as e:
+        print(f"Error in reset_expired: {type(e).__name__}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@projects_api_bp.route('/api/keywords/archive', methods=['POST'])
+def archive_keywords():
+    """
+    Move the keywords that finished before the retention window, with their articles, to the archive
+    tables now - {"retention_days"} optional, ARCHIVE_RETENTION_DAYS by default
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        retention_days = data.get('retention_days', archive_retention_days)
+        if not isinstance(retention_days, int) or retention_days < 0:
+            return jsonify({'success': False, 'error': 'retention_days must be a non-negative integer'}), 400
+        
+        return jsonify({'success': True, **archive_finished_keywords(retention_days)})
+        
+    except Exception as e:
+        print(f"Error in archive_keywords: {type(e).__name__}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@projects_api_bp.route('/api/keywords/retry', methods=['POST'])
+def retry_failed():
+    """
+    Queue failed and dead letter keywords again, with their attempts reset -
+    {"project_id", "schedule_id", "error_class": "transient" | "permanent"}, all optional
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        project_id = data.get('project_id')
+        error_class = data.get('error_class')
+        if project_id is not None and not isinstance(project_id, int):
+            return jsonify({'success': False, 'error': 'project_id must be an integer'}), 400
+        if error_class not in (None, ERROR_TRANSIENT, ERROR_PERMANENT):
+            return jsonify({'success': False, 'error': f'error_class must be {ERROR_TRANSIENT} or {ERROR_PERMANENT}'}), 400
+        if data.get('schedule_id') is not None and project_id is None:
+            return jsonify({'success': False, 'error': 'schedule_id needs a project_id'}), 400
+        try:
+            schedule_id = _bulk_schedule_id(project_id, data)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        retried = retry_failed_keywords(project_id, schedule_id, error_class)
+        return jsonify({'success': True, 'retried': retried})
+        
+    except Exception as e:
+        print(f"Error in retry_failed: {type(e).__name__}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@projects_api_bp.route('/api/projects/<int:project_id>/keywords/pause', methods=['POST'])
+def pause_project_keywords(project_id):
+    """Pause the project's pending keywords - or one schedule's, {"schedule_id"}"""
+    return _set_project_keywords_paused(project_id, True)
+
+
+@projects_api_bp.route('/api/projects/<int:project_id>/keywords/resume', methods=['POST'])
+def resume_project_keywords(project_id):
+    """Resume the project's paused keywords - or one schedule's, {"schedule_id"}"""
+    return _set_project_keywords_paused(project_id, False)
+
+
+def _set_project_keywords_paused(project_id, paused):
+    try:
+        project = Project.query.get_or_404(project_id)
+        data = request.get_json(silent=True) or {}
+        try:
+            schedule_id = _bulk_schedule_id(project.id, data)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        changed = set_keywords_paused(project.id, paused, schedule_id)
+        return jsonify({'success': True, 'paused' if paused else 'resumed': changed})
+        
+    except Exception as e:
+        print(f"Error in _set_project_keywords_paused: {type(e).__name__}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@projects_api_bp.route('/api/projects/<int:project_id>/keywords/priority', methods=['POST'])
+def set_project_keywords_priority(project_id):
+    """
+    Set the priority of the project's keywords -
+    {"priority", "keyword_ids": [...], "schedule_id", "statuses": [...]}, all but priority optional
+    """
+    try:
+        project = Project.query.get_or_404(project_id)
+        data = request.get_json(silent=True) or {}
+        
+        priority = data.get('priority')
+        keyword_ids = data.get('keyword_ids')
+        statuses = data.get('statuses')
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            return jsonify({'success': False, 'error': 'priority must be an integer'}), 400
+        if keyword_ids is not None and (not isinstance(keyword_ids, list)
+                                        or not all(isinstance(keyword_id, int) for keyword_id in keyword_ids)):
+            return jsonify({'success': False, 'error': 'keyword_ids must be a list of integers'}), 400
+        if statuses is not None and (not isinstance(statuses, list)
+                                     or not all(status in KEYWORD_STATUSES for status in statuses)):
+            return jsonify({'success': False, 'error': f'statuses must be a list of {", ".join(KEYWORD_STATUSES)}'}), 400
+        try:
+            schedule_id = _bulk_schedule_id(project.id, data)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        updated = set_keywords_priority(project.id, priority, keyword_ids, schedule_id, statuses)
+        return jsonify({'success': True, 'updated': updated})
+        
+    except Exception as e:
+        print(f"Error in set_project_keywords_priority: {type(e).__name__}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @projects_api_bp.route('/api/dashboard', methods=['GET'])
 def get_dashboard_stats():
     """Get dashboard statistics"""
     try:
         # Overall statistics
-        total_projects = Project.query.count()
-        active_projects = Project.query.filter_by(status='active').count()
-        
-        total_keywords = KeywordQueue.query.count()
-        pending_keywords = KeywordQueue.query.filter_by(status='pending').count()
-        processing_keywords = KeywordQueue.query.filter_by(status='processing').count()
-        completed_keywords = KeywordQueue.query.filter_by(status='completed').count()
-        failed_keywords = KeywordQueue.query.filter_by(status='failed').count()
-        
-        total_articles = Article.query.count()
+        stats = queue_stats(datetime.now(timezone.utc))
         
         # Recent activity
         recent_articles = Article.query.order_by(Article.created_at.desc()).limit(5).all()
@@ -239,19 +701,20 @@ def get_dashboard_stats():
             'success': True,
             'stats': {
                 'projects': {
-                    'total': total_projects,
-                    'active': active_projects,
-                    'inactive': total_projects - active_projects
+                    'total': stats['total_projects'],
+                    'active': stats['active_projects'],
+                    'inactive': stats['total_projects'] - stats['active_projects']
                 },
                 'keywords': {
-                    'total': total_keywords,
-                    'pending': pending_keywords,
-                    'processing': processing_keywords,
-                    'completed': completed_keywords,
-                    'failed': failed_keywords
+                    'total': stats['total_keywords'],
+                    'pending': stats['pending_keywords'],
+                    'processing': stats['processing_keywords'],
+                    'completed': stats['completed_keywords'],
+                    'failed': stats['failed_keywords'],
+                    'dead_letter': stats['dead_letter_keywords']
                 },
                 'articles': {
-                    'total': total_articles
+                    'total': stats['total_articles']
                 }
             },
             'recent_activity': {
@@ -263,4 +726,21 @@ def get_dashboard_stats():
     except Exception as e:
         print(f"Error in get_dashboard_stats: {type(e).__name__}: {str(e)}")
         traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@projects_api_bp.route('/api/scheduler/fairness', methods=['GET'])
+def get_scheduler_fairness():
+    """Get per-project wait-time metrics of the scheduler (?hours=24)"""
+    try:
+        hours = request.args.get('hours', 24, type=int)
+        
+        return jsonify({
+            'success': True,
+            'fairness': get_fairness_metrics(hours)
+        })
+        
+    except Exception as e:
+        print(f"Error in get_scheduler_fairness: {type(e).__name__}: {str(e)}")
+        traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
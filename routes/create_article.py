@@ -15,442 +15,528 @@ from modules.anchors.anchors_genreral import *
 create_article_bp = Blueprint('create-article', __name__)
 
 
-def create_article_logic(main_project_id,
-                         main_keyword,
-                         main_engine,
-                         main_language,
-                         site
-                         ):
-    """
-    Does all the neuron and GPT logic for creating the article.
-    Returns (response_dict, status_code).
-    """
-    # The code that was in create_article() goes here,
-    # except you replace 'request.form.get(...)' with direct parameters,
-    # and remove any Flask references.
+###################################
+# article creation process
+###################################
 
-    ###################################
-    # article creation process
-    ###################################
 
+#################################################################
+#################################################################
+# create a neuron query, and get query results
+#################################################################
+#################################################################
 
-    #################################################################
-    #################################################################
-    # create a neuron query, and get query results
-    #################################################################
-    #################################################################
+def neuron_create_and_get_query(
+        main_project_id,
+        main_keyword,
+        main_engine,
+        main_language
+):
 
-    def neuron_create_and_get_query(
-            main_project_id,
-            main_keyword,
-            main_engine,
-            main_language
-    ):
+    main_search_keyword_terms = sentence_to_multiline(main_keyword)
 
-        main_search_keyword_terms = sentence_to_multiline(main_keyword)
+    ##########################################
+    # make a new query with neuron
+    ##########################################
 
-        ##########################################
-        # make a new query with neuron
-        ##########################################
+    # make a new query with neuron
+    new_query_response = neuron_new_query(main_project_id, main_keyword, main_engine, main_language)
 
-        # make a new query with neuron
-        new_query_response = neuron_new_query(main_project_id, main_keyword, main_engine, main_language)
+    main_query_id = new_query_response['query']
 
-        main_query_id = new_query_response['query']
+    # sleep for 65 seconds (a new query usually takes around 60 seconds until it's finished,
+    # according to the neuron documentation)
+    print(f'response for new neuron query creation: {new_query_response} '
+          f'\nsleeping for 65 seconds, to wait for the query to be ready.')
+    time.sleep(65)
 
-        # sleep for 65 seconds (a new query usually takes around 60 seconds until it's finished,
-        # according to the neuron documentation)
-        print(f'response for new neuron query creation: {new_query_response} '
-              f'\nsleeping for 65 seconds, to wait for the query to be ready.')
-        time.sleep(65)
+    ##########################################
+    # get query results from neuron
+    ##########################################
 
-        ##########################################
-        # get query results from neuron
-        ##########################################
+    start_time = time.time()  # Track when the loop started
 
-        start_time = time.time()  # Track when the loop started
+    while True:
+        # 1. Call the function to get current status
+        neuron_query_response_data = neuron_get_query(main_query_id)
+        status = neuron_query_response_data.get("status", "").lower()  # Convert to lowercase for consistency
 
-        while True:
-            # 1. Call the function to get current status
-            neuron_query_response_data = neuron_get_query(main_query_id)
-            status = neuron_query_response_data.get("status", "").lower()  # Convert to lowercase for consistency
+        # 2. Check the status
+        if status in ["waiting", "in progress"]:
+            elapsed_time = time.time() - start_time
 
-            # 2. Check the status
-            if status in ["waiting", "in progress"]:
-                elapsed_time = time.time() - start_time
+            # If 120 seconds have passed, exit the loop
+            if elapsed_time >= 120:
+                print("Exceeded 120 seconds. Stopping the loop.")
+                break
 
-                # If 120 seconds have passed, exit the loop
-                if elapsed_time >= 120:
-                    print("Exceeded 120 seconds. Stopping the loop.")
-                    break
+            print(f"Status is '{status}'. Waiting 10 seconds before checking again...")
+            time.sleep(10)
 
-                print(f"Status is '{status}'. Waiting 10 seconds before checking again...")
-                time.sleep(10)
+        elif status == "ready":
+            # Status is "ready" -> proceed with next steps
+            print("Status is 'ready'. Proceeding with the rest of the program...")
+            break  # Continue after the loop
 
-            elif status == "ready":
-                # Status is "ready" -> proceed with next steps
-                print("Status is 'ready'. Proceeding with the rest of the program...")
-                break  # Continue after the loop
+        elif status == "not found":
+            # Status is "not found" -> print a message and exit main()
+            print("Status is 'not found'. Exiting main() function.")
+            return  # or sys.exit(1), if preferred
 
-            elif status == "not found":
-                # Status is "not found" -> print a message and exit main()
-                print("Status is 'not found'. Exiting main() function.")
-                return  # or sys.exit(1), if preferred
+        else:
+            # Handle any unexpected status if needed
+            print(f"Received unexpected status '{status}'. Exiting.")
+            break
 
-            else:
-                # Handle any unexpected status if needed
-                print(f"Received unexpected status '{status}'. Exiting.")
-                break
+        # Continue next steps here (only if status was "ready" or we timed out).
+    print("Continuing with the rest of the code...")
 
-            # Continue next steps here (only if status was "ready" or we timed out).
-        print("Continuing with the rest of the code...")
+    return_dict = {
+        "neuron_query_response_data": neuron_query_response_data,
+        "main_query_id": main_query_id,
+        "main_search_keyword_terms": main_search_keyword_terms,
+    }
 
-        return_dict = {
-            "neuron_query_response_data": neuron_query_response_data,
-            "main_query_id": main_query_id,
-            "main_search_keyword_terms": main_search_keyword_terms,
-        }
+    return return_dict
 
-        return return_dict
+#################################################################
+#################################################################
+# create title, meta-description, article, and upload to neuron
+# - for initial content evaluation
+#################################################################
+#################################################################
 
-    #################################################################
-    #################################################################
-    # create title, meta-description, article, and upload to neuron
-    # - for initial content evaluation
-    #################################################################
-    #################################################################
+def neuron_create_title_desc_article(
+        neuron_query_dict
+):
+    ##########################################
+    # extract neuron_query_dict
+    ##########################################
 
-    def neuron_create_title_desc_article(
-            neuron_query_dict
-    ):
-        ##########################################
-        # extract neuron_query_dict
-        ##########################################
+    neuron_query_response_data = neuron_query_dict["neuron_query_response_data"]
+    main_search_keyword_terms = neuron_query_dict["main_search_keyword_terms"]
+    main_query_id = neuron_query_dict["main_query_id"]
 
-        neuron_query_response_data = neuron_query_dict["neuron_query_response_data"]
-        main_search_keyword_terms = neuron_query_dict["main_search_keyword_terms"]
-        main_query_id = neuron_query_dict["main_query_id"]
+    ##########################################
+    # create title with GPT
+    ##########################################
 
-        ##########################################
-        # create title with GPT
-        ##########################################
+    main_title_terms = neuron_query_response_data['terms']['title']
 
-        main_title_terms = neuron_query_response_data['terms']['title']
+    main_article_title = gpt_generate_title(
+        openai_model,
+        main_title_terms,
+        main_search_keyword_terms
+    )
 
-        main_article_title = gpt_generate_title(
-            openai_model,
-            main_title_terms,
-            main_search_keyword_terms
-        )
+    ##########################################
+    # create meta-description with GPT
+    ##########################################
 
-        ##########################################
-        # create meta-description with GPT
-        ##########################################
+    main_description_terms = neuron_query_response_data['terms']["desc"]
 
-        main_description_terms = neuron_query_response_data['terms']["desc"]
+    main_article_description = gpt_generate_description(
+        openai_model,
+        main_description_terms,
+        main_search_keyword_terms
+    )
 
-        main_article_description = gpt_generate_description(
-            openai_model,
-            main_description_terms,
-            main_search_keyword_terms
-        )
+    ##########################################
+    # create article with GPT
+    ##########################################
 
-        ##########################################
-        # create article with GPT
-        ##########################################
+    # h1 h2 terms - objects array
+    main_h1_terms = neuron_query_response_data['terms']["h1"]
+    main_h2_terms = neuron_query_response_data['terms']["h2"]
 
-        # h1 h2 terms - objects array
-        main_h1_terms = neuron_query_response_data['terms']["h1"]
-        main_h2_terms = neuron_query_response_data['terms']["h2"]
+    # terms - string formatted
+    title_terms_string = objects_array_to_multiline(main_title_terms)
+    # description_terms_string = objects_array_to_multiline(main_description_terms)
+    h1_terms_string = objects_array_to_multiline(main_h1_terms)
+    h2_terms_string = objects_array_to_multiline(main_h2_terms)
 
-        # terms - string formatted
-        title_terms_string = objects_array_to_multiline(main_title_terms)
-        # description_terms_string = objects_array_to_multiline(main_description_terms)
-        h1_terms_string = objects_array_to_multiline(main_h1_terms)
-        h2_terms_string = objects_array_to_multiline(main_h2_terms)
+    # content terms
+    content_basic_terms = neuron_query_response_data['terms']['content_basic']
+    content_extended_terms = neuron_query_response_data['terms']['content_extended']
 
-        # content terms
-        content_basic_terms = neuron_query_response_data['terms']['content_basic']
-        content_extended_terms = neuron_query_response_data['terms']['content_extended']
+    all_content_terms = content_basic_terms + content_extended_terms
 
-        all_content_terms = content_basic_terms + content_extended_terms
+    main_content_terms = format_terms_with_usage(
+        all_content_terms
+    )
 
-        main_content_terms = format_terms_with_usage(
-            all_content_terms
-        )
+    # create main article with GPT
+    main_article_content = gpt_generate_article(
+        openai_model,
+        title_terms_string,
+        h1_terms_string,
+        h2_terms_string,
+        main_content_terms
+    )
 
-        # create main article with GPT
-        main_article_content = gpt_generate_article(
-            openai_model,
-            title_terms_string,
-            h1_terms_string,
-            h2_terms_string,
-            main_content_terms
-        )
+    ######################################################################
+    # upload initial article to neuron writer API, and get initial score
+    ######################################################################
 
-        ######################################################################
-        # upload initial article to neuron writer API, and get initial score
-        ######################################################################
+    import_content_response = neuron_import_content(
+        main_query_id,
+        main_article_content,
+        main_article_title,
+        main_article_description
+    )
 
-        import_content_response = neuron_import_content(
-            main_query_id,
-            main_article_content,
-            main_article_title,
-            main_article_description
-        )
+    return_dict = {
+        "main_article_title": main_article_title,
+        "main_article_description": main_article_description,
+        "main_article_content": main_article_content,
+        "import_content_response": import_content_response,
+        "h1_terms_string": h1_terms_string,
+        "h2_terms_string": h2_terms_string,
+        "main_search_keyword_terms": main_search_keyword_terms,
+        "main_query_id": main_query_id,
+        "neuron_query_response_data": neuron_query_response_data
+    }
 
-        return_dict = {
-            "main_article_title": main_article_title,
-            "main_article_description": main_article_description,
-            "main_article_content": main_article_content,
-            "import_content_response": import_content_response,
-            "h1_terms_string": h1_terms_string,
-            "h2_terms_string": h2_terms_string,
-            "main_search_keyword_terms": main_search_keyword_terms,
-            "main_query_id": main_query_id,
-            "neuron_query_response_data": neuron_query_response_data
-        }
+    return return_dict
+
+#################################################################
+#################################################################
+# content optimization process -
+# optimize h1 h2 headlines,
+# careful switching of new headlines for old ones
+# addition of grey terms (terms not used)
+# removal of red terms (terms to use less)
+#################################################################
+#################################################################
+
+def content_optimization_process(
+        content_and_terms_dict,
+        site,
+):
+
+    result_dict = {
+        'success': False
+    }
 
-        return return_dict
+    ##########################################
+    # extract content_and_terms_dict
+    ##########################################
 
-    #################################################################
-    #################################################################
-    # content optimization process -
-    # optimize h1 h2 headlines,
-    # careful switching of new headlines for old ones
-    # addition of grey terms (terms not used)
-    # removal of red terms (terms to use less)
-    #################################################################
-    #################################################################
+    main_article_title = content_and_terms_dict['main_article_title']
+    main_article_description = content_and_terms_dict['main_article_description']
 
-    def content_optimization_process(
-            content_and_terms_dict,
-            site,
+    h1_terms_string = content_and_terms_dict['h1_terms_string']
+    h2_terms_string = content_and_terms_dict['h2_terms_string']
+
+    main_article_content = content_and_terms_dict['main_article_content']
+    main_search_keyword_terms = content_and_terms_dict['main_search_keyword_terms']
+
+    import_content_response = content_and_terms_dict['import_content_response']
+    main_query_id = content_and_terms_dict['main_query_id']
+
+    neuron_query_response_data = content_and_terms_dict['neuron_query_response_data']
+
+    main_h1_h2_terms = f'H1 TERMS:\n' \
+                       f'{h1_terms_string}' \
+                       f'\n\n' \
+                       f'H2 TERMS:' \
+                       f'{h2_terms_string}'
+
+    ##########################################
+    # optimize headings
+    ##########################################
+
+    current_score = import_content_response["content_score"]
+
+    def optimize_headings(
+            main_article_content,
+            current_score
     ):
+        # anchor texts
+        rules_str, anchors_str = load_rules_and_anchors(
+            anchors_config_path,
+            site,
+        )
 
-        result_dict = {
-            'success': False
-        }
+        # optimize headings
+        main_optimized_headings = gpt_optimize_headings(
+            openai_model,
+            main_article_content,
+            main_h1_h2_terms,
+            main_search_keyword_terms,
+            rules_str,
+            anchors_str,
+            site
+        )
 
-        ##########################################
-        # extract content_and_terms_dict
-        ##########################################
+        # switch headings
+        updated_html_content_dict = switch_headings(
+            main_article_content,
+            main_optimized_headings,
+            current_score,
+            main_query_id,
+            main_article_title,
+            main_article_description
+        )
 
-        main_article_title = content_and_terms_dict['main_article_title']
-        main_article_description = content_and_terms_dict['main_article_description']
+        print(updated_html_content_dict['message'])
 
-        h1_terms_string = content_and_terms_dict['h1_terms_string']
-        h2_terms_string = content_and_terms_dict['h2_terms_string']
+        updated_html_content = updated_html_content_dict['updated_html_content']
 
-        main_article_content = content_and_terms_dict['main_article_content']
-        main_search_keyword_terms = content_and_terms_dict['main_search_keyword_terms']
+        if updated_html_content_dict['success'] is False:
+            return result_dict
 
-        import_content_response = content_and_terms_dict['import_content_response']
-        main_query_id = content_and_terms_dict['main_query_id']
+        # update result dict result
+        result_dict['success'] = True
+        result_dict['updated_html_content'] = updated_html_content
 
-        neuron_query_response_data = content_and_terms_dict['neuron_query_response_data']
+        print(f'html content with improved headings inserted:'
+              f'\n{updated_html_content}')
 
-        main_h1_h2_terms = f'H1 TERMS:\n' \
-                           f'{h1_terms_string}' \
-                           f'\n\n' \
-                           f'H2 TERMS:' \
-                           f'{h2_terms_string}'
+        # evaluate content (it's already uploaded we just need to get the score)
 
-        ##########################################
-        # optimize headings
-        ##########################################
-
-        current_score = import_content_response["content_score"]
-
-        def optimize_headings(
-                main_article_content,
-                current_score
-        ):
-            # anchor texts
-            rules_str, anchors_str = load_rules_and_anchors(
-                anchors_config_path,
-                site,
-            )
+        new_evaluate_content_response = neuron_evaluate_content(
+            main_query_id,
+            updated_html_content,
+            main_article_title,
+            main_article_description
+        )
 
-            # optimize headings
-            main_optimized_headings = gpt_optimize_headings(
-                openai_model,
-                main_article_content,
-                main_h1_h2_terms,
-                main_search_keyword_terms,
-                rules_str,
-                anchors_str,
-                site
-            )
+        current_score = new_evaluate_content_response['content_score']
 
-            # switch headings
-            updated_html_content_dict = switch_headings(
-                main_article_content,
-                main_optimized_headings,
-                current_score,
-                main_query_id,
-                main_article_title,
-                main_article_description
-            )
+        return updated_html_content, current_score
 
-            print(updated_html_content_dict['message'])
+    # 2 rounds of headings optimizations
+    print(f'\nheadings optimization round 1:\n')
+    updated_html_content, current_score = optimize_headings(
+        main_article_content,
+        current_score)
+    '''
+    print(f'\nheadings optimization round 2:\n')
+    updated_html_content,current_score = optimize_headings(
+        updated_html_content,
+        current_score
+    )
+    '''
 
-            updated_html_content = updated_html_content_dict['updated_html_content']
+    ##########################################
+    # optimize for terms not used (grey terms)
+    ##########################################
 
-            if updated_html_content_dict['success'] is False:
-                return result_dict
+    main_terms_not_used = get_terms_not_used(
+        updated_html_content,
+        neuron_query_response_data
+    )
 
-            # update result dict result
-            result_dict['success'] = True
-            result_dict['updated_html_content'] = updated_html_content
+    if len(main_terms_not_used) > 0:
 
-            print(f'html content with improved headings inserted:'
-                  f'\n{updated_html_content}')
+        updated_html_content = gpt_add_terms_not_used(
+            openai_model,
+            updated_html_content,
+            main_terms_not_used
+        )
 
-            # evaluate content (it's already uploaded we just need to get the score)
+        # evaluate optimized content
+        new_evaluate_content_response = neuron_evaluate_content(
+            main_query_id,
+            updated_html_content,
+            main_article_title,
+            main_article_description
+        )
 
-            new_evaluate_content_response = neuron_evaluate_content(
+        # compare old score to new score -
+        # if the score was not downgraded, upload new version
+        if current_score <= new_evaluate_content_response['content_score']:
+            neuron_import_content(
                 main_query_id,
                 updated_html_content,
                 main_article_title,
                 main_article_description
             )
-
+            # set current score to new score
             current_score = new_evaluate_content_response['content_score']
+    else:
+        print('\nfound 0 terms not used (grey) - skipping grey term optimization process\n')
 
-            return updated_html_content, current_score
+    #############################################
+    # optimize for terms to use less (red terms)
+    #############################################
 
-        # 2 rounds of headings optimizations
-        print(f'\nheadings optimization round 1:\n')
-        updated_html_content, current_score = optimize_headings(
-            main_article_content,
-            current_score)
-        '''
-        print(f'\nheadings optimization round 2:\n')
-        updated_html_content,current_score = optimize_headings(
-            updated_html_content,
-            current_score
+    print(f'\nfirst round of red-terms reduction\n')
+
+    main_terms_to_use_less = get_terms_used_excessively(
+        updated_html_content,
+        neuron_query_response_data
+    )
+
+    # if no red terms found (list length is 0),
+    # #then skip the red-terms optimization step
+    if len(main_terms_to_use_less) > 0:
+        main_terms_to_reduce_string = format_use_less_objects(
+            main_terms_to_use_less
         )
-        '''
 
-        ##########################################
-        # optimize for terms not used (grey terms)
-        ##########################################
+        updated_html_content = gpt_reduce_terms(
+            openai_model,
+            updated_html_content,
+            main_terms_to_reduce_string
+        )
 
-        main_terms_not_used = get_terms_not_used(
+        # import optimized content (it's best to optimize the content for reduced red terms - terms to use less)
+        new_evaluate_content_response = neuron_import_content(
+            main_query_id,
             updated_html_content,
-            neuron_query_response_data
+            main_article_title,
+            main_article_description
         )
+    else:
+        print(f'\nfound 0 red terms - skipping red term optimization process\n')
 
-        if len(main_terms_not_used) > 0:
+    # **********************************************
+    # second round of red-terms reduction:
+    # **********************************************
 
-            updated_html_content = gpt_add_terms_not_used(
-                openai_model,
-                updated_html_content,
-                main_terms_not_used
-            )
+    print(f'\n2nd round of red-terms reduction\n')
 
-            # evaluate optimized content
-            new_evaluate_content_response = neuron_evaluate_content(
-                main_query_id,
-                updated_html_content,
-                main_article_title,
-                main_article_description
-            )
+    main_terms_to_use_less = get_terms_used_excessively(
+        updated_html_content,
+        neuron_query_response_data
+    )
 
-            # compare old score to new score -
-            # if the score was not downgraded, upload new version
-            if current_score <= new_evaluate_content_response['content_score']:
-                neuron_import_content(
-                    main_query_id,
-                    updated_html_content,
-                    main_article_title,
-                    main_article_description
-                )
-                # set current score to new score
-                current_score = new_evaluate_content_response['content_score']
-        else:
-            print('\nfound 0 terms not used (grey) - skipping grey term optimization process\n')
+    # if no red terms found (list length is 0),
+    # #then skip the red-terms optimization step
+    if len(main_terms_to_use_less) > 0:
 
-        #############################################
-        # optimize for terms to use less (red terms)
-        #############################################
+        main_terms_to_reduce_string = format_use_less_objects(
+            main_terms_to_use_less
+        )
 
-        print(f'\nfirst round of red-terms reduction\n')
+        updated_html_content = gpt_reduce_terms(
+            openai_model,
+            updated_html_content,
+            main_terms_to_reduce_string
+        )
 
-        main_terms_to_use_less = get_terms_used_excessively(
+        # import optimized content (it's best to optimize the content for reduced red terms - terms to use less)
+        new_evaluate_content_response = neuron_import_content(
+            main_query_id,
             updated_html_content,
-            neuron_query_response_data
+            main_article_title,
+            main_article_description
         )
+    else:
+        print(f'\nfound 0 red terms - skipping red term optimization process\n')
+
+    return_dict = {
+        'main_article_title': main_article_title,
+        'main_article_description': main_article_description,
+        'updated_html_content': updated_html_content,
+        'content_score': int(new_evaluate_content_response['content_score']
+                             if new_evaluate_content_response
+                             else current_score)
+    }
 
-        # if no red terms found (list length is 0),
-        # #then skip the red-terms optimization step
-        if len(main_terms_to_use_less) > 0:
-            main_terms_to_reduce_string = format_use_less_objects(
-                main_terms_to_use_less
-            )
+    return return_dict
 
-            updated_html_content = gpt_reduce_terms(
-                openai_model,
-                updated_html_content,
-                main_terms_to_reduce_string
-            )
 
-            # import optimized content (it's best to optimize the content for reduced red terms - terms to use less)
-            new_evaluate_content_response = neuron_import_content(
-                main_query_id,
-                updated_html_content,
-                main_article_title,
-                main_article_description
-            )
-        else:
-            print(f'\nfound 0 red terms - skipping red term optimization process\n')
+#################################################################
+#################################################################
+# stages of the article creation -
+# each stage's output (saved as a checkpoint) is the next one's input
+#################################################################
+#################################################################
 
-        # **********************************************
-        # second round of red-terms reduction:
-        # **********************************************
+ARTICLE_STAGES = ['neuron_query', 'draft', 'optimized']
 
-        print(f'\n2nd round of red-terms reduction\n')
 
-        main_terms_to_use_less = get_terms_used_excessively(
-            updated_html_content,
-            neuron_query_response_data
-        )
+class InMemoryCheckpoints:
+    """Checkpoint store for a run that doesn't need to be resumed"""
 
-        # if no red terms found (list length is 0),
-        # #then skip the red-terms optimization step
-        if len(main_terms_to_use_less) > 0:
+    def __init__(self):
+        self._data = {}
 
-            main_terms_to_reduce_string = format_use_less_objects(
-                main_terms_to_use_less
-            )
+    def get(self, stage):
+        return self._data.get(stage)
 
-            updated_html_content = gpt_reduce_terms(
-                openai_model,
-                updated_html_content,
-                main_terms_to_reduce_string
-            )
+    def save(self, stage, data):
+        self._data[stage] = data
 
-            # import optimized content (it's best to optimize the content for reduced red terms - terms to use less)
-            new_evaluate_content_response = neuron_import_content(
-                main_query_id,
-                updated_html_content,
-                main_article_title,
-                main_article_description
-            )
-        else:
-            print(f'\nfound 0 red terms - skipping red term optimization process\n')
 
-        return_dict = {
-            'main_article_title': main_article_title,
-            'main_article_description': main_article_description,
-            'updated_html_content': updated_html_content,
-            'content_score': int(new_evaluate_content_response['content_score']
-                                 if new_evaluate_content_response
-                                 else current_score)
-        }
+def run_article_stage(stage,
+                      checkpoints,
+                      main_project_id,
+                      main_keyword,
+                      main_engine,
+                      main_language,
+                      site,
+                      on_progress=None
+                      ):
+    """
+    Runs one stage of the article creation, with the previous stage's saved output as its input.
+    checkpoints - store with get(stage) / save(stage, data), e.g. database_checkpoints.KeywordCheckpoints.
+    A stage that already has a saved output is not run again.
+    Returns the stage output.
+    """
+    saved = checkpoints.get(stage)
+    if saved is not None:
+        print(f"Resuming '{stage}' from its checkpoint.")
+        return saved
+
+    if stage == 'neuron_query':
+        # make neuron query, and get query result
+        result = neuron_create_and_get_query(
+            main_project_id,
+            main_keyword,
+            main_engine,
+            main_language
+        )
+        # the query can come back unfinished (its wait timed out) or not at all - such a
+        # result must not be checkpointed, a retry would resume from it without the terms
+        status = ((result or {}).get('neuron_query_response_data') or {}).get('status', '')
+        if status.lower() != 'ready':
+            raise TimeoutError(f"Neuron query for '{main_keyword}' is not ready (status: '{status}')")
+    elif stage == 'draft':
+        # with GPT, create: title, meta-description, article content
+        # upload all the content to neuron, to get an initial valuation
+        result = neuron_create_title_desc_article(
+            checkpoints.get('neuron_query')
+        )
+    elif stage == 'optimized':
+        result = content_optimization_process(
+            checkpoints.get('draft'),
+            site
+        )
+    else:
+        raise ValueError(f"Unknown article stage '{stage}'")
+
+    if result:
+        checkpoints.save(stage, result)
+    if on_progress:
+        on_progress()
+    return result
+
+
+def create_article_logic(main_project_id,
+                         main_keyword,
+                         main_engine,
+                         main_language,
+                         site,
+                         on_progress=None,
+                         checkpoints=None
+                         ):
+    """
+    Does all the neuron and GPT logic for creating the article.
+    on_progress (optional) is called after each step, e.g. to renew a keyword's lease.
+    checkpoints (optional, e.g. database_checkpoints.KeywordCheckpoints) - each step's output
+    is saved there, and a step that already has a saved output is not run again.
+    Returns (response_dict, status_code).
+    """
+    # The code that was in create_article() goes here,
+    # except you replace 'request.form.get(...)' with direct parameters,
+    # and remove any Flask references.
 
-        return return_dict
+    if checkpoints is None:
+        checkpoints = InMemoryCheckpoints()
 
     #################################################################
     #################################################################
@@ -458,32 +544,22 @@ def create_article_logic(main_project_id,
     #################################################################
     #################################################################
 
-    # make neuron query, and get query result
-    neuron_response_dict = neuron_create_and_get_query(
-        main_project_id,
-        main_keyword,
-        main_engine,
-        main_language
-    )
-
-    # print the result
-    print(f'\n{neuron_response_dict}\n')
-
-    #################################################################
-    # with GPT, create: title, meta-description, article content
-    # upload all the content to neuron, to get an initial valuation
-    initial_content_evaluation = neuron_create_title_desc_article(
-        neuron_response_dict
-    )
+    for stage in ARTICLE_STAGES:
+        stage_result = run_article_stage(
+            stage,
+            checkpoints,
+            main_project_id,
+            main_keyword,
+            main_engine,
+            main_language,
+            site,
+            on_progress
+        )
 
-    # print the result
-    print(f'\n{initial_content_evaluation}\n')
+        # print the result
+        print(f'\n{stage_result}\n')
 
-    #################################################################
-    optimized_content_dict = content_optimization_process(
-        initial_content_evaluation,
-        site
-    )
+    optimized_content_dict = checkpoints.get('optimized')
 
     response_data = {
         'success': True,
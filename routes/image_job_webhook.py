@@ -0,0 +1,57 @@
+
+from flask import Blueprint, jsonify, request
+import traceback
+
+from configs import *
+
+from modules.third_party_modules.midjourney.imagine_api_dev import imagine_job_poller
+
+
+# Create a Blueprint
+image_job_webhook_bp = Blueprint('image-job-webhook', __name__)
+
+
+# imagineapi.dev can push image status changes here instead of us polling for them.
+# Configure the webhook URL as: https://<host>/webhooks/imagine-api?token=<IMAGE_JOB_WEBHOOK_SECRET>
+@image_job_webhook_bp.route('/webhooks/imagine-api', methods=['POST'])
+def imagine_api_webhook():
+    try:
+        ###################################
+        # Authorization
+        ###################################
+
+        if not image_job_webhook_secret:
+            return jsonify({'error': 'Not Found'}), 404
+
+        token = request.args.get('token', '')
+        auth_header = request.headers.get('Authorization')
+        if auth_header:
+            parts = auth_header.split()
+            if len(parts) == 2 and parts[0] == 'Bearer':
+                token = parts[1]
+
+        if token != image_job_webhook_secret:
+            app.logger.warning("Unauthorized image job webhook call.")
+            return jsonify({'error': 'Unauthorized'}), 401
+
+        ###################################
+        # hand the status over to the poller
+        ###################################
+
+        body = request.get_json(silent=True) or {}
+        # the image item may come wrapped as 'data' or 'payload', or unwrapped
+        image_data = body.get('data') or body.get('payload') or body
+        image_id = image_data.get('id')
+
+        if not image_id:
+            return jsonify({'success': False, 'error': 'Missing image id'}), 400
+
+        # same shape as the GET /items/images/<id> response
+        imagine_job_poller.notify(image_id, {'data': image_data})
+
+        return jsonify({'success': True}), 200
+
+    except Exception as e:
+        print(f"Error in /webhooks/imagine-api: {type(e).__name__}: {str(e)}")
+        traceback.print_exc()
+        return jsonify(error="An error occurred"), 500
@@ -21,8 +21,27 @@ def create_article_and_publish_internal(
         project_id,
         engine,
         language,
-        site
+        site,
+        keyword_id=None,
+        wp_site=None,
+        wp_user=None,
+        wp_password=None,
+        on_progress=None,
+        checkpoints=None
 ):
+    # on_progress (optional) is called after each step - the database scheduler
+    # uses it to keep the keyword's lease alive while the article is being made
+    on_progress = on_progress or (lambda: None)
+
+    # checkpoints (optional, e.g. database_checkpoints.KeywordCheckpoints) -
+    # every step's output is saved, and a retry resumes after the last saved step
+
+    # WordPress site + credentials to publish to (e.g. the project's own),
+    # falling back to the global site from configs
+    wp_site = wp_site or wordpress_site
+    wp_user = wp_user or wordpress_user
+    wp_password = wp_password or wordpress_password
+
     ##########################################################
     # pass request to a 'middle-route'
     # to handle creation of article, tite, and meta-description
@@ -36,7 +55,9 @@ def create_article_and_publish_internal(
         keyword,
         engine,
         language,
-        site
+        site,
+        on_progress,
+        checkpoints
     )
 
     # If create_article() encountered an error, just return it immediately
@@ -47,6 +68,49 @@ def create_article_and_publish_internal(
     # 2. Now do your extra “publishing” step
     data = response_data
 
+    ############################################
+    # idempotency - a retry of a keyword whose post
+    # already went out must not create a duplicate
+    ############################################
+
+    slug = wordpress_post_slug(keyword)
+    idempotency_key = publishing_idempotency_key(
+        keyword_id if keyword_id is not None else slug,
+        data['title'],
+        data['article_content']
+    )
+
+    published_checkpoint = checkpoints.get('published') if checkpoints is not None else None
+    if published_checkpoint is not None and published_checkpoint.get('idempotency_key') == idempotency_key:
+        # published by a previous attempt that failed afterwards
+        return {
+            'success': True,
+            'message': 'Article already published.',
+            'title': data['title'],
+            'content_score': data['content_score'],
+            'wordpress_post_id': published_checkpoint['wordpress_post_id'],
+            'idempotency_key': idempotency_key,
+        }
+
+    existing_post = find_existing_post(
+        wp_site,
+        wp_user,
+        wp_password,
+        slug,
+        keyword_id if keyword_id is not None else slug
+    )
+
+    if existing_post and (existing_post.get('meta') or {}).get(IDEMPOTENCY_META_KEY) == idempotency_key:
+        # exactly this content is already published - nothing to do
+        return {
+            'success': True,
+            'message': 'Article already published.',
+            'title': data['title'],
+            'content_score': data['content_score'],
+            'wordpress_post_id': existing_post['id'],
+            'idempotency_key': idempotency_key,
+        }
+
     ############################################
     # process article html
     # + AI images generation
@@ -57,33 +121,90 @@ def create_article_and_publish_internal(
     # upload them to WordPress,
     # and insert the image URLs into the article
 
-    article_html = process_article_html(
-        wordpress_site,
-        wordpress_user,
-        wordpress_password,
-        data['article_content']
-    )
+    # uploaded images of a previous attempt are reused
+    media_checkpoint = checkpoints.get('media') if checkpoints is not None else None
+
+    if media_checkpoint is not None and media_checkpoint.get('idempotency_key') == idempotency_key:
+        print("Resuming 'media' from its checkpoint.")
+        article_html = media_checkpoint['article_html']
+        media_meta_updates = media_checkpoint['media_meta_updates']
+        featured_media_id = media_checkpoint['featured_media_id']
+    else:
+        # alt/title updates of the uploaded images are collected here
+        # and sent together with the post creation
+        media_meta_updates = []
+
+        article_html = process_article_html(
+            wp_site,
+            wp_user,
+            wp_password,
+            data['article_content'],
+            media_meta_updates
+        )
+
+        ############################################
+        # create an article feature image (main image)
+        ############################################
+
+        if existing_post and existing_post.get('featured_media'):
+            # keep the featured image of the post we published before
+            featured_media_id = int(existing_post['featured_media'])
+        else:
+            featured_update = upload_featured_image(
+                wp_site,
+                wp_user,
+                wp_password,
+                keyword,
+                data['title']
+            )
+            featured_media_id = featured_update['media_id']
+            media_meta_updates.append(featured_update)
+
+        if checkpoints is not None:
+            checkpoints.save('media', {
+                'idempotency_key': idempotency_key,
+                'article_html': article_html,
+                'media_meta_updates': media_meta_updates,
+                'featured_media_id': featured_media_id,
+            })
+    on_progress()
 
     ############################################
-    # create an article feature image (main image)
-    # and upload the article to wordpress
+    # upload the article to wordpress
     ############################################
 
-    create_post_with_featured_image(
-        wordpress_site,
-        wordpress_user,
-        wordpress_password,
+    # an existing post for this keyword is updated in place
+    post = create_post_with_featured_image(
+        wp_site,
+        wp_user,
+        wp_password,
         keyword,
         data['title'],
         article_html,
         status="publish",
         meta_description=data['meta_description'],  # <- your generated meta
-        seo_plugin="yoast"  # or "rankmath"/"aioseo"/"none"
+        seo_plugin="yoast",  # or "rankmath"/"aioseo"/"none"
+        media_meta_updates=media_meta_updates,
+        slug=slug,
+        idempotency_key=idempotency_key,
+        existing_post=existing_post,
+        featured_media_id=featured_media_id
     )
 
+    if checkpoints is not None:
+        checkpoints.save('published', {
+            'wordpress_post_id': post.get('id'),
+            'idempotency_key': idempotency_key,
+        })
+
     return {
         'success': True,
-        'message': 'Article created & published successfully.',
+        'message': 'Article updated & published successfully.' if existing_post
+                   else 'Article created & published successfully.',
+        'title': data['title'],
+        'content_score': data['content_score'],
+        'wordpress_post_id': post.get('id'),
+        'idempotency_key': idempotency_key,
     }
 
 
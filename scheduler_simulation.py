@@ -0,0 +1,551 @@
+"""
+Scheduler simulation - replays days or weeks of the keyword worker (worker.py) in seconds,
+to size worker counts and daily limits before changing production settings:
+
+    python scheduler_simulation.py --days 14 --workers 4 --per-project 2
+    python scheduler_simulation.py --config simulation.json --json
+
+The real dispatch, claim, lease, retry and cleanup code runs against a scratch database
+(a temporary SQLite file, or SIMULATION_DATABASE_URL) and a virtual clock. Only the article pipeline
+is faked: every keyword goes through stages with a log-normal latency and a failure rate, and
+a worker can crash mid-keyword (its lease then expires and another claim picks the keyword up).
+
+The config file (all keys optional) looks like:
+
+    {
+        "projects": [
+            {"name": "site-a", "daily_limit": 10, "timezone": "Asia/Jerusalem",
+             "start_time": "08:00", "days_of_week": [1, 2, 3, 4, 5], "backlog": 200, "arrivals_per_day": 5}
+        ],
+        "stages": [
+            {"name": "draft", "median_seconds": 120, "sigma": 0.5, "failure_rate": 0.03, "permanent_share": 0.2}
+        ],
+        "crash_rate": 0.01
+    }
+
+Reported: throughput per project, queue wait (added -> first claimed), lease expiries,
+retries and dead letters, worker utilization, and each project's share of the completed
+keywords against its share of the daily limits.
+"""
+import argparse
+import atexit
+import heapq
+import json
+import logging
+import math
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime, time as dt_time, timedelta, timezone
+from typing import Dict, List, Optional
+
+# never the real queue - the simulation drops and recreates every table. Not in-memory SQLite:
+# that is one connection shared by every session, so the app contexts the scheduler code opens
+# inside each other (KeywordCheckpoints) would roll back each other's uncommitted work.
+if os.getenv('SIMULATION_DATABASE_URL'):
+    os.environ['DATABASE_URL'] = os.environ['SIMULATION_DATABASE_URL']
+else:
+    _scratch_fd, _scratch_path = tempfile.mkstemp(prefix='scheduler-simulation-', suffix='.db')
+    os.close(_scratch_fd)
+
+    @atexit.register
+    def _remove_scratch_database():
+        for path in (_scratch_path, f'{_scratch_path}-wal', f'{_scratch_path}-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    os.environ['DATABASE_URL'] = f'sqlite:///{_scratch_path}'
+
+from sqlalchemy import update
+
+import database_scheduler
+from configs import (
+    app,
+    scheduler_max_workers,
+    scheduler_max_workers_per_project,
+    worker_poll_seconds,
+    worker_schedule_refresh_seconds,
+    keyword_lease_seconds,
+)
+from database_models import db, Project, Schedule, KeywordQueue
+from database_scheduler import (
+    KeywordJob,
+    PermanentKeywordError,
+    begin_keyword_attempt,
+    get_worker_id,
+    load_claimed_keyword,
+    record_keyword_exception,
+    record_keyword_result,
+    as_utc,
+)
+from worker import KeywordWorker
+
+
+@dataclass
+class StageProfile:
+    """A fake pipeline stage: log-normal latency around median_seconds, and a failure rate"""
+    name: str
+    median_seconds: float
+    sigma: float = 0.5
+    failure_rate: float = 0.0
+    permanent_share: float = 0.0  # of the failures - the rest are transient (retried)
+
+
+@dataclass
+class ProjectProfile:
+    """A simulated project with one schedule"""
+    name: str
+    daily_limit: int = 5
+    timezone: str = 'Asia/Jerusalem'
+    start_time: str = '08:00'
+    days_of_week: List[int] = field(default_factory=lambda: [1, 2, 3, 4, 5])
+    backlog: int = 100
+    arrivals_per_day: float = 0.0
+
+
+DEFAULT_STAGES = [
+    StageProfile('neuron_query', median_seconds=90, sigma=0.6, failure_rate=0.02),
+    StageProfile('draft', median_seconds=120, sigma=0.5, failure_rate=0.03, permanent_share=0.1),
+    StageProfile('optimized', median_seconds=150, sigma=0.5, failure_rate=0.03, permanent_share=0.1),
+    StageProfile('published', median_seconds=20, sigma=0.8, failure_rate=0.02, permanent_share=0.3),
+]
+
+DEFAULT_PROJECTS = [
+    ProjectProfile('site-a', daily_limit=15, backlog=300, arrivals_per_day=10),
+    ProjectProfile('site-b', daily_limit=5, backlog=100, arrivals_per_day=3),
+    ProjectProfile('site-c', daily_limit=10, timezone='America/New_York', start_time='09:00',
+                   days_of_week=[1, 2, 3, 4, 5, 6, 7], backlog=50),
+]
+
+
+class SimulatedFailure(Exception):
+    """A fake stage failure - its status_code makes classify_error() call it transient (503) or permanent (400)"""
+
+    def __init__(self, stage: str, status_code: int):
+        super().__init__(f"{stage} failed with HTTP {status_code}")
+        self.status_code = status_code
+
+
+class WorkerCrash(Exception):
+    """The worker died mid-keyword - nothing is recorded, the keyword's lease runs out"""
+
+
+@dataclass
+class SimulatedRun:
+    keyword_id: int
+    project_id: int
+    started: datetime
+    finishes: datetime
+    error: Optional[Exception] = None
+    crashed: bool = False
+
+
+class VirtualClock:
+    def __init__(self, start: datetime):
+        self.now = start
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+class SimulatedPool:
+    """
+    Stands in for the worker's ThreadPoolExecutor: submit() starts the keyword's attempt and
+    samples how its stages go, and the simulation completes the future at the virtual time it finishes.
+    """
+
+    def __init__(self, simulation: 'SchedulerSimulation'):
+        self.simulation = simulation
+
+    def submit(self, fn, job: KeywordJob) -> Future:
+        return self.simulation.start_keyword(job)
+
+
+class SchedulerSimulation:
+
+    def __init__(self, projects: List[ProjectProfile], stages: List[StageProfile],
+                 days: float, start: datetime,
+                 max_workers: int = scheduler_max_workers,
+                 max_workers_per_project: int = scheduler_max_workers_per_project,
+                 poll_seconds: int = worker_poll_seconds,
+                 schedule_refresh_seconds: int = worker_schedule_refresh_seconds,
+                 lease_seconds: int = keyword_lease_seconds,
+                 crash_rate: float = 0.0,
+                 seed: int = 1):
+        self.projects = projects
+        self.stages = stages
+        self.start = start
+        self.end = start + timedelta(days=days)
+        self.lease_seconds = lease_seconds
+        self.crash_rate = crash_rate
+        self.random = random.Random(seed)
+        random.seed(seed)  # retry_delay()'s jitter
+
+        self.clock = VirtualClock(start)
+        self.worker = KeywordWorker(max_workers, max_workers_per_project, poll_seconds, schedule_refresh_seconds)
+        self.pool = SimulatedPool(self)
+
+        self._events = []  # heap of (time, seq, kind, payload)
+        self._seq = 0
+        self._runs: Dict[Future, SimulatedRun] = {}
+        self._project_ids: Dict[str, int] = {}
+        self._schedule_ids: Dict[str, int] = {}
+
+        # results
+        self.queue_waits: Dict[int, List[float]] = {}
+        self.completed: Dict[int, int] = {}
+        self.attempts = 0
+        self.crashes = 0
+        self.busy_seconds = 0.0
+        self._expired_claims = set()
+
+    # ---------- setup ----------
+
+    def _push(self, when: datetime, kind: str, payload) -> None:
+        self._seq += 1
+        heapq.heappush(self._events, (when, self._seq, kind, payload))
+
+    def setup(self) -> None:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+
+            for profile in self.projects:
+                project = Project(
+                    name=profile.name,
+                    website_url=f"https://{profile.name}.example.com",
+                    wordpress_user='simulation',
+                    wordpress_password='simulation',
+                    daily_keywords_limit=profile.daily_limit,
+                    created_at=self.start
+                )
+                db.session.add(project)
+                db.session.flush()
+
+                hour, minute = (int(part) for part in profile.start_time.split(':'))
+                schedule = Schedule(
+                    project_id=project.id,
+                    name=f"{profile.name} schedule",
+                    daily_limit=profile.daily_limit,
+                    start_time=dt_time(hour, minute),
+                    timezone=profile.timezone,
+                    days_of_week=profile.days_of_week,
+                    created_at=self.start
+                )
+                db.session.add(schedule)
+                db.session.flush()
+                self._project_ids[profile.name] = project.id
+                self._schedule_ids[profile.name] = schedule.id
+
+                for i in range(profile.backlog):
+                    db.session.add(self._new_keyword(profile, f"{profile.name} backlog {i}"))
+
+            db.session.commit()
+
+        # new keywords during the run - a Poisson process per project
+        for profile in self.projects:
+            if profile.arrivals_per_day <= 0:
+                continue
+            arrival, i = self.start, 0
+            while True:
+                arrival += timedelta(days=self.random.expovariate(profile.arrivals_per_day))
+                if arrival >= self.end:
+                    break
+                self._push(arrival, 'arrival', (profile, f"{profile.name} new {i}"))
+                i += 1
+
+    def _new_keyword(self, profile: ProjectProfile, keyword: str) -> KeywordQueue:
+        return KeywordQueue(
+            project_id=self._project_ids[profile.name],
+            schedule_id=self._schedule_ids[profile.name],
+            keyword=keyword,
+            status='pending',
+            created_at=self.clock.now
+        )
+
+    # ---------- keyword attempts ----------
+
+    def start_keyword(self, job: KeywordJob) -> Future:
+        """Begin a claimed keyword's attempt, and schedule its outcome"""
+        future = Future()
+        now = self.clock.now
+
+        with app.app_context():
+            claimed = load_claimed_keyword(job)
+            if claimed is None:
+                # taken over by another claim - neither a success nor a failure
+                return self._done_now(future, None)
+            keyword, project = claimed
+            try:
+                begin_keyword_attempt(keyword, project)
+            except PermanentKeywordError as e:
+                record_keyword_exception(keyword, e)
+                return self._done_now(future)
+
+            self.attempts += 1
+            if keyword.attempts == 1:
+                wait = (now - as_utc(keyword.created_at)).total_seconds()
+                self.queue_waits.setdefault(job.project_id, []).append(wait)
+
+        # how the stages go
+        elapsed, error = 0.0, None
+        for stage in self.stages:
+            elapsed += self.random.lognormvariate(math.log(stage.median_seconds), stage.sigma)
+            if self.random.random() < stage.failure_rate:
+                permanent = self.random.random() < stage.permanent_share
+                error = SimulatedFailure(stage.name, 400 if permanent else 503)
+                break
+
+        crashed = self.random.random() < self.crash_rate
+        if crashed:
+            elapsed *= self.random.random()
+
+        run = SimulatedRun(job.keyword_id, job.project_id, now, now + timedelta(seconds=elapsed), error, crashed)
+        self._runs[future] = run
+        self._push(run.finishes, 'finish', future)
+        return future
+
+    def _done_now(self, future: Future, result: Optional[bool] = False) -> Future:
+        """A keyword that failed (or was lost) before any stage ran - the worker reaps it right away"""
+        future.set_result(result)
+        self._push(self.clock.now, 'reap', future)
+        return future
+
+    def _finish_keyword(self, future: Future) -> None:
+        run = self._runs.pop(future)
+        self.busy_seconds += (run.finishes - run.started).total_seconds()
+
+        if run.crashed:
+            # nothing recorded - the keyword stays 'processing' until its lease expires
+            self.crashes += 1
+            future.set_exception(WorkerCrash(f"worker crashed on keyword {run.keyword_id}"))
+            self.worker._reap([future])
+            return
+
+        with app.app_context():
+            keyword = db.session.get(KeywordQueue, run.keyword_id)
+            if keyword.status != 'processing' or keyword.processing_by != get_worker_id():
+                success = False
+            elif run.error is None:
+                success = record_keyword_result(keyword, {'success': True, 'title': keyword.keyword})
+            else:
+                record_keyword_exception(keyword, run.error)
+                success = False
+
+        if success:
+            self.completed[run.project_id] = self.completed.get(run.project_id, 0) + 1
+        future.set_result(success)
+        self.worker._reap([future])
+
+    def _renew_leases(self) -> None:
+        """What the lease heartbeat does for the keywords still being worked on"""
+        keyword_ids = [run.keyword_id for run in self._runs.values() if not run.crashed]
+        if not keyword_ids:
+            return
+        with app.app_context():
+            db.session.execute(
+                update(KeywordQueue)
+                .where(
+                    KeywordQueue.id.in_(keyword_ids),
+                    KeywordQueue.status == 'processing',
+                    KeywordQueue.processing_by == get_worker_id()
+                )
+                .values(lease_until=self.clock.now + timedelta(seconds=self.lease_seconds)),
+                execution_options={"synchronize_session": False}
+            )
+            db.session.commit()
+
+    def _count_expired_leases(self) -> None:
+        with app.app_context():
+            expired = db.session.query(KeywordQueue.id, KeywordQueue.claimed_at).filter(
+                KeywordQueue.status == 'processing',
+                KeywordQueue.lease_until < self.clock.now
+            ).all()
+        self._expired_claims.update(expired)
+
+    # ---------- run ----------
+
+    def _next_wakeup(self) -> datetime:
+        now = self.clock.now
+        if self._events and self._events[0][0] <= now:
+            return now
+        candidates = [self.end]
+        if self._events:
+            candidates.append(self._events[0][0])
+        if self.worker._due and self.worker._due[0][0] > now:
+            candidates.append(self.worker._due[0][0])
+        if self.worker._schedules_loaded_at is not None and len(self.worker._due) < len(self.worker._schedules):
+            # a schedule that ran out of keywords is back on the heap after a reload
+            candidates.append(self.worker._schedules_loaded_at
+                              + timedelta(seconds=self.worker.schedule_refresh_seconds))
+        if self._runs:
+            # often enough for the heartbeat to keep the leases alive
+            candidates.append(now + timedelta(seconds=self.lease_seconds / 2))
+
+        wakeup = min(candidates)
+        if wakeup <= now:
+            wakeup = now + timedelta(seconds=self.worker.poll_seconds)
+        return wakeup
+
+    def run(self) -> dict:
+        self.setup()
+
+        previous_clock = database_scheduler.clock
+        previous_lease_seconds = database_scheduler.keyword_lease_seconds
+        database_scheduler.clock = self.clock
+        database_scheduler.keyword_lease_seconds = self.lease_seconds
+        started = time.monotonic()
+        try:
+            while True:
+                while self._events and self._events[0][0] <= self.clock.now:
+                    _, _, kind, payload = heapq.heappop(self._events)
+                    if kind == 'finish':
+                        self._finish_keyword(payload)
+                    elif kind == 'reap':
+                        self.worker._reap([payload])
+                    elif kind == 'arrival':
+                        with app.app_context():
+                            db.session.add(self._new_keyword(*payload))
+                            db.session.commit()
+
+                if self.clock.now >= self.end:
+                    break
+
+                self._renew_leases()
+                self._count_expired_leases()
+                self.worker._dispatch(self.pool)
+                self.clock.now = min(self._next_wakeup(), self.end)
+        finally:
+            database_scheduler.clock = previous_clock
+            database_scheduler.keyword_lease_seconds = previous_lease_seconds
+
+        return self.report(time.monotonic() - started)
+
+    # ---------- report ----------
+
+    def report(self, wall_seconds: float) -> dict:
+        days = (self.end - self.start).total_seconds() / 86400
+
+        with app.app_context():
+            statuses = dict(db.session.query(KeywordQueue.status, db.func.count(KeywordQueue.id))
+                            .group_by(KeywordQueue.status).all())
+            completed_in_database = dict(
+                db.session.query(KeywordQueue.project_id, db.func.count(KeywordQueue.id))
+                .filter(KeywordQueue.status == 'completed').group_by(KeywordQueue.project_id).all()
+            )
+            retried = KeywordQueue.query.filter(KeywordQueue.attempts > 1).count()
+
+        # what the simulation counted must be what the scheduler code saved
+        if completed_in_database != {p: n for p, n in self.completed.items() if n}:
+            raise RuntimeError(f"Completed keywords per project: counted {self.completed}, "
+                               f"saved {completed_in_database}")
+
+        total_completed = sum(self.completed.values())
+        total_limit = sum(profile.daily_limit for profile in self.projects)
+        projects = []
+        ratios = []
+        for profile in self.projects:
+            project_id = self._project_ids[profile.name]
+            completed = self.completed.get(project_id, 0)
+            waits = sorted(self.queue_waits.get(project_id, []))
+            ratios.append(completed / profile.daily_limit if profile.daily_limit else 0.0)
+            projects.append({
+                'name': profile.name,
+                'daily_limit': profile.daily_limit,
+                'completed': completed,
+                'completed_per_day': round(completed / days, 2),
+                'completed_share': round(completed / total_completed, 4) if total_completed else None,
+                'limit_share': round(profile.daily_limit / total_limit, 4) if total_limit else None,
+                'avg_queue_wait_hours': round(sum(waits) / len(waits) / 3600, 2) if waits else None,
+                'p95_queue_wait_hours': round(waits[int(0.95 * (len(waits) - 1))] / 3600, 2) if waits else None,
+            })
+
+        # Jain's index of completed/daily_limit - 1.0 when every project gets the same share of its limit
+        jain = (sum(ratios) ** 2 / (len(ratios) * sum(r * r for r in ratios))) if any(ratios) else None
+
+        return {
+            'simulated_days': round(days, 2),
+            'wall_clock_seconds': round(wall_seconds, 2),
+            'workers': self.worker.max_workers,
+            'workers_per_project': self.worker.max_workers_per_project,
+            'completed': total_completed,
+            'completed_per_day': round(total_completed / days, 2),
+            'attempts': self.attempts,
+            'retried_keywords': retried,
+            'dead_letter': statuses.get('dead_letter', 0),
+            'pending_at_end': statuses.get('pending', 0),
+            'worker_crashes': self.crashes,
+            'lease_expiries': len(self._expired_claims),
+            'worker_utilization': round(self.busy_seconds / (self.worker.max_workers * days * 86400), 4),
+            'fairness_index': round(jain, 4) if jain is not None else None,
+            'projects': projects,
+        }
+
+
+def print_report(report: dict) -> None:
+    print(f"Simulated {report['simulated_days']} days in {report['wall_clock_seconds']}s "
+          f"({report['workers']} workers, {report['workers_per_project']} per project)")
+    print(f"Completed: {report['completed']} ({report['completed_per_day']}/day), attempts: {report['attempts']}, "
+          f"retried: {report['retried_keywords']}, dead letter: {report['dead_letter']}, "
+          f"pending at the end: {report['pending_at_end']}")
+    print(f"Worker crashes: {report['worker_crashes']}, lease expiries: {report['lease_expiries']}, "
+          f"worker utilization: {report['worker_utilization']:.1%}, fairness index: {report['fairness_index']}")
+    print()
+    print(f"{'project':<20}{'limit':>7}{'done':>7}{'/day':>8}{'share':>8}{'limit%':>8}{'avg wait h':>12}{'p95 wait h':>12}")
+    for p in report['projects']:
+        print(f"{p['name']:<20}{p['daily_limit']:>7}{p['completed']:>7}{p['completed_per_day']:>8}"
+              f"{p['completed_share'] or 0:>8.1%}{p['limit_share'] or 0:>8.1%}"
+              f"{p['avg_queue_wait_hours'] if p['avg_queue_wait_hours'] is not None else '-':>12}"
+              f"{p['p95_queue_wait_hours'] if p['p95_queue_wait_hours'] is not None else '-':>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the keyword worker against a virtual clock")
+    parser.add_argument('--config', help="JSON file with projects, stages and crash_rate")
+    parser.add_argument('--days', type=float, default=7)
+    parser.add_argument('--start', default='2025-01-05', help="first simulated day (UTC), YYYY-MM-DD")
+    parser.add_argument('--workers', type=int, default=scheduler_max_workers)
+    parser.add_argument('--per-project', type=int, default=scheduler_max_workers_per_project)
+    parser.add_argument('--lease-seconds', type=int, default=keyword_lease_seconds)
+    parser.add_argument('--crash-rate', type=float, help="chance a worker dies mid-keyword")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    parser.add_argument('--verbose', action='store_true', help="show the scheduler's logging")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL,
+                        format="%(levelname)s %(message)s")
+
+    config = {}
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as file:
+            config = json.load(file)
+
+    projects = [ProjectProfile(**p) for p in config['projects']] if 'projects' in config else DEFAULT_PROJECTS
+    stages = [StageProfile(**s) for s in config['stages']] if 'stages' in config else DEFAULT_STAGES
+    crash_rate = args.crash_rate if args.crash_rate is not None else config.get('crash_rate', 0.01)
+
+    simulation = SchedulerSimulation(
+        projects,
+        stages,
+        days=args.days,
+        start=datetime.strptime(args.start, '%Y-%m-%d').replace(tzinfo=timezone.utc),
+        max_workers=args.workers,
+        max_workers_per_project=args.per_project,
+        lease_seconds=args.lease_seconds,
+        crash_rate=crash_rate,
+        seed=args.seed
+    )
+    report = simulation.run()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Long-running keyword worker - processes the keyword queue all day instead of
+in one batch at midnight:
+
+    python worker.py
+
+- every active schedule gets its daily_limit keywords in slots spread evenly over
+  SCHEDULE_WINDOW_HOURS from its start_time, in its own timezone and on its days_of_week,
+  and never more than daily_limit per rolling 24 hours
+- the next due schedule comes from a heap of (next slot, schedule), so a poll only
+  looks at the schedules that are due
+- at most SCHEDULER_MAX_WORKERS keywords are processed at once
+  (SCHEDULER_MAX_WORKERS_PER_PROJECT per project)
+- on SIGTERM / SIGINT it stops claiming keywords, lets the in-flight ones finish, and exits
+
+Run it with RUN_DAILY_DATABASE_SCHEDULER=0 on the web app, so the midnight batch doesn't run as well.
+"""
+import heapq
+import logging
+import signal
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from configs import (
+    app,
+    scheduler_max_workers,
+    scheduler_max_workers_per_project,
+    worker_poll_seconds,
+    worker_schedule_refresh_seconds,
+)
+from database_models import db, Project, Schedule, KeywordQueue
+from database_schema import check_schema
+from database_scheduler import (
+    KeywordJob,
+    claim_keywords_for_schedule,
+    cleanup_expired_keywords,
+    process_keyword_job,
+    schedule_claims_since,
+    schedule_day_start,
+    next_schedule_slot,
+    as_utc,
+    utcnow,
+)
+
+# window of the daily limit's rolling counter
+ROLLING_WINDOW = timedelta(hours=24)
+
+
+class KeywordWorker:
+    """Polls for due schedules and processes their keywords on a worker pool, until stopped"""
+
+    def __init__(self,
+                 max_workers: int = scheduler_max_workers,
+                 max_workers_per_project: int = scheduler_max_workers_per_project,
+                 poll_seconds: int = worker_poll_seconds,
+                 schedule_refresh_seconds: int = worker_schedule_refresh_seconds):
+        self.max_workers = max(1, max_workers)
+        self.max_workers_per_project = max(1, max_workers_per_project)
+        self.poll_seconds = poll_seconds
+        self.schedule_refresh_seconds = schedule_refresh_seconds
+        self.succeeded = 0
+        self.failed = 0
+        self.lost = 0  # claims another worker took over before they started - neither outcome
+        self._stopping = threading.Event()
+        self._in_flight = {}  # future -> KeywordJob
+        self._running_per_project = defaultdict(int)
+        self._schedules: Dict[int, Schedule] = {}
+        self._due: List[Tuple[datetime, int]] = []  # heap of (next slot, schedule id)
+        self._schedules_loaded_at: Optional[datetime] = None
+
+    def stop(self, *_) -> None:
+        """Stop claiming keywords - run() returns once the in-flight ones are done"""
+        if not self._stopping.is_set():
+            logging.info("Keyword worker stopping, letting in-flight keywords finish")
+        self._stopping.set()
+
+    def run(self) -> None:
+        logging.info(f"Keyword worker started ({self.max_workers} workers, "
+                     f"{self.max_workers_per_project} per project)")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="keyword-worker") as pool:
+            while not self._stopping.is_set():
+                try:
+                    self._dispatch(pool)
+                except Exception as e:
+                    logging.exception(f"Error dispatching keywords: {e}")
+
+                # sleep until the next poll or slot, or until a keyword finishes and frees a worker
+                timeout = self._seconds_until_next_slot()
+                if self._in_flight:
+                    done, _ = wait(list(self._in_flight), timeout=timeout,
+                                   return_when=FIRST_COMPLETED)
+                    self._reap(done)
+                else:
+                    self._stopping.wait(timeout)
+
+            if self._in_flight:
+                logging.info(f"Waiting for {len(self._in_flight)} in-flight keywords")
+                done, _ = wait(list(self._in_flight))
+                self._reap(done)
+
+        logging.info(f"Keyword worker stopped. Succeeded: {self.succeeded}, Failed: {self.failed}")
+        if self.lost:
+            logging.warning(f"{self.lost} keywords were taken over by other workers before they started")
+
+    def _dispatch(self, pool: ThreadPoolExecutor) -> None:
+        """Claim a keyword for every schedule whose slot is due, while there are free workers"""
+        now = utcnow()
+        if (self._schedules_loaded_at is None
+                or (now - self._schedules_loaded_at).total_seconds() >= self.schedule_refresh_seconds):
+            self._load_schedules(now)
+
+        if len(self._in_flight) >= self.max_workers:
+            return
+
+        cleanup_expired_keywords()
+
+        # back on the heap after this poll: due schedules whose project has no free worker, schedules
+        # at their rolling limit (at the time it frees up), and the next slots of the ones handled now
+        # (a schedule that is behind catches up one slot per poll)
+        deferred = []
+
+        while self._due and self._due[0][0] <= now:
+            if self._stopping.is_set() or len(self._in_flight) >= self.max_workers:
+                break
+
+            slot, schedule_id = heapq.heappop(self._due)
+            schedule = self._schedules.get(schedule_id)
+            if schedule is None:
+                continue
+            if self._running_per_project[schedule.project_id] >= self.max_workers_per_project:
+                deferred.append((slot, schedule_id))
+                continue
+
+            # safety net on top of the slots: never more than daily_limit per rolling 24 hours
+            claimed, _ = schedule_claims_since(schedule.id, now - ROLLING_WINDOW)
+            if claimed >= schedule.daily_limit:
+                # looked at again once enough claims have left the window
+                reopens_at = self._window_reopens_at(schedule, now, claimed)
+                if reopens_at is not None:
+                    deferred.append((reopens_at, schedule_id))
+                continue
+
+            jobs = claim_keywords_for_schedule(schedule, 1)
+            if not jobs:
+                # nothing pending - looked at again when the schedules are reloaded
+                continue
+            for job in jobs:
+                logging.info(f"Claimed keyword: {job.keyword} (schedule: {schedule.name}, slot: {slot})")
+                self._in_flight[pool.submit(process_keyword_job, job)] = job
+                self._running_per_project[job.project_id] += 1
+
+            next_slot = self._next_slot(schedule, now)
+            if next_slot is not None:
+                deferred.append((next_slot, schedule_id))
+
+        for entry in deferred:
+            heapq.heappush(self._due, entry)
+
+    def _load_schedules(self, now: datetime) -> None:
+        """(Re)load the active schedules of active projects, and rebuild the heap of their next slots"""
+        with app.app_context():
+            schedules = Schedule.query.join(Project).filter(
+                Project.status == 'active',
+                Schedule.is_active.is_(True)
+            ).all()
+
+            # claims of the last 2 days, in one query - enough to count every schedule's claims since its local midnight
+            claims = defaultdict(list)
+            for schedule_id, claimed_at in db.session.query(
+                    KeywordQueue.schedule_id,
+                    KeywordQueue.claimed_at
+            ).filter(KeywordQueue.claimed_at >= now - 2 * ROLLING_WINDOW):
+                claims[schedule_id].append(as_utc(claimed_at))
+
+        self._schedules = {schedule.id: schedule for schedule in schedules}
+        self._due = []
+        for schedule in schedules:
+            day_start = schedule_day_start(schedule, now)
+            claimed_today = len([c for c in claims[schedule.id] if c >= day_start])
+            slot = next_schedule_slot(schedule, now, claimed_today)
+            if slot is not None:
+                self._due.append((slot, schedule.id))
+        heapq.heapify(self._due)
+        self._schedules_loaded_at = now
+
+        logging.info(f"Loaded {len(schedules)} active schedules, {len(self._due)} with upcoming slots")
+
+    @staticmethod
+    def _next_slot(schedule: Schedule, now: datetime) -> Optional[datetime]:
+        claimed_today, _ = schedule_claims_since(schedule.id, schedule_day_start(schedule, now))
+        return next_schedule_slot(schedule, now, claimed_today)
+
+    @staticmethod
+    def _window_reopens_at(schedule: Schedule, now: datetime, claimed: int) -> Optional[datetime]:
+        """When the schedule's claims in the rolling window drop below its daily_limit again"""
+        with app.app_context():
+            # the claim whose leaving the window frees a place
+            claimed_at = db.session.query(KeywordQueue.claimed_at).filter(
+                KeywordQueue.schedule_id == schedule.id,
+                KeywordQueue.claimed_at >= now - ROLLING_WINDOW
+            ).order_by(KeywordQueue.claimed_at.asc()).offset(max(0, claimed - schedule.daily_limit)).limit(1).scalar()
+        if claimed_at is None:
+            return None
+        return as_utc(claimed_at) + ROLLING_WINDOW + timedelta(seconds=1)
+
+    def _seconds_until_next_slot(self) -> float:
+        """
+        Until the earliest slot that can be dispatched, at most poll_seconds - a slot whose project
+        (or the whole pool) has no free worker waits for a keyword to finish, not for its time
+        """
+        if len(self._in_flight) >= self.max_workers:
+            return self.poll_seconds
+        for slot, schedule_id in sorted(self._due):
+            schedule = self._schedules.get(schedule_id)
+            if schedule is None or self._running_per_project[schedule.project_id] >= self.max_workers_per_project:
+                continue
+            return min(self.poll_seconds, max(0.0, (slot - utcnow()).total_seconds()))
+        return self.poll_seconds
+
+    def _reap(self, done) -> None:
+        for future in done:
+            job: KeywordJob = self._in_flight.pop(future)
+            self._running_per_project[job.project_id] -= 1
+            try:
+                success = future.result()
+            except Exception as e:
+                logging.exception(f"Worker crashed on keyword {job.keyword}: {e}")
+                success = False
+
+            if success is None:
+                self.lost += 1
+            elif success:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(threadName)s %(message)s")
+
+    with app.app_context():
+        if not check_schema():
+            # claiming keywords against an older schema would fail every one of them
+            raise SystemExit(1)
+
+    worker = KeywordWorker()
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()